@@ -3,13 +3,12 @@ import google.generativeai as genai
 <<<<<<< HEAD
 from auth.auth_utils import init_db
 from components.login_page import show_login_page
-from core.utils import save_conversations, load_conversations
+from core.utils import save_conversations, load_conversation_index
 
 
 # HANDLES ALL SESSION STATE VALUES
 def init_session_state(): 
     defaults = { "chat_history": [],
-                "conversations": load_conversations(), 
                 "active_conversation": 0, 
                 "selected_tone": "Compassionate Listener",
                 "show_emergency_page": False,
@@ -18,6 +17,9 @@ def init_session_state():
     for key, value in defaults.items(): 
         if key not in st.session_state: 
             st.session_state[key] = value 
+    # Only the titles index; messages load when a conversation becomes active
+    if "conversations" not in st.session_state:
+        st.session_state.conversations = load_conversation_index()
 init_session_state()
 
 st.set_page_config(page_title="TalkHeal", page_icon="💬", layout="wide")
@@ -31,13 +33,13 @@ st.markdown(no_sidebar_style, unsafe_allow_html=True)
 
 # --- DB Initialization ---
 =======
-import cv2
-
 # --- LOCAL IMPORTS ---
 from auth.auth_utils import init_db
 from components.login_page import show_login_page
-from hand_gesture_recognition_mediapipe.inference import gesture_mode
-from core.utils import save_conversations, load_conversations, get_current_time, create_new_conversation
+from core.lazy_import import lazy_function
+# MediaPipe, OpenCV and the TFLite models load only when Gesture Mode is opened
+gesture_mode = lazy_function("hand_gesture_recognition_mediapipe.inference", "gesture_mode")
+from core.utils import save_conversations, load_conversation_index, get_current_time, create_new_conversation
 from core.config import configure_gemini
 from css.styles import apply_custom_css
 from components.header import render_header
@@ -109,13 +111,15 @@ if st.session_state.get("authenticated", False):
             st.switch_page("pages/About.py")
     with col_logout:
         if st.button("Logout", key="logout_btn", use_container_width=True):
-            for key in ["authenticated", "user_email", "user_name", "show_signup"]:
+            for key in ["authenticated", "user_email", "user_name", "show_signup",
+                        "conversations", "pinned_messages", "hydrated_conversations",
+                        "transcript_windows"]:
 <<<<<<< HEAD
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
 
-from core.utils import save_conversations, load_conversations
+from core.utils import save_conversations, load_conversation_index, load_pinned_messages
 from core.config import configure_gemini, PAGE_CONFIG
 from core.utils import get_current_time, create_new_conversation
 from css.styles import apply_custom_css
@@ -131,7 +135,7 @@ from components.profile import apply_global_font_size
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 if "conversations" not in st.session_state:
-    st.session_state.conversations = load_conversations()
+    st.session_state.conversations = load_conversation_index()
 if "active_conversation" not in st.session_state:
     st.session_state.active_conversation = -1
 if "show_emergency_page" not in st.session_state:
@@ -151,7 +155,6 @@ if "mental_disorders" not in st.session_state:
 # --- SESSION STATE INIT ---
 defaults = {
     "chat_history": [],
-    "conversations": load_conversations(),
     "active_conversation": -1,
     "show_emergency_page": False,
     "show_focus_session": False,
@@ -168,7 +171,7 @@ defaults = {
 if "selected_tone" not in st.session_state:
     st.session_state.selected_tone = "Compassionate Listener"
 if "pinned_messages" not in st.session_state:
-    st.session_state.pinned_messages = []
+    st.session_state.pinned_messages = load_pinned_messages()
 
 if "active_page" not in st.session_state:
     st.session_state.active_page = "TalkHeal"  # default
@@ -189,6 +192,9 @@ model = configure_gemini()
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
+# Only the titles index; messages load when a conversation becomes active
+if "conversations" not in st.session_state:
+    st.session_state.conversations = load_conversation_index()
 
 # --- APPLY CONFIG & STYLES ---
 apply_global_font_size()
@@ -229,7 +235,7 @@ main_area = st.container()
 # --- CONVERSATION INIT ---
 >>>>>>> 7aad9a9 (Clean commit: add project files, ignore env & checkpoints)
 if not st.session_state.conversations:
-    saved_conversations = load_conversations()
+    saved_conversations = load_conversation_index()
     if saved_conversations:
         st.session_state.conversations = saved_conversations
         if st.session_state.active_conversation == -1:
@@ -1,107 +1,161 @@
+import os
 import sqlite3
-import bcrypt
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+from auth.jwt_utils import verify_reset_token
+from auth.login_guard import get_login_guard
+from auth.password_hasher import get_password_hasher
+from core.db import get_database, migrate_all
+
+# email -> (updated_at, cached at). Password changes made by this process update it directly;
+# the TTL bounds how long a change made by another process can go unnoticed
+USER_VERSION_TTL = float(os.getenv("TALKHEAL_USER_VERSION_TTL", "60"))
+USER_VERSION_CACHE_SIZE = 10_000
+_user_versions = OrderedDict()
+_user_versions_lock = threading.Lock()
 
 def init_db():
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            updated_at TEXT NOT NULL
-        )
-    """)
-    conn.commit()
-    conn.close()
+    migrate_all()
 
 def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return get_password_hasher().hash(password)
 
 def check_password(password, hashed):
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+    return get_password_hasher().verify(password, hashed)
 
 def register_user(name, email, password):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
     hashed_pw = hash_password(password)
     current_time = datetime.now().isoformat()
     
     try:
-        cursor.execute("""
-            INSERT INTO users (name, email, password, updated_at) 
-            VALUES (?, ?, ?, ?)
-        """, (name, email, hashed_pw, current_time))
-        conn.commit()
+        with get_database("users").transaction() as conn:
+            conn.execute("""
+                INSERT INTO users (name, email, password, updated_at) 
+                VALUES (?, ?, ?, ?)
+            """, (name, email, hashed_pw, current_time))
+        get_login_guard().forget_missing(email)
+        remember_user_version(email, current_time)
         return True, "User registered successfully"
     except sqlite3.IntegrityError:
         return False, "Email already registered"
-    finally:
-        conn.close()
-
-def authenticate_user(email, password):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT name, password FROM users WHERE email = ?", (email,))
-    result = cursor.fetchone()
-    conn.close()
-    if result and check_password(password, result[1]):
+
+def authenticate_user(email, password, client_id=None):
+    """Returns (True, user) on success, otherwise (False, None) or (False, message) when throttled."""
+    guard = get_login_guard()
+    wait = guard.acquire(email, client_id)
+    if wait:
+        return False, f"Too many login attempts. Please try again in {int(wait) + 1} seconds."
+
+    hasher = get_password_hasher()
+    db = get_database("users")
+    result = None
+    if not guard.is_missing(email):
+        result = db.query_one("SELECT name, password FROM users WHERE email = ?", (email,))
+    if result is None:
+        guard.remember_missing(email)
+        # Same cost as a wrong password, so timing doesn't tell which emails are registered
+        return hasher.verify_dummy(password), None
+    if check_password(password, result[1]):
+        if hasher.needs_rehash(result[1]):
+            # The configured cost changed; upgrade the hash now that we know the password.
+            # updated_at stays, so pending reset links remain valid
+            with db.transaction() as conn:
+                conn.execute("UPDATE users SET password = ? WHERE email = ? AND password = ?",
+                             (hasher.hash(password), email, result[1]))
         user = {"name": result[0], "email": email}
         return True, user
     return False, None
 
 def check_user(email):
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    result = cursor.fetchone()
-    conn.close()
-    if result:
-        return True , result[4]
+    updated_at = get_user_version(email)
+    if updated_at is not None:
+        return True , updated_at
     return False , None
 
+def remember_user_version(email, updated_at):
+    with _user_versions_lock:
+        _user_versions[email] = (updated_at, time.monotonic())
+        _user_versions.move_to_end(email)
+        if len(_user_versions) > USER_VERSION_CACHE_SIZE:
+            _user_versions.popitem(last=False)
+
+def get_user_versions(emails):
+    """Returns {email: updated_at} for the emails that exist, with one query for all cache misses."""
+    versions, missing = {}, []
+    now = time.monotonic()
+    with _user_versions_lock:
+        for email in set(emails):
+            cached = _user_versions.get(email)
+            if cached is not None and now - cached[1] < USER_VERSION_TTL:
+                versions[email] = cached[0]
+            else:
+                missing.append(email)
+
+    db = get_database("users")
+    # Stay well below SQLite's limit on bound parameters
+    for i in range(0, len(missing), 500):
+        chunk = missing[i:i + 500]
+        rows = db.query_all(f"SELECT email, updated_at FROM users WHERE email IN ({','.join('?' * len(chunk))})",
+                            chunk)
+        for email, updated_at in rows:
+            versions[email] = updated_at
+            remember_user_version(email, updated_at)
+    return versions
+
+def get_user_version(email):
+    return get_user_versions([email]).get(email)
+
 def reset_password(email, new_password):
     hashed_pw = hash_password(new_password)
     current_time = datetime.now().isoformat()
     try:
-        conn = sqlite3.connect("users.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-        result = cursor.fetchone()
-
-        if not result:
-            conn.close()
+        with get_database("users").transaction() as conn:
+            updated = conn.execute("UPDATE users SET password = ? , updated_at = ? WHERE email = ?",
+                                   (hashed_pw, current_time, email)).rowcount
+        if not updated:
             return False, "User with this email does not exist."
-
-        cursor.execute("UPDATE users SET password = ? , updated_at = ? WHERE email = ?", (hashed_pw, current_time, email))
-        conn.commit()
-        conn.close()
+        # Reset links issued before this moment stop matching right away
+        remember_user_version(email, current_time)
         return True, "Password updated successfully."
     except sqlite3.Error as e:
-        conn.close()
         return False, f"Database error: {str(e)}"
 
 def verify_token_count(email, token_updated_at):
     try:
-        conn = sqlite3.connect("users.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT updated_at FROM users WHERE email = ?", (email,))
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
-            return False, "User with this email does not exist."
+        db_updated_at = get_user_version(email)
+    except sqlite3.Error as e:
+        return False, f"Database error: {str(e)}"
 
-        db_updated_at = result[0]
+    if db_updated_at is None:
+        return False, "User with this email does not exist."
 
-        if str(db_updated_at) != str(token_updated_at):
-            conn.close()
-            return False, "Reset link is no longer valid (token outdated)."
+    if str(db_updated_at) != str(token_updated_at):
+        return False, "Reset link is no longer valid (token outdated)."
 
-        conn.close()
-        return True, None
+    return True, None
 
+def verify_reset_tokens(tokens):
+    """Checks reset tokens in bulk: signature and expiry, then the password version they were issued for.
+
+    Returns one (valid, payload, message) per token; payload is None when the token itself is invalid.
+    """
+    decoded = [verify_reset_token(token) for token in tokens]
+    emails = [payload.get("email") for ok, payload in decoded if ok and payload]
+    try:
+        versions = get_user_versions(emails)
     except sqlite3.Error as e:
-        conn.close()
-        return False, f"Database error: {str(e)}"
\ No newline at end of file
+        return [(False, payload if ok else None, f"Database error: {str(e)}") for ok, payload in decoded]
+
+    results = []
+    for ok, payload in decoded:
+        if not ok or not payload:
+            results.append((False, None, payload or "Invalid token."))
+        elif payload.get("email") not in versions:
+            results.append((False, payload, "User with this email does not exist."))
+        elif str(versions[payload["email"]]) != str(payload.get("pwd_update")):
+            results.append((False, payload, "Reset link is no longer valid (token outdated)."))
+        else:
+            results.append((True, payload, None))
+    return results
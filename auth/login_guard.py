@@ -0,0 +1,111 @@
+"""
+Throttling and negative caching in front of password checks.
+
+Login attempts draw from two token buckets, one per email and one per
+client address (when the address is known), so neither hammering one account nor spraying many
+accounts from one place can burn more than a fixed amount of bcrypt time.
+Emails that don't exist are remembered for a short while to spare the
+database; the caller still runs a dummy verification for them so the
+response time doesn't reveal which accounts exist.
+"""
+import os
+import threading
+import time
+
+# Burst size and seconds per refilled token
+EMAIL_BUCKET = (int(os.getenv("TALKHEAL_LOGIN_EMAIL_BURST", "5")),
+                float(os.getenv("TALKHEAL_LOGIN_EMAIL_REFILL", "30")))
+CLIENT_BUCKET = (int(os.getenv("TALKHEAL_LOGIN_CLIENT_BURST", "20")),
+                 float(os.getenv("TALKHEAL_LOGIN_CLIENT_REFILL", "6")))
+MISSING_EMAIL_TTL = float(os.getenv("TALKHEAL_LOGIN_MISSING_TTL", "60"))
+# Above this many tracked keys, idle entries are dropped
+MAX_TRACKED = 50_000
+
+
+class TokenBucketLimiter:
+    def __init__(self, capacity, refill_seconds, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_seconds = refill_seconds
+        self.clock = clock
+        self._buckets = {}      # key -> (tokens, updated at)
+
+    def _tokens(self, key, now):
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) / self.refill_seconds)
+
+    def retry_after(self, key):
+        """Seconds until ``key`` has a token again; 0 if it has one now."""
+        tokens = self._tokens(key, self.clock())
+        return 0 if tokens >= 1 else (1 - tokens) * self.refill_seconds
+
+    def take(self, key):
+        now = self.clock()
+        self._buckets[key] = (self._tokens(key, now) - 1, now)
+        if len(self._buckets) > MAX_TRACKED:
+            self._buckets = {k: v for k, v in self._buckets.items() if self._tokens(k, now) < self.capacity}
+
+
+class LoginGuard:
+    def __init__(self, email_bucket=EMAIL_BUCKET, client_bucket=CLIENT_BUCKET,
+                 missing_ttl=MISSING_EMAIL_TTL, clock=time.monotonic):
+        self.clock = clock
+        self.missing_ttl = missing_ttl
+        self._by_email = TokenBucketLimiter(*email_bucket, clock=clock)
+        self._by_client = TokenBucketLimiter(*client_bucket, clock=clock)
+        self._missing = {}      # email -> expires at
+        self._lock = threading.Lock()
+
+    def acquire(self, email, client):
+        """Counts one attempt. Returns 0 if it may proceed, else seconds to wait.
+
+        A ``client`` of None only draws from the email bucket, so clients
+        without a known address don't throttle each other.
+        """
+        email = normalize_email(email)
+        with self._lock:
+            wait = self._by_email.retry_after(email)
+            if client is not None:
+                wait = max(wait, self._by_client.retry_after(client))
+            if wait:
+                return wait
+            self._by_email.take(email)
+            if client is not None:
+                self._by_client.take(client)
+            return 0
+
+    # Lookups are exact matches, so missing emails are remembered verbatim
+    def is_missing(self, email):
+        with self._lock:
+            expires = self._missing.get(email)
+            if expires is not None and expires <= self.clock():
+                del self._missing[email]
+                return False
+            return expires is not None
+
+    def remember_missing(self, email):
+        with self._lock:
+            now = self.clock()
+            if len(self._missing) > MAX_TRACKED:
+                self._missing = {k: v for k, v in self._missing.items() if v > now}
+            self._missing[email] = now + self.missing_ttl
+
+    def forget_missing(self, email):
+        with self._lock:
+            self._missing.pop(email, None)
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_login_guard():
+    """Returns the process-wide guard."""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = LoginGuard()
+        return _guard
@@ -0,0 +1,212 @@
+"""
+Persistent outbox for emails sent by the app.
+
+``enqueue`` stores the message in SQLite and returns at once; a background
+worker delivers due messages over one authenticated SMTP connection that it
+keeps open between messages. Failed sends are retried with jittered
+exponential backoff until ``MAX_ATTEMPTS``, after which the message is
+marked ``failed``. Because the outbox is on disk, messages queued just
+before a restart are still delivered. Once a message is sent or has
+failed for good its body is blanked, so reset links don't linger on disk.
+"""
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from dotenv import load_dotenv
+
+from core.db import get_database
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+SMTP_HOST = os.getenv("TALKHEAL_SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("TALKHEAL_SMTP_PORT", "465"))
+# Implicit TLS as Gmail expects on 465; set to 0 for a local stand-in such as aiosmtpd
+SMTP_SSL = os.getenv("TALKHEAL_SMTP_SSL", "1") != "0"
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 15 * 60
+# Close the SMTP connection after this long without mail
+IDLE_DISCONNECT_SECONDS = 60
+# A message left in 'sending' this long belonged to a worker that died
+STALE_SENDING_SECONDS = 5 * 60
+# Pause after an unexpected worker error before trying again
+ERROR_RETRY_SECONDS = 5
+
+
+def connect_smtp(host=SMTP_HOST, port=SMTP_PORT, use_ssl=SMTP_SSL,
+                 username=EMAIL_ADDRESS, password=EMAIL_PASSWORD):
+    smtp = smtplib.SMTP_SSL(host, port, timeout=30) if use_ssl else smtplib.SMTP(host, port, timeout=30)
+    if username and password:
+        smtp.login(username, password)
+    return smtp
+
+
+class MailOutbox:
+    def __init__(self, db=None, connect=connect_smtp, sender=EMAIL_ADDRESS,
+                 max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE_SECONDS):
+        self.db = db or get_database("mail")
+        self.connect = connect
+        self.sender = sender
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self._smtp = None
+        self._last_used = 0
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, to_addr, subject, body):
+        """Stores a message for delivery and makes sure the worker is running. Returns its id."""
+        now = time.time()
+        with self.db.transaction() as conn:
+            message_id = conn.execute("""
+                INSERT INTO outbox (to_addr, subject, body, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (to_addr, subject, body, now, now)).lastrowid
+        self.start()
+        with self._lock:
+            self._idle.clear()
+            self._wake.set()
+        return message_id
+
+    def start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True, name="mail-outbox")
+                self._worker.start()
+
+    def wait_idle(self, timeout=None):
+        """Blocks until nothing is due right now. Returns False on timeout."""
+        return self._idle.wait(timeout)
+
+    def status(self, message_id):
+        return self.db.query_one("SELECT status, attempts, last_error FROM outbox WHERE id = ?", (message_id,))
+
+    # ---------- Worker ----------
+    def _run(self):
+        while True:
+            try:
+                wait = self._work()
+            except Exception:
+                # A database or SMTP setup error must not end the worker
+                logger.exception("Mail outbox worker failed; retrying in %s seconds", ERROR_RETRY_SECONDS)
+                self._disconnect()
+                wait = ERROR_RETRY_SECONDS
+            self._wake.wait(wait)
+
+    def _work(self):
+        """Sends everything due. Returns how long to sleep until the next pass."""
+        self._wake.clear()
+        # Runs every pass, as a worker in another process may have died mid-send
+        self._requeue_stale()
+        while self._send_next():
+            pass
+        with self._lock:
+            if not self._wake.is_set():
+                self._idle.set()
+        row = self.db.query_one("SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'")
+        wait = IDLE_DISCONNECT_SECONDS if row[0] is None else max(0.0, row[0] - time.time())
+        if self._smtp is not None and time.time() - self._last_used >= IDLE_DISCONNECT_SECONDS:
+            self._disconnect()
+        return min(wait, IDLE_DISCONNECT_SECONDS)
+
+    def _requeue_stale(self):
+        with self.db.transaction() as conn:
+            conn.execute("""
+                UPDATE outbox SET status = 'pending'
+                WHERE status = 'sending' AND next_attempt_at < ?
+            """, (time.time() - STALE_SENDING_SECONDS,))
+
+    def _send_next(self):
+        """Sends the oldest due message. Returns False when none is due."""
+        now = time.time()
+        row = self.db.query_one("""
+            SELECT id, to_addr, subject, body, attempts FROM outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at LIMIT 1
+        """, (now,))
+        if row is None:
+            return False
+        message_id, to_addr, subject, body, attempts = row
+        with self.db.transaction() as conn:
+            # Claim it, so a worker in another process doesn't send it too
+            claimed = conn.execute("""
+                UPDATE outbox SET status = 'sending', next_attempt_at = ?
+                WHERE id = ? AND status = 'pending'
+            """, (now, message_id)).rowcount
+        if not claimed:
+            return True
+
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = to_addr
+        msg.set_content(body)
+        try:
+            self._deliver(msg)
+        except Exception as e:
+            attempts += 1
+            failed = attempts >= self.max_attempts
+            delay = random.uniform(0.5, 1.0) * min(BACKOFF_MAX_SECONDS, self.backoff_base * 2 ** attempts)
+            with self.db.transaction() as conn:
+                conn.execute("""
+                    UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?,
+                        body = CASE WHEN ? THEN '' ELSE body END
+                    WHERE id = ?
+                """, ("failed" if failed else "pending", attempts, time.time() + delay, str(e), failed,
+                      message_id))
+            return True
+
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE outbox SET status = 'sent', attempts = ?, body = '' WHERE id = ?",
+                         (attempts + 1, message_id))
+        return True
+
+    def _deliver(self, msg):
+        for retry in (True, False):
+            if self._smtp is None:
+                self._smtp = self.connect()
+            try:
+                self._smtp.send_message(msg)
+                self._last_used = time.time()
+                return
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection; reconnect once right away
+                self._smtp = None
+                if not retry:
+                    raise
+            except Exception:
+                self._disconnect()
+                raise
+
+    def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_mail_outbox():
+    """Returns the process-wide outbox."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = MailOutbox()
+        return _outbox
@@ -0,0 +1,121 @@
+"""
+bcrypt hashing off the Streamlit script threads.
+
+Hashing and verification run in a process pool sized to the machine's
+cores, so a burst of logins queues there instead of occupying the threads
+that serve every session's reruns. The work factor comes from
+TALKHEAL_BCRYPT_ROUNDS; hashes made with another cost are reported by
+``needs_rehash`` so they can be upgraded (or downgraded) at the next login.
+
+The workers are started through a fork server (spawn where there is none)
+rather than by forking the Streamlit server, whose many running threads
+could leave locks held in a forked child.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import bcrypt
+
+BCRYPT_ROUNDS = int(os.getenv("TALKHEAL_BCRYPT_ROUNDS", "12"))
+# 0 runs bcrypt on the calling thread
+HASH_WORKERS = int(os.getenv("TALKHEAL_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _verify(password, hashed):
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        # Malformed or empty stored hash
+        return False
+
+
+def get_rounds(hashed):
+    """Cost factor of a bcrypt hash such as ``$2b$12$...``, or None if it isn't one."""
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=HASH_WORKERS):
+        self.rounds = rounds
+        self.workers = workers
+        self._pool = None
+        self._dummy_hash = None
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args):
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            return self._pool.submit(fn, *args)
+
+    # ---------- Futures, for callers that do other work meanwhile ----------
+    def submit_hash(self, password):
+        return self._submit(_hash, password, self.rounds)
+
+    def submit_verify(self, password, hashed):
+        return self._submit(_verify, password, hashed)
+
+    # ---------- Blocking ----------
+    def hash(self, password):
+        return self.submit_hash(password).result()
+
+    def verify(self, password, hashed):
+        return self.submit_verify(password, hashed).result()
+
+    # ---------- asyncio ----------
+    async def hash_async(self, password):
+        return await asyncio.wrap_future(self.submit_hash(password))
+
+    async def verify_async(self, password, hashed):
+        return await asyncio.wrap_future(self.submit_verify(password, hashed))
+
+    def verify_dummy(self, password):
+        """Costs as much as a real check but always fails, for accounts that don't exist."""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash("talkheal-dummy-password")
+        self.verify(password, self._dummy_hash)
+        return False
+
+    def needs_rehash(self, hashed):
+        return get_rounds(hashed) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """Returns the process-wide hasher."""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            _hasher = PasswordHasher()
+        return _hasher
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Auth lookups per second: a new sqlite3 connection per call (the old
+auth_utils) against the connection pool from core.db. Password hashing is
+left out; this measures the database path only.
+
+Streamlit runs each rerun on a new thread, so the pool is also measured
+with every few lookups made from a fresh thread, which includes the
+thread start-up cost. That row is the one to compare against.
+
+Usage:
+    python benchmarks/bench_auth_lookups.py [--users 1000] [--lookups 20000] [--per-rerun 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.db import MIGRATIONS, Database
+
+
+def legacy_check_user(path, email):
+    """What check_user() did before: connect, query, close."""
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+    result = cursor.fetchone()
+    conn.close()
+    return result
+
+
+def pooled_check_user(db, email):
+    return db.query_one("SELECT updated_at FROM users WHERE email = ?", (email,))
+
+
+def rate(fn, emails):
+    start = time.perf_counter()
+    for email in emails:
+        fn(email)
+    return len(emails) / (time.perf_counter() - start)
+
+
+def rate_per_rerun(fn, emails, per_rerun):
+    """Like rate(), but each run of ``per_rerun`` lookups happens on a new thread."""
+    def rerun(batch):
+        for email in batch:
+            fn(email)
+
+    start = time.perf_counter()
+    for i in range(0, len(emails), per_rerun):
+        thread = threading.Thread(target=rerun, args=(emails[i:i + per_rerun],))
+        thread.start()
+        thread.join()
+    return len(emails) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--per-rerun", type=int, default=5, help="lookups per simulated rerun thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "users.db"), MIGRATIONS["users"])
+        with db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO users (name, email, password, updated_at) VALUES (?, ?, ?, ?)",
+                [(f"User {i}", f"user{i}@example.com", "x" * 60, "2025-01-01T00:00:00")
+                 for i in range(args.users)])
+        emails = [f"user{random.randrange(args.users)}@example.com" for _ in range(args.lookups)]
+
+        results = [
+            ("connect per call (old)", rate(lambda email: legacy_check_user(db.path, email), emails)),
+            ("pool, one thread", rate(lambda email: pooled_check_user(db, email), emails)),
+            ("connect per call, reruns", rate_per_rerun(lambda email: legacy_check_user(db.path, email),
+                                                        emails, args.per_rerun)),
+            ("pool, reruns", rate_per_rerun(lambda email: pooled_check_user(db, email), emails, args.per_rerun)),
+        ]
+        db.close()
+
+    print(f"{'path':<28}{'lookups/s':>12}")
+    for name, per_second in results:
+        print(f"{name:<28}{per_second:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
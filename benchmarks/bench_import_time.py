@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cold-start import cost of the modules TalkHeal.py loads at startup.
+
+TalkHeal.py itself and the chat interface and sidebar it imports can't be
+imported while they carry the baseline's merge markers, so the list
+covers everything else TalkHeal.py imports at startup. The entry points
+it loads lazily (on first use) are measured separately, to show what that
+first use costs.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``;
+the script reports the cumulative import time, peak RSS of that process and
+its heaviest direct imports. Heavy libraries that should now load lazily
+(TensorFlow, MediaPipe, OpenCV, pygame, pandas, plotly.express, sklearn)
+are flagged if they still show up.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 3] [--top 5] [modules ...]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_MODULES = [
+    "core.utils",
+    "core.config",
+    "css.styles",
+    "auth.auth_utils",
+    "components.login_page",
+    "components.header",
+    "components.message_bubbles",
+    "components.transcript_window",
+    "components.mood_dashboard",
+    "components.emergency_page",
+    "components.focus_session",
+    "components.profile",
+]
+# Loaded through core.lazy_import the first time they are used
+LAZY_ENTRY_POINTS = [
+    "hand_gesture_recognition_mediapipe.inference",
+]
+HEAVY = ("tensorflow", "mediapipe", "cv2", "pygame", "pandas", "plotly.express", "sklearn")
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+CHILD = """
+import resource, sys
+import {module}
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stdout)
+"""
+
+
+def measure(module):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(module=module)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    # Children are printed before their parent, one level of indent (two spaces) deeper
+    cumulative_ms, children, loaded = 0.0, {}, set()
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        depth, name, us = (len(match.group(3)) - 1) // 2, match.group(4), int(match.group(2))
+        loaded.add(name)
+        if depth == 1:
+            children[name] = us
+        elif depth == 0:
+            if name == module:
+                cumulative_ms = us / 1000
+                break
+            children = {}
+    rss_mb = int(result.stdout.strip().splitlines()[-1]) / 1024     # ru_maxrss is in KiB on Linux
+    return (cumulative_ms, rss_mb, children, loaded), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", help="modules to measure (default: startup and lazy entry points)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.modules:
+        report(args.modules, args.runs, args.top)
+    else:
+        print("== startup imports")
+        report(STARTUP_MODULES, args.runs, args.top)
+        print("\n== lazy entry points, on first use")
+        report(LAZY_ENTRY_POINTS, args.runs, args.top)
+
+
+def report(modules, runs, top):
+    print(f"{'module':<32}{'import ms':>12}{'peak RSS MB':>14}  heavy deps loaded")
+    for module in modules:
+        samples = []
+        for _ in range(runs):
+            sample, error = measure(module)
+            if sample is None:
+                print(f"{module:<32}  import failed: {error}")
+                break
+            samples.append(sample)
+        if not samples:
+            continue
+        import_ms = statistics.median(sample[0] for sample in samples)
+        rss_mb = statistics.median(sample[1] for sample in samples)
+        _, _, children, loaded = samples[-1]
+        heavy = sorted(name for name in loaded if name in HEAVY)
+        print(f"{module:<32}{import_ms:>12.1f}{rss_mb:>14.1f}  {', '.join(heavy) or '-'}")
+        if top:
+            heaviest = sorted(children.items(), key=lambda item: -item[1])[:top]
+            for name, us in heaviest:
+                print(f"    {name:<28}{us / 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
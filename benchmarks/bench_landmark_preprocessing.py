@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Per-frame cost of turning one MediaPipe hand into classifier inputs: the
+list-based helpers app.py used to have against the vectorized ones in
+hand_gesture_recognition_mediapipe.landmarks.
+
+Hands are synthetic objects shaped like MediaPipe's NormalizedLandmarkList.
+If OpenCV is installed the legacy path uses cv.boundingRect as it did;
+otherwise the same rectangle is computed from the grown array.
+
+Usage:
+    python benchmarks/bench_landmark_preprocessing.py [--frames 20000] [--runs 5]
+"""
+import argparse
+import copy
+import itertools
+import os
+import random
+import statistics
+import sys
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hand_gesture_recognition_mediapipe.landmarks import (
+    NUM_LANDMARKS, bounding_rect, landmarks_to_array, normalize_landmarks, normalize_point_history,
+)
+
+try:
+    import cv2 as cv
+except ImportError:
+    cv = None
+
+WIDTH, HEIGHT = 960, 540
+HISTORY_LENGTH = 16
+
+
+# ---------- What app.py did per hand before ----------
+def legacy_bounding_rect(landmarks):
+    landmark_array = np.empty((0, 2), int)
+    for landmark in landmarks.landmark:
+        landmark_x = min(int(landmark.x * WIDTH), WIDTH - 1)
+        landmark_y = min(int(landmark.y * HEIGHT), HEIGHT - 1)
+        landmark_array = np.append(landmark_array, [np.array((landmark_x, landmark_y))], axis=0)
+    if cv is not None:
+        x, y, w, h = cv.boundingRect(landmark_array)
+        return [x, y, x + w, y + h]
+    (x1, y1), (x2, y2) = landmark_array.min(axis=0), landmark_array.max(axis=0)
+    return [x1, y1, x2 + 1, y2 + 1]
+
+
+def legacy_landmark_list(landmarks):
+    return [[min(int(landmark.x * WIDTH), WIDTH - 1), min(int(landmark.y * HEIGHT), HEIGHT - 1)]
+            for landmark in landmarks.landmark]
+
+
+def legacy_pre_process_landmark(landmark_list):
+    temp = copy.deepcopy(landmark_list)
+    base_x, base_y = temp[0]
+    for point in temp:
+        point[0] -= base_x
+        point[1] -= base_y
+    temp = list(itertools.chain.from_iterable(temp))
+    max_value = max(list(map(abs, temp)))
+    return list(map(lambda n: n / max_value, temp))
+
+
+def legacy_pre_process_point_history(point_history):
+    temp = copy.deepcopy(point_history)
+    base_x, base_y = 0, 0
+    for index, point in enumerate(temp):
+        if index == 0:
+            base_x, base_y = point
+        temp[index][0] = (point[0] - base_x) / WIDTH
+        temp[index][1] = (point[1] - base_y) / HEIGHT
+    return list(itertools.chain.from_iterable(temp))
+
+
+def legacy_frame(hand, point_history):
+    brect = legacy_bounding_rect(hand)
+    landmark_list = legacy_landmark_list(hand)
+    features = legacy_pre_process_landmark(landmark_list)
+    history = legacy_pre_process_point_history(point_history)
+    return brect, features, history
+
+
+def make_vectorized_frame():
+    points = np.empty((NUM_LANDMARKS, 2), np.float32)
+    features = np.empty(NUM_LANDMARKS * 2, np.float32)
+    history = np.empty(HISTORY_LENGTH * 2, np.float32)
+
+    def frame(hand, point_history):
+        landmarks_to_array(hand, WIDTH, HEIGHT, out=points)
+        brect = bounding_rect(points)
+        return (brect, normalize_landmarks(points, out=features),
+                normalize_point_history(point_history, WIDTH, HEIGHT, out=history))
+    return frame
+
+
+def run(frame, hands, point_history, frames):
+    start = time.perf_counter()
+    for i in range(frames):
+        frame(hands[i % len(hands)], point_history)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    hands = [SimpleNamespace(landmark=[SimpleNamespace(x=rng.random(), y=rng.random())
+                                       for _ in range(NUM_LANDMARKS)]) for _ in range(64)]
+    point_history = deque(([rng.randrange(WIDTH), rng.randrange(HEIGHT)] for _ in range(HISTORY_LENGTH)),
+                          maxlen=HISTORY_LENGTH)
+
+    vectorized = make_vectorized_frame()
+    print(f"{'':<12}{'us/frame':>10}{'frames/s':>12}   (one hand, median of {args.runs} runs)")
+    results = {}
+    for name, frame in (("legacy", legacy_frame), ("vectorized", vectorized)):
+        results[name] = statistics.median(run(frame, hands, point_history, args.frames) for _ in range(args.runs))
+        print(f"{name:<12}{results[name]:>10.1f}{1e6 / results[name]:>12.0f}")
+    print(f"speedup: {results['legacy'] / results['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Cold-start cost of resolving who owns the conversations and loading the
+sidebar index: the old public-IP lookup against the local identity.
+
+Usage:
+    python benchmarks/bench_storage_identity.py [--runs 5] [--conversations 200] [--offline]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.conversation_repository import ConversationRepository
+from core.session_identity import new_session_id, sign_session_id, verify_session_cookie, storage_key
+
+
+def legacy_ip_lookup():
+    """What get_memory_file() used to do on the first call of every session."""
+    import requests
+    try:
+        return requests.get("https://api.ipify.org", timeout=5).text.strip()
+    except requests.RequestException:
+        return "unknown_ip"
+
+
+def local_identity(cookie):
+    session_id = verify_session_cookie(cookie) or new_session_id()
+    return f"anon_{session_id}"
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--offline", action="store_true", help="skip the network lookup")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository = ConversationRepository(os.path.join(tmp, "conversations.db"))
+        owner = "bench@example.com"
+        repository.save_conversations(owner, [
+            {"id": i, "title": f"Conversation {i}", "date": "January 01, 2025",
+             "messages": [{"sender": "user", "message": "hello " * 20, "time": "1:00 PM"}] * 10}
+            for i in range(args.conversations)
+        ])
+        cookie = sign_session_id(new_session_id())
+
+        def cold_start_local():
+            storage_key(local_identity(cookie))
+            repository.list_conversations(owner)
+
+        results = [("local identity + index load", timed(cold_start_local, args.runs))]
+        if not args.offline:
+            results.insert(0, ("ipify lookup (old path)", timed(legacy_ip_lookup, args.runs)))
+
+    print(f"{'step':<32}{'median ms':>12}{'max ms':>12}")
+    for name, (median, worst) in results:
+        print(f"{name:<32}{median:>12.2f}{worst:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
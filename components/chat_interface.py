@@ -1,14 +1,21 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from datetime import datetime
-from core.utils import get_current_time, get_ai_response, save_conversations
+from components.profile import get_user_font_size
+from components.message_bubbles import render_message_html
+from components.transcript_window import show_earlier_messages, transcript_start
+from core.utils import (
+    get_current_time, get_ai_response, stream_ai_response, save_conversations,
+    set_pinned_message, load_pinned_messages, get_active_conversation, build_conversation_context, get_message_key, new_message,
+    update_conversation_summary, STREAM_RESPONSES,
+)
 import requests
 import textwrap
 
 <<<<<<< HEAD
 # Ensures essential session state variables exist with default values to prevent errors
 if "pinned_messages" not in st.session_state:
-    st.session_state.pinned_messages = []
+    st.session_state.pinned_messages = load_pinned_messages()
 
 if "active_conversation" not in st.session_state:
     st.session_state.active_conversation = -1
@@ -445,35 +452,40 @@ def show_session_summary(active_convo):
 def toggle_pin_message(msg, convo_id):
     """Add or remove a message from pinned messages"""
     if "pinned_messages" not in st.session_state:
-        st.session_state.pinned_messages = []
-
-    # Unique check based on message text + convo_id
-    exists = next(
-        (m for m in st.session_state.pinned_messages
-         if m.get("message") == msg.get("message")
-         and m.get("convo_id") == convo_id),
-        None
-    )
-
-    if exists:
-        # Unpin by removing
-        st.session_state.pinned_messages = [
-            m for m in st.session_state.pinned_messages if m != exists
-        ]
+        st.session_state.pinned_messages = load_pinned_messages()
+
+    # Pins are keyed by conversation and message id, so this is a dict lookup
+    message_key = get_message_key(msg)
+    set_pin(convo_id, message_key, msg.get("sender", ""), msg.get("message", ""),
+            (convo_id, message_key) not in st.session_state.pinned_messages)
+
+def unpin_message(pin):
+    """Remove a pin record as listed on the Pinned Messages page"""
+    set_pin(pin["convo_id"], pin["message_key"], pin.get("sender", ""), pin.get("message", ""), False)
+
+def set_pin(convo_id, message_key, sender, message, pinned):
+    pins = st.session_state.pinned_messages
+    key = (convo_id, message_key)
+    if (key in pins) == pinned:
+        return
+    if pinned:
+        pins[key] = {
+            "message": message,
+            "sender": sender,   # keep if you want filtering
+            "convo_id": convo_id,
+            "message_key": message_key,
+            "pinned_date": datetime.now().isoformat()
+        }
     else:
-        # Save only what you need
-        st.session_state.pinned_messages.append({
-            "message": msg.get("message", ""),
-            "sender": msg.get("sender", ""),   # keep if you want filtering
-            "convo_id": convo_id
-        })
+        del pins[key]
+    set_pinned_message(convo_id, message_key, sender, message, pinned)
         
 # Displays chat messages with styled bubbles and pin/unpin functionality
 def render_chat_interface():
     inject_custom_css()
 
-    if st.session_state.active_conversation >= 0:
-        active_convo = st.session_state.conversations[st.session_state.active_conversation]
+    active_convo = get_active_conversation()
+    if active_convo is not None:
 
         if not active_convo["messages"]:
             st.markdown(f"""
@@ -486,46 +498,34 @@ def render_chat_interface():
 
         # Start the chat container (no fixed max-width wrapper)
         st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-
-        for i, msg in enumerate(active_convo["messages"]):
+        theme_name = "dark" if st.session_state.get("dark_mode", False) else st.session_state.get("palette_name", "Light")
+        font_size = get_user_font_size()
+
+        # Only the newest messages get bubbles and pin widgets; older ones are paged in on request
+        messages = active_convo["messages"]
+        first = transcript_start(active_convo["id"], len(messages))
+        if first > 0:
+            if st.button(f"⬆️ Load earlier messages ({first} more)", key=f"load_earlier_{active_convo['id']}"):
+                show_earlier_messages(active_convo["id"])
+                st.rerun()
+
+        for i in range(first, len(messages)):
+            msg = messages[i]
             # Check if this message is pinned
-            pinned = any(
-                m["message"] == msg["message"]
-                and m.get("convo_id") == st.session_state.active_conversation
-                for m in st.session_state.pinned_messages
-            )
+            pinned = (active_convo["id"], get_message_key(msg)) in st.session_state.pinned_messages
             pin_label = "📍" if pinned else "📌"
 
+            bubble = render_message_html(msg, theme_name, font_size)
+
             if msg["sender"] == "user":
                 # User message aligned right
                 col1, col2, col3 = st.columns([2, 7, 1])
                 with col2:
-                    st.markdown(f"""
-<div class="user-message" style="
-    background: linear-gradient(130deg, #6366f1 70%, #818cf8 100%);
-    color: white;
-    padding: 12px 16px;
-    border-radius: 16px;
-    margin: 8px 0;
-    border: 1.5px solid rgba(129,140,248,0.21);
-    border-bottom-right-radius: 4px;
-    word-wrap: break-word;
-    font-size: 15px;
-    line-height: 1.5;
-    position: relative;
-    margin-left: auto;
-    max-width: 85%;
-">
-    {msg['message']}
-    <div class="message-time" style="font-size:12px; color: #c4d0e0; opacity: 0.76; margin-top: 4px; text-align: right;">
-        {msg['time']}
-    </div>
-</div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(bubble, unsafe_allow_html=True)
                 with col3:
                     st.markdown("<div style='height: 8px;'></div>", unsafe_allow_html=True)
                     if st.button(pin_label, key=f"pin_{i}", help="Pin/Unpin this message"):
-                        toggle_pin_message(msg, st.session_state.active_conversation)
+                        toggle_pin_message(msg, active_convo["id"])
                         st.rerun()
             else:
                 # Bot message aligned left
@@ -533,31 +533,10 @@ def render_chat_interface():
                 with col1:
                     st.markdown("<div style='height: 8px;'></div>", unsafe_allow_html=True)
                     if st.button(pin_label, key=f"pin_{i}", help="Pin/Unpin this message"):
-                        toggle_pin_message(msg, st.session_state.active_conversation)
+                        toggle_pin_message(msg, active_convo["id"])
                         st.rerun()
                 with col2:
-                    st.markdown(f"""
-<div class="bot-message" style="
-    background: rgba(255,255,255,0.9);
-    color: #333;
-    padding: 12px 16px;
-    border-radius: 16px;
-    margin: 8px 0;
-    border: 1px solid rgba(0,0,0,0.1);
-    border-bottom-left-radius: 4px;
-    word-wrap: break-word;
-    font-size: 15px;
-    line-height: 1.5;
-    position: relative;
-    margin-right: auto;
-    max-width: 85%;
-">
-    {msg['message']}
-    <div class="message-time" style="font-size:12px; color: #666; opacity: 0.76; margin-top: 4px; text-align: right;">
-        {msg['time']}
-    </div>
-</div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(bubble, unsafe_allow_html=True)
 
         # Close chat container
         st.markdown('</div>', unsafe_allow_html=True)
@@ -566,7 +545,7 @@ def render_chat_interface():
 def render_pinned_messages():
     if st.session_state.pinned_messages:
         st.markdown("### 📌 Pinned Messages")
-        for msg in st.session_state.pinned_messages:
+        for msg in st.session_state.pinned_messages.values():
             st.markdown(f"{msg['message']}")
 =======
 
@@ -575,8 +554,8 @@ def render_chat_interface():
     # Inject custom CSS for enhanced button styling
     inject_custom_css()
     
-    if st.session_state.active_conversation >= 0:
-        active_convo = st.session_state.conversations[st.session_state.active_conversation]
+    active_convo = get_active_conversation()
+    if active_convo is not None:
         
         if not active_convo["messages"]:
             st.markdown(f"""
@@ -605,8 +584,8 @@ def render_chat_interface():
 
 def render_session_controls():
     """Render session controls and feedback - to be called after chat input"""
-    if st.session_state.active_conversation >= 0:
-        active_convo = st.session_state.conversations[st.session_state.active_conversation]
+    active_convo = get_active_conversation()
+    if active_convo is not None:
         
         # Show session controls below chat input
         if not active_convo.get("session_ended", False):
@@ -666,6 +645,18 @@ def render_session_controls():
             show_session_feedback()
 
 
+# Writes a streamed reply into a bot bubble as it arrives and returns the full text
+def render_streaming_response(pieces):
+    placeholder = st.empty()
+    placeholder.markdown('<div class="bot-message">TalkHeal is thinking...</div>', unsafe_allow_html=True)
+    reply = ""
+    for piece in pieces:
+        reply += piece
+        placeholder.markdown(f'<div class="bot-message">{reply}▌</div>', unsafe_allow_html=True)
+    placeholder.markdown(f'<div class="bot-message">{reply}</div>', unsafe_allow_html=True)
+    return reply
+
+
 # Handle chat input and generate AI response
 def handle_chat_input(model, system_prompt):
     if "pre_filled_chat_input" not in st.session_state:
@@ -690,16 +681,10 @@ def handle_chat_input(model, system_prompt):
         if 'send_chat_message' in st.session_state:
             st.session_state.send_chat_message = False
 
-        if st.session_state.active_conversation >= 0:
-            current_time = get_current_time()
-            active_convo = st.session_state.conversations[st.session_state.active_conversation]
-
+        active_convo = get_active_conversation()
+        if active_convo is not None:
             # Save user message
-            active_convo["messages"].append({
-                "sender": "user",
-                "message": user_input.strip(),
-                "time": current_time
-            })
+            active_convo["messages"].append(new_message("user", user_input.strip()))
 
             # Set title if it's the first message
             if len(active_convo["messages"]) == 1:
@@ -708,48 +693,30 @@ def handle_chat_input(model, system_prompt):
 
             save_conversations(st.session_state.conversations)
 
-            # Format memory
-            def format_memory(convo_history, max_turns=10):
-                context = ""
-                for msg in convo_history[-max_turns*2:]:  # user + bot per turn
-                    sender = "User" if msg["sender"] == "user" else "Bot"
-                    context += f"{sender}: {msg['message']}\n"
-                return context
-
             try:
-                with st.spinner("TalkHeal is thinking..."):
-                    memory = format_memory(active_convo["messages"])
-                    # Create a comprehensive prompt combining system prompt and conversation context
-                    full_prompt = f"{system_prompt}\n\nConversation Context:\n{memory}\n\nUser: {user_input.strip()}"
-                    ai_response = get_ai_response(full_prompt, model)
-
-                    active_convo["messages"].append({
-                        "sender": "bot",
-                        "message": ai_response,
-                        "time": get_current_time()
-                    })
+                # Older turns are folded into a summary in the background
+                update_conversation_summary(active_convo, model)
+                # Earlier turns only; the message just sent is added once, below
+                memory = build_conversation_context(active_convo)
+                # Create a comprehensive prompt combining system prompt and conversation context
+                full_prompt = f"{system_prompt}\n\nConversation Context:\n{memory}\n\nUser: {user_input.strip()}"
+                if STREAM_RESPONSES:
+                    ai_response = render_streaming_response(stream_ai_response(full_prompt, model))
+                else:
+                    with st.spinner("TalkHeal is thinking..."):
+                        ai_response = get_ai_response(full_prompt, model)
+
+                active_convo["messages"].append(new_message("bot", ai_response))
 
             except ValueError as e:
                 st.error("I'm having trouble understanding your message. Could you please rephrase it?")
-                active_convo["messages"].append({
-                    "sender": "bot",
-                    "message": "I'm having trouble understanding your message. Could you please rephrase it?",
-                    "time": get_current_time()
-                })
+                active_convo["messages"].append(new_message("bot", "I'm having trouble understanding your message. Could you please rephrase it?"))
             except requests.RequestException as e:
                 st.error("Network connection issue. Please check your internet connection.")
-                active_convo["messages"].append({
-                    "sender": "bot",
-                    "message": "I'm having trouble connecting to my services. Please check your internet connection and try again.",
-                    "time": get_current_time()
-                })
+                active_convo["messages"].append(new_message("bot", "I'm having trouble connecting to my services. Please check your internet connection and try again."))
             except Exception as e:
                 st.error(f"An unexpected error occurred. Please try again.")
-                active_convo["messages"].append({
-                    "sender": "bot",
-                    "message": "I'm having trouble responding right now. Please try again in a moment.",
-                    "time": get_current_time()
-                })
+                active_convo["messages"].append(new_message("bot", "I'm having trouble responding right now. Please try again in a moment."))
 
             save_conversations(st.session_state.conversations)
             st.rerun()
@@ -2,10 +2,12 @@ import streamlit as st
 import time
 from datetime import datetime, timedelta
 import random
-import pygame
 import requests
 import os
 import threading
+from core.lazy_import import lazy_import
+
+pygame = lazy_import("pygame")
 
 # Focus session configurations
 FOCUS_DURATIONS = [
@@ -44,11 +46,18 @@ AUDIO_URLS = {
     "tibetan_bowls": "https://www.soundjay.com/misc/sounds/white-noise-1.mp3"
 }
 
-# Initialize pygame mixer
-try:
-    pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
-except:
-    st.warning("Audio playback may not work properly. Please ensure pygame is installed.")
+# Initialize pygame mixer on first playback, so only sessions that play music import pygame
+_mixer_ready = False
+
+def ensure_mixer():
+    global _mixer_ready
+    if _mixer_ready:
+        return
+    try:
+        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=512)
+        _mixer_ready = True
+    except:
+        st.warning("Audio playback may not work properly. Please ensure pygame is installed.")
 
 # Updated calming background options with 7 music types
 BACKGROUND_OPTIONS = [
@@ -130,6 +139,7 @@ def play_audio(audio_type):
         return
     
     try:
+        ensure_mixer()
         pygame.mixer.music.load(filepath)
         pygame.mixer.music.set_volume(0.3)
         pygame.mixer.music.play(-1)  # -1 means loop indefinitely
@@ -3,6 +3,14 @@ from auth.auth_utils import register_user, authenticate_user , check_user
 from auth.mail_utils import send_reset_email
 from auth.jwt_utils import create_reset_token
 
+def get_client_id():
+    """Address of the browser, used to throttle login attempts per client.
+
+    None when Streamlit can't tell (localhost, some proxies); those attempts
+    are only throttled per account rather than all sharing one bucket.
+    """
+    return st.context.ip_address or None
+
 def show_login_page():
     """Renders the login/signup page with the modern dark theme."""
     st.markdown(
@@ -254,13 +262,18 @@ def show_login_page():
                 if not email or not password:
                     st.warning("Please enter your email and password.")
                 else:
-                    success, user = authenticate_user(email, password)
+                    success, user = authenticate_user(email, password, client_id=get_client_id())
                     if success:
                         st.session_state.authenticated = True
                         st.session_state.user_name = user['name']
+                        st.session_state.user_email = user['email']
+                        # Anything loaded before sign-in belongs to the anonymous session
+                        for key in ("conversations", "pinned_messages", "hydrated_conversations", "transcript_windows"):
+                            st.session_state.pop(key, None)
                         st.rerun()
                     else:
-                        st.error("Invalid email or password.")
+                        # On failure `user` is None, or the reason the attempt was refused
+                        st.error(user or "Invalid email or password.")
             st.markdown('</div>', unsafe_allow_html=True)
 
             st.markdown('<div class="auth-button">', unsafe_allow_html=True)
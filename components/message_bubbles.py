@@ -0,0 +1,81 @@
+"""
+Chat bubble HTML for the transcript.
+
+A sent message never changes, so its bubble is templated once per
+(message id, theme, font size) and kept in a process-wide LRU. A rerun
+then only looks up and concatenates fragments it has already built.
+"""
+import threading
+from collections import OrderedDict
+
+from core.utils import get_message_key
+
+_bubble_cache = OrderedDict()
+_bubble_cache_lock = threading.Lock()
+BUBBLE_CACHE_SIZE = 5000
+FONT_SIZE_PX = {"Small": 13, "Medium": 15, "Large": 17}
+
+
+def render_message_html(msg, theme_name, font_size):
+    """Returns the chat bubble of a message, templated once per id, theme and font size"""
+    key = (get_message_key(msg), theme_name, font_size)
+    with _bubble_cache_lock:
+        html = _bubble_cache.get(key)
+        if html is not None:
+            _bubble_cache.move_to_end(key)
+            return html
+
+    px = FONT_SIZE_PX.get(font_size, 15)
+    if msg["sender"] == "user":
+        html = f"""
+<div class="user-message" style="
+    background: linear-gradient(130deg, #6366f1 70%, #818cf8 100%);
+    color: white;
+    padding: 12px 16px;
+    border-radius: 16px;
+    margin: 8px 0;
+    border: 1.5px solid rgba(129,140,248,0.21);
+    border-bottom-right-radius: 4px;
+    word-wrap: break-word;
+    font-size: {px}px;
+    line-height: 1.5;
+    position: relative;
+    margin-left: auto;
+    max-width: 85%;
+">
+    {msg['message']}
+    <div class="message-time" style="font-size:{px - 3}px; color: #c4d0e0; opacity: 0.76; margin-top: 4px; text-align: right;">
+        {msg['time']}
+    </div>
+</div>
+                    """
+    else:
+        dark = theme_name == "dark"
+        html = f"""
+<div class="bot-message" style="
+    background: {'rgba(45,45,58,0.92)' if dark else 'rgba(255,255,255,0.9)'};
+    color: {'#e8e8f0' if dark else '#333'};
+    padding: 12px 16px;
+    border-radius: 16px;
+    margin: 8px 0;
+    border: 1px solid {'rgba(255,255,255,0.12)' if dark else 'rgba(0,0,0,0.1)'};
+    border-bottom-left-radius: 4px;
+    word-wrap: break-word;
+    font-size: {px}px;
+    line-height: 1.5;
+    position: relative;
+    margin-right: auto;
+    max-width: 85%;
+">
+    {msg['message']}
+    <div class="message-time" style="font-size:{px - 3}px; color: {'#aaa' if dark else '#666'}; opacity: 0.76; margin-top: 4px; text-align: right;">
+        {msg['time']}
+    </div>
+</div>
+                    """
+
+    with _bubble_cache_lock:
+        _bubble_cache[key] = html
+        if len(_bubble_cache) > BUBBLE_CACHE_SIZE:
+            _bubble_cache.popitem(last=False)
+    return html
@@ -1,7 +1,10 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from core.lazy_import import lazy_import
+
+# Loaded when the dashboard is first drawn, not when the app starts
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 from datetime import datetime, timedelta
 import json
 import os
@@ -1,9 +1,8 @@
 import streamlit as st
 import time
-from auth.auth_utils import reset_password, check_user , verify_token_count
+from auth.auth_utils import reset_password, check_user , verify_reset_tokens
 from auth.mail_utils import send_reset_email
 from components.login_page import show_login_page
-from auth.jwt_utils import verify_reset_token
 
 
 def show_reset_password_page():
@@ -160,16 +159,16 @@ def show_reset_password_page():
         return
 
     form_container = st.container()
-    is_verified , data=verify_reset_token(reset_token)
-    if not is_verified or not data:
+    # Signature, expiry and password version in one call; usually answered without the database
+    valid, data, msg = verify_reset_tokens([reset_token])[0]
+    if not data:
         st.error("Your reset link is invalid or has expired. Please request a new one.")
         st.session_state.show_reset_page = False
         st.session_state.is_signup = False
         st.session_state.reset_token = None
         st.stop()
 
-    # Check token vs DB (updated_at still matches)
-    valid, msg = verify_token_count(data.get("email"), data.get("pwd_update"))
+    # Token is genuine but the password changed since it was issued
     if not valid:
         st.error("Link Already Used .Please request a new one.")
         st.info("Redirecting to the forget page in 3 seconds...")
@@ -1,7 +1,7 @@
 import streamlit as st
 import webbrowser
 from datetime import datetime
-from core.utils import create_new_conversation, get_current_time
+from core.utils import create_new_conversation, get_current_time, get_message_count
 from core.theme import get_current_theme, toggle_theme, set_palette, PALETTES
 from components.mood_dashboard import render_mood_dashboard_button, MoodTracker
 from components.profile import initialize_profile_state, render_profile_section
@@ -391,7 +391,7 @@ def render_sidebar():
                             st.session_state.active_conversation = i
                             st.rerun()
                     with col2:
-                        if convo["messages"]:
+                        if get_message_count(convo):
                             if st.button("🗑️", key=f"delete_{i}", type="primary", use_container_width=True):
                                 st.session_state.delete_candidate = i
                                 st.rerun()
@@ -401,7 +401,7 @@ def render_sidebar():
                                 key=f"delete_{i}",
                                 type="primary",
                                 use_container_width=True,
-                                disabled=not convo["messages"]
+                                disabled=not get_message_count(convo)
                             )
             else:
                 st.warning("⚠️ Are you sure you want to delete this conversation?")
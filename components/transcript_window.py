@@ -0,0 +1,30 @@
+"""
+Which part of a conversation the transcript shows.
+
+Only the newest TRANSCRIPT_PAGE_SIZE messages get bubbles and pin widgets;
+each "load earlier" click adds another page. The window size is kept per
+conversation in ``st.session_state.transcript_windows``, so switching
+conversations doesn't reset it.
+
+Pages are cut from the conversation's messages already in memory, not
+fetched from the store: the context builder, the summarizer and the
+diff-based saves index the whole message list, so get_active_conversation()
+hydrates all of it. What stays flat is what reaches the browser.
+"""
+import os
+
+import streamlit as st
+
+# Messages rendered per page of the transcript
+TRANSCRIPT_PAGE_SIZE = int(os.getenv("TALKHEAL_TRANSCRIPT_PAGE_SIZE", "50"))
+
+
+def transcript_start(convo_id, message_count):
+    """Index of the first message to render; 0 when everything is shown."""
+    shown = st.session_state.setdefault("transcript_windows", {}).get(convo_id, TRANSCRIPT_PAGE_SIZE)
+    return max(message_count - shown, 0)
+
+
+def show_earlier_messages(convo_id):
+    windows = st.session_state.setdefault("transcript_windows", {})
+    windows[convo_id] = windows.get(convo_id, TRANSCRIPT_PAGE_SIZE) + TRANSCRIPT_PAGE_SIZE
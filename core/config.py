@@ -1,7 +1,13 @@
 import streamlit as st
-import google.generativeai as genai
+import google.generativeai
 from pathlib import Path
 import requests
+from core.response_cache import get_response_cache, make_cache_key
+from core.gemini_client import get_client_registry
+from core.llm_gateway import get_llm_gateway
+from core.utils import get_storage_owner
+
+CHAT_MODEL_NAME = "gemini-2.0-flash"
 
 # ---------- Logo and Page Config ----------
 logo_path = str(Path(__file__).resolve().parent.parent / "static_files" / "TalkHealLogo.png")
@@ -56,8 +62,14 @@ def configure_gemini():
         api_key = st.secrets["GEMINI_API_KEY"]
         if not api_key or api_key == "YOUR_API_KEY_HERE":
             raise ValueError("API key is missing or not set properly.")
-        genai.configure(api_key=api_key)
-        return genai.GenerativeModel('gemini-2.0-flash')
+        # Shared by all sessions; reruns no longer reconfigure the SDK or rebuild the client
+        registry = get_client_registry()
+        model = registry.get_model(CHAT_MODEL_NAME, api_key)
+        healthy, error = registry.model_health(CHAT_MODEL_NAME, api_key)
+        if not healthy:
+            st.error(f"❌ Gemini API is not reachable right now: {error}")
+            return None
+        return model
     except KeyError:
         st.error("❌ Gemini API key not found. Please set it in `.streamlit/secrets.toml` as GEMINI_API_KEY.")
     except Exception as e:
@@ -72,11 +84,18 @@ def get_tone_system_prompt():
 # ---------- Generate AI Response ----------
 def generate_response(user_input, model):
     system_prompt = get_tone_system_prompt()
+    cache = get_response_cache()
+    cache_key = make_cache_key(user_input, tone=st.session_state.get("selected_tone"),
+                               model_name=getattr(model, "model_name", None))
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
     try:
-        response = model.generate_content([
+        response = get_llm_gateway().call(lambda: model.generate_content([
             {"role": "system", "parts": [system_prompt]},
             {"role": "user", "parts": [user_input]}
-        ])
+        ]), user=get_storage_owner(), key=cache_key, report=get_client_registry().reporter(model))
+        cache.set(cache_key, response.text)
         return response.text
     except ValueError as e:
         st.error("❌ Invalid input or model configuration issue. Please check your input.")
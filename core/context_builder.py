@@ -0,0 +1,103 @@
+"""
+Token-budgeted conversation memory for the chat prompt.
+
+Each conversation keeps a rolling window of its most recent messages,
+already formatted as prompt lines. Appending a message only formats that
+message, and the oldest lines are dropped as soon as the window is over its
+token budget, so the prompt stays the same size however long the
+conversation gets. Turns covered by the conversation's rolling summary (see
+``core.summarizer``) are left out and the summary is prepended instead.
+"""
+import os
+from collections import deque
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("TALKHEAL_CONTEXT_TOKENS", "1500"))
+# Rough English average; good enough to bound the prompt without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_message(msg):
+    sender = "User" if msg.get("sender") == "user" else "Bot"
+    return f"{sender}: {msg.get('message', '')}"
+
+
+class ContextWindow:
+    def __init__(self, budget, start=0):
+        self.budget = budget
+        self.lines = deque()        # (message index, tokens, line), oldest first
+        self.tokens = 0
+        self.start = start          # messages before this are covered by the summary
+        self.consumed = start       # messages of the conversation seen so far
+        self.summary = ""
+        self.summary_tokens = 0
+        self._last = None           # last consumed message, to notice a replaced history
+
+    def is_current(self, messages, end, start):
+        if end < self.consumed or start < self.start:
+            return False
+        return self._last is None or messages[self.consumed - 1] is self._last
+
+    def set_summary(self, summary, start):
+        if summary != self.summary:
+            self.summary = summary
+            self.summary_tokens = estimate_tokens(summary) if summary else 0
+        self.start = start
+        if start > self.consumed:
+            self.consumed = start
+            self._last = None
+        while self.lines and self.lines[0][0] < start:
+            self.tokens -= self.lines.popleft()[1]
+
+    def extend(self, messages, end):
+        for index in range(self.consumed, end):
+            msg = messages[index]
+            line = format_message(msg)
+            tokens = estimate_tokens(line)
+            if tokens > self.budget:
+                # A single huge message keeps only its beginning
+                line = line[:self.budget * CHARS_PER_TOKEN] + "..."
+                tokens = self.budget
+            self.lines.append((index, tokens, line))
+            self.tokens += tokens
+            self._last = msg
+        self.consumed = max(self.consumed, end)
+
+        while self.lines and self.tokens + self.summary_tokens > self.budget:
+            self.tokens -= self.lines.popleft()[1]
+
+    def render(self):
+        text = "\n".join(line for _, _, line in self.lines)
+        if self.summary:
+            return f"Summary of the earlier conversation: {self.summary}\n{text}"
+        return text
+
+
+class ContextBuilder:
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET):
+        self.budget = budget
+        self.windows = {}           # conversation id -> ContextWindow
+
+    def window(self, convo_id, messages, end=None, summary="", start=0):
+        """Returns the window of ``messages[start:end]``, updated with anything appended since the last call.
+
+        ``summary`` stands in for the messages before ``start``.
+        """
+        end = len(messages) if end is None else end
+        start = min(start, end)
+        window = self.windows.get(convo_id)
+        if window is None or not window.is_current(messages, end, start):
+            # First use, or the history was cleared or reloaded: start over
+            window = self.windows[convo_id] = ContextWindow(self.budget, start)
+        window.set_summary(summary, start)
+        window.extend(messages, end)
+        return window
+
+    def build(self, convo_id, messages, end=None, summary="", start=0):
+        return self.window(convo_id, messages, end, summary, start).render()
+
+    def forget(self, convo_id):
+        self.windows.pop(convo_id, None)
@@ -0,0 +1,219 @@
+"""
+Append-only conversation journal.
+
+Every line of a ``conversations_<id>.jsonl`` file is one JSON record:
+
+    {"op": "convo", "id": 3, "index": 0, "meta": {...}}   create/update a conversation
+    {"op": "msg", "id": 3, "msg": {...}}                   append one message
+    {"op": "reset", "id": 3, "messages": [...]}            replace all messages of a conversation
+    {"op": "delete", "id": 3}                              remove a conversation
+
+Saving only appends what changed since the previous save, so a chat turn
+costs the size of the new message instead of the size of the whole history.
+Once superseded records outweigh the live ones the file is rewritten as a
+compact snapshot. Messages are treated as append-only: editing an older
+message in place is not detected, shrinking the list is.
+"""
+import json
+import os
+import threading
+
+# Don't bother compacting tiny journals
+COMPACT_MIN_RECORDS = 200
+
+
+def _meta(convo):
+    return {k: v for k, v in convo.items() if k not in ("id", "messages")}
+
+
+def _ensure_unique_ids(conversations):
+    """Older files numbered conversations by list length, which repeats ids after a delete."""
+    seen = set()
+    next_id = max((c.get("id", 0) for c in conversations if isinstance(c.get("id"), int)), default=-1) + 1
+    for convo in conversations:
+        if convo.get("id") in seen or convo.get("id") is None:
+            convo["id"] = next_id
+            next_id += 1
+        seen.add(convo["id"])
+    return conversations
+
+
+class ConversationLog:
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._known = None      # convo id -> (meta, persisted message count)
+        self._order = []        # convo ids in list order
+        self._records = 0       # records currently in the file
+        self._live = 0          # records a fresh snapshot would need
+
+    # ---------- Reading ----------
+    def load(self):
+        """Replays the journal and returns the list of conversations."""
+        with self._lock:
+            if not os.path.exists(self.path):
+                conversations = self._load_legacy()
+                if conversations:
+                    self._compact(conversations)
+                else:
+                    self._remember([])
+                    self._records = 0
+                return conversations
+
+            conversations, records = self._replay()
+            self._remember(conversations)
+            self._records = records
+            return conversations
+
+    def _load_legacy(self):
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return []
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                return _ensure_unique_ids(json.load(f))
+        except (OSError, ValueError):
+            return []
+
+    def _replay(self):
+        convos = {}
+        order = []
+        records = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn write at the tail; everything before it is intact
+                    continue
+                records += 1
+                op, cid = record.get("op"), record.get("id")
+
+                if op == "convo":
+                    convo = convos.get(cid)
+                    if convo is None:
+                        convo = {"id": cid, "messages": []}
+                        convos[cid] = convo
+                        order.insert(min(record.get("index", 0), len(order)), cid)
+                    convo.update(record.get("meta", {}))
+                elif cid not in convos:
+                    continue
+                elif op == "msg":
+                    convos[cid]["messages"].append(record["msg"])
+                elif op == "reset":
+                    convos[cid]["messages"] = list(record.get("messages", []))
+                elif op == "delete":
+                    del convos[cid]
+                    order.remove(cid)
+        return [convos[cid] for cid in order], records
+
+    # ---------- Writing ----------
+    def save(self, conversations):
+        """Appends the difference between ``conversations`` and what is already on disk."""
+        with self._lock:
+            if self._known is None:
+                if os.path.exists(self.path):
+                    persisted, self._records = self._replay()
+                    self._remember(persisted)
+                else:
+                    self._remember([])
+
+            records = self._diff(conversations)
+            if records is None:
+                # Order changed in a way the journal can't express; start over
+                self._compact(conversations)
+                return
+            if not records:
+                return
+
+            self._append(records)
+            self._remember(conversations)
+            self._records += len(records)
+            if self._records > max(COMPACT_MIN_RECORDS, 2 * self._live):
+                self._compact(conversations)
+
+    def compact(self, conversations):
+        """Rewrites the journal as a minimal snapshot of ``conversations``."""
+        with self._lock:
+            self._compact(conversations)
+
+    def _diff(self, conversations):
+        ids = [convo.get("id") for convo in conversations]
+        if None in ids or len(set(ids)) != len(ids):
+            return None
+
+        current = set(ids)
+        survivors = [cid for cid in self._order if cid in current]
+        if [cid for cid in ids if cid in self._known] != survivors:
+            return None
+
+        records = [{"op": "delete", "id": cid} for cid in self._order if cid not in current]
+        for index, convo in enumerate(conversations):
+            cid = convo["id"]
+            meta = _meta(convo)
+            messages = convo.get("messages", [])
+            known = self._known.get(cid)
+
+            if known is None:
+                records.append({"op": "convo", "id": cid, "index": index, "meta": meta})
+                records.extend({"op": "msg", "id": cid, "msg": msg} for msg in messages)
+                continue
+
+            known_meta, known_count = known
+            if meta != known_meta:
+                records.append({"op": "convo", "id": cid, "meta": meta})
+            if len(messages) < known_count:
+                records.append({"op": "reset", "id": cid, "messages": messages})
+            else:
+                records.extend({"op": "msg", "id": cid, "msg": msg} for msg in messages[known_count:])
+        return records
+
+    def _append(self, records):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+
+    def _compact(self, conversations):
+        conversations = _ensure_unique_ids(conversations)
+        records = []
+        for index, convo in enumerate(conversations):
+            records.append({"op": "convo", "id": convo["id"], "index": index, "meta": _meta(convo)})
+            records.extend({"op": "msg", "id": convo["id"], "msg": msg} for msg in convo.get("messages", []))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        os.replace(tmp_path, self.path)
+
+        self._remember(conversations)
+        self._records = len(records)
+
+    def _remember(self, conversations):
+        self._known = {
+            convo.get("id"): (_meta(convo), len(convo.get("messages", [])))
+            for convo in conversations
+        }
+        self._order = [convo.get("id") for convo in conversations]
+        self._live = sum(1 + count for _, count in self._known.values())
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_conversation_log(path, legacy_path=None):
+    """Returns the process-wide journal for ``path`` so every session shares one writer."""
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = ConversationLog(path, legacy_path=legacy_path)
+            _logs[path] = log
+        return log
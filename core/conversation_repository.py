@@ -0,0 +1,202 @@
+"""
+SQLite-backed conversation storage.
+
+Conversations and messages live in two tables keyed by the owner's email,
+so the sidebar list and the active conversation are each one indexed query
+instead of parsing every message the user has ever sent. Like the journal
+in ``core.conversation_log``, saving writes only what changed since the
+last save.
+"""
+import json
+import threading
+from datetime import datetime
+
+from core.db import MIGRATIONS, Database, get_database
+
+# Columns of the conversations table; everything else goes into ``meta``
+_COLUMNS = ("id", "title", "date", "messages", "message_count")
+
+
+def _meta(convo):
+    return {k: v for k, v in convo.items() if k not in _COLUMNS}
+
+
+class ConversationRepository:
+    def __init__(self, db_path=None):
+        # A path of its own is for tests and benchmarks; the app shares core.db's pool
+        self.db = Database(db_path, MIGRATIONS["conversations"]) if db_path else get_database("conversations")
+        self._lock = threading.Lock()
+        # user_email -> {convo id: (title, date, meta, message count, position)}
+        self._known = {}
+
+    # ---------- Reading ----------
+    def list_conversations(self, user_email):
+        """Returns the sidebar index (no messages), newest first."""
+        rows = self.db.query_all("""
+            SELECT id, title, date, meta, message_count FROM conversations
+            WHERE user_email = ? ORDER BY position DESC
+        """, (user_email,))
+        conversations = []
+        for cid, title, date, meta, count in rows:
+            convo = {"id": cid, "title": title, "date": date, "message_count": count}
+            convo.update(json.loads(meta))
+            conversations.append(convo)
+        return conversations
+
+    def get_messages(self, user_email, conversation_id):
+        rows = self.db.query_all("""
+            SELECT data FROM messages
+            WHERE user_email = ? AND conversation_id = ? ORDER BY seq
+        """, (user_email, conversation_id))
+        return [json.loads(data) for (data,) in rows]
+
+    def load_conversations(self, user_email):
+        """Returns every conversation of a user with its messages."""
+        conversations = self.list_conversations(user_email)
+        by_id = {}
+        for convo in conversations:
+            convo["messages"] = []
+            del convo["message_count"]
+            by_id[convo["id"]] = convo
+
+        rows = self.db.query_all("""
+            SELECT conversation_id, data FROM messages
+            WHERE user_email = ? ORDER BY conversation_id, seq
+        """, (user_email,))
+        for cid, data in rows:
+            if cid in by_id:
+                by_id[cid]["messages"].append(json.loads(data))
+
+        with self._lock:
+            self._known[user_email] = self._snapshot(conversations)
+        return conversations
+
+    # ---------- Writing ----------
+    def save_conversations(self, user_email, conversations):
+        """Writes the difference between ``conversations`` and what is stored."""
+        with self._lock:
+            known = self._known.get(user_email)
+            if known is None:
+                known = self._stored_snapshot(user_email)
+
+            total = len(conversations)
+            current = {convo.get("id") for convo in conversations}
+            with self.db.transaction() as conn:
+                for cid in known:
+                    if cid not in current:
+                        self._delete(conn, user_email, cid)
+
+                for index, convo in enumerate(conversations):
+                    cid = convo.get("id")
+                    position = total - 1 - index
+                    messages = convo.get("messages")
+                    row = (convo.get("title", ""), convo.get("date", ""), _meta(convo))
+                    stored = known.get(cid)
+
+                    if messages is None:
+                        # Index-only entry: its messages are untouched, only the row may change
+                        if stored is not None and (row != stored[:3] or position != stored[4]):
+                            conn.execute("""
+                                UPDATE conversations SET position = ?, title = ?, date = ?, meta = ?
+                                WHERE user_email = ? AND id = ?
+                            """, (position, row[0], row[1], json.dumps(row[2]), user_email, cid))
+                        continue
+
+                    if stored is None:
+                        conn.execute("""
+                            INSERT OR REPLACE INTO conversations
+                                (user_email, id, position, title, date, meta, message_count)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        """, (user_email, cid, position, row[0], row[1], json.dumps(row[2]), len(messages)))
+                        conn.execute("DELETE FROM messages WHERE user_email = ? AND conversation_id = ?",
+                                     (user_email, cid))
+                        self._insert_messages(conn, user_email, cid, 0, messages)
+                        continue
+
+                    stored_row, stored_count, stored_position = stored[:3], stored[3], stored[4]
+                    if row != stored_row or position != stored_position or len(messages) != stored_count:
+                        conn.execute("""
+                            UPDATE conversations
+                            SET position = ?, title = ?, date = ?, meta = ?, message_count = ?
+                            WHERE user_email = ? AND id = ?
+                        """, (position, row[0], row[1], json.dumps(row[2]), len(messages), user_email, cid))
+                    if len(messages) < stored_count:
+                        conn.execute("DELETE FROM messages WHERE user_email = ? AND conversation_id = ?",
+                                     (user_email, cid))
+                        self._insert_messages(conn, user_email, cid, 0, messages)
+                    elif len(messages) > stored_count:
+                        self._insert_messages(conn, user_email, cid, stored_count, messages[stored_count:])
+
+            self._known[user_email] = self._snapshot(conversations)
+
+    def _insert_messages(self, conn, user_email, conversation_id, start, messages):
+        conn.executemany("""
+            INSERT OR REPLACE INTO messages (user_email, conversation_id, seq, data)
+            VALUES (?, ?, ?, ?)
+        """, [(user_email, conversation_id, start + i, json.dumps(msg, ensure_ascii=False))
+              for i, msg in enumerate(messages)])
+
+    def _delete(self, conn, user_email, conversation_id):
+        for table, column in (("conversations", "id"),
+                              ("messages", "conversation_id"),
+                              ("pinned_messages", "conversation_id")):
+            conn.execute(f"DELETE FROM {table} WHERE user_email = ? AND {column} = ?",
+                         (user_email, conversation_id))
+
+    def _snapshot(self, conversations):
+        total = len(conversations)
+        return {
+            convo.get("id"): (convo.get("title", ""), convo.get("date", ""), _meta(convo),
+                              len(convo["messages"]) if "messages" in convo else convo.get("message_count", 0),
+                              total - 1 - index)
+            for index, convo in enumerate(conversations)
+        }
+
+    def _stored_snapshot(self, user_email):
+        rows = self.db.query_all("""
+            SELECT id, title, date, meta, message_count, position FROM conversations
+            WHERE user_email = ?
+        """, (user_email,))
+        return {cid: (title, date, json.loads(meta), count, position)
+                for cid, title, date, meta, count, position in rows}
+
+    # ---------- Pins ----------
+    def get_pins(self, user_email):
+        rows = self.db.query_all("""
+            SELECT conversation_id, message_key, sender, message, pinned_date FROM pinned_messages
+            WHERE user_email = ? ORDER BY pinned_date
+        """, (user_email,))
+        return [{"convo_id": cid, "message_key": key, "sender": sender,
+                 "message": message, "pinned_date": pinned_date}
+                for cid, key, sender, message, pinned_date in rows]
+
+    def set_pin(self, user_email, conversation_id, message_key, sender, message, pinned):
+        with self.db.transaction() as conn:
+            if not pinned:
+                conn.execute("""
+                    DELETE FROM pinned_messages
+                    WHERE user_email = ? AND conversation_id = ? AND message_key = ?
+                """, (user_email, conversation_id, message_key))
+                return
+            conn.execute("""
+                INSERT OR IGNORE INTO pinned_messages
+                    (user_email, conversation_id, message_key, sender, message, pinned_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (user_email, conversation_id, message_key, sender, message, datetime.now().isoformat()))
+
+    def clear_pins(self, user_email):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM pinned_messages WHERE user_email = ?", (user_email,))
+
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def get_conversation_repository():
+    """Returns the process-wide repository."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = ConversationRepository()
+        return _repository
@@ -0,0 +1,225 @@
+"""
+Shared SQLite access for the app's databases: users, journals, the mail
+outbox, conversations and the response cache.
+
+Each database keeps a small pool of open connections, in WAL mode and with
+a statement cache, so a lookup doesn't pay for opening a file, re-reading
+the schema and re-preparing its query. The pool is shared by all threads:
+Streamlit runs every rerun on a new thread, so per-thread connections
+would be reopened on each rerun and never closed. Schema changes are
+numbered migrations tracked in ``PRAGMA user_version``; ``migrate_all()``
+(or ``python -m core.db``) applies whatever a database is missing.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DATABASE_PATHS = {
+    "users": os.getenv("TALKHEAL_USERS_DB", "users.db"),
+    "journals": os.getenv("TALKHEAL_JOURNALS_DB", "journals.db"),
+    "mail": os.getenv("TALKHEAL_MAIL_DB", "mail_outbox.db"),
+    "conversations": os.getenv("TALKHEAL_CONVERSATIONS_DB", "conversations.db"),
+    # Set to an empty string to keep the response cache in memory only
+    "response_cache": os.getenv("TALKHEAL_RESPONSE_CACHE_DB", os.path.join("data", "response_cache.db")),
+}
+
+# Append only: a database at version N has run the first N steps
+MIGRATIONS = {
+    "users": [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """,
+    ],
+    "journals": [
+        """
+        CREATE TABLE IF NOT EXISTS journal_entries (
+            id TEXT PRIMARY KEY,
+            email TEXT,
+            entry TEXT,
+            sentiment TEXT,
+            date TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_journal_entries_email_date ON journal_entries (email, date)",
+    ],
+    "mail": [
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_addr TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_status_due ON outbox (status, next_attempt_at)",
+    ],
+    "conversations": [
+        """
+        CREATE TABLE IF NOT EXISTS conversations (
+            user_email TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            date TEXT NOT NULL,
+            meta TEXT NOT NULL DEFAULT '{}',
+            message_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_email, id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_conversations_user_position ON conversations (user_email, position)",
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            user_email TEXT NOT NULL,
+            conversation_id INTEGER NOT NULL,
+            seq INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user_email, conversation_id, seq)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pinned_messages (
+            user_email TEXT NOT NULL,
+            conversation_id INTEGER NOT NULL,
+            message_key TEXT NOT NULL,
+            sender TEXT NOT NULL,
+            message TEXT NOT NULL,
+            pinned_date TEXT NOT NULL,
+            PRIMARY KEY (user_email, conversation_id, message_key)
+        )
+        """,
+    ],
+    "response_cache": [
+        """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            used_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_response_cache_used_at ON response_cache (used_at)",
+    ],
+}
+
+STATEMENT_CACHE_SIZE = 256
+# Idle connections kept per database; more are opened under load and closed when returned
+POOL_SIZE = int(os.getenv("TALKHEAL_DB_POOL_SIZE", "4"))
+
+
+class Database:
+    def __init__(self, path, migrations=(), pool_size=POOL_SIZE):
+        self.path = path
+        self.migrations = list(migrations)
+        self.pool_size = pool_size
+        self._idle = []         # connections not lent out, most recently returned last
+        self._pool_lock = threading.Lock()
+        self._migrate_lock = threading.Lock()
+        self._migrated = False
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Lent to one thread at a time, but not always the thread that opened it
+        conn = sqlite3.connect(self.path, timeout=10, cached_statements=STATEMENT_CACHE_SIZE,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Lends a pooled connection for the block, opening one if none is idle."""
+        with self._pool_lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+        try:
+            if not self._migrated:
+                self._run_migrations(conn)
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._pool_lock:
+                keep = len(self._idle) < self.pool_size
+                if keep:
+                    self._idle.append(conn)
+            if not keep:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """Commits when the block succeeds and rolls back when it raises."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def query_one(self, sql, params=()):
+        with self.connection() as conn:
+            cursor = conn.execute(sql, params)
+            try:
+                return cursor.fetchone()
+            finally:
+                # An unfinished statement would pin the connection's read snapshot
+                cursor.close()
+
+    def query_all(self, sql, params=()):
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def migrate(self):
+        """Applies the migrations this database hasn't run yet. Returns the schema version."""
+        return self.query_one("PRAGMA user_version")[0]
+
+    def close(self):
+        """Closes the idle connections; connections lent out are closed when returned."""
+        with self._pool_lock:
+            idle, self._idle = self._idle, []
+            self.pool_size = 0
+        for conn in idle:
+            conn.close()
+
+    def _run_migrations(self, conn):
+        with self._migrate_lock:
+            if self._migrated:
+                return
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for step, sql in enumerate(self.migrations[version:], start=version + 1):
+                with conn:
+                    conn.execute(sql)
+                    # PRAGMA doesn't take parameters; step is always an int
+                    conn.execute(f"PRAGMA user_version = {step}")
+            self._migrated = True
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(name):
+    """Returns the process-wide handle of one of the DATABASE_PATHS."""
+    with _databases_lock:
+        if name not in _databases:
+            _databases[name] = Database(DATABASE_PATHS[name], MIGRATIONS[name])
+        return _databases[name]
+
+
+def migrate_all():
+    # An empty path turns a database off (the response cache is then memory only)
+    return {name: get_database(name).migrate() for name, path in DATABASE_PATHS.items() if path}
+
+
+if __name__ == "__main__":
+    for name, version in migrate_all().items():
+        print(f"✅ {name} database ({DATABASE_PATHS[name]}) at schema version {version}")
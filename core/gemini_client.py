@@ -0,0 +1,162 @@
+"""
+Process-wide registry of Gemini clients.
+
+``genai.configure`` throws away the SDK's cached gRPC clients, so calling it
+on every Streamlit rerun paid for a new channel and TLS handshake on the
+next request. The registry configures the SDK once per API key and hands
+out one client per (kind, model name, API key), shared by every session.
+A warm-up call on first use opens the channel before the first user message.
+Its result and the outcome of every real call made through the gateway
+feed the backend's health, so an unreachable API is detected once for the
+whole server instead of once per session. A backend only counts as down
+after several failures in a row, and any successful call brings it back.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import google.generativeai as genai
+
+from core.llm_gateway import is_retryable
+
+# Open the gRPC channel with a cheap request when a client is first created
+WARMUP = os.getenv("TALKHEAL_GEMINI_WARMUP", "1") != "0"
+# How long a failed backend is reported as down before it is tried again
+HEALTH_RETRY_SECONDS = int(os.getenv("TALKHEAL_GEMINI_HEALTH_RETRY", "60"))
+# Consecutive failures after which a backend is reported as down
+FAILURE_THRESHOLD = int(os.getenv("TALKHEAL_GEMINI_FAILURE_THRESHOLD", "3"))
+
+
+def client_key(kind, model_name, api_key):
+    # Raw API keys never become dictionary keys that may end up in logs or repr()
+    return (kind, model_name, hashlib.sha256(api_key.encode()).hexdigest()[:16])
+
+
+def is_backend_error(error):
+    """True for errors that say the backend is failing, not that one request was bad."""
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "status_code", None)
+    return (is_retryable(error) or status in (401, 403)
+            or isinstance(error, (TimeoutError, ConnectionError)))
+
+
+class GeminiClientRegistry:
+    def __init__(self, warmup=WARMUP, health_retry_seconds=HEALTH_RETRY_SECONDS,
+                 failure_threshold=FAILURE_THRESHOLD):
+        self.warmup = warmup
+        self.health_retry_seconds = health_retry_seconds
+        self.failure_threshold = failure_threshold
+        self._clients = {}
+        self._keys = {}         # id(client) -> client key, for reporting call outcomes
+        self._health = {}       # client key -> (consecutive failures, last error, checked at)
+        self._checking = set()
+        self._configured_key = None
+        self._lock = threading.Lock()
+
+    def get_client(self, key, factory):
+        """Returns the client registered under ``key``, building it with ``factory`` the first time."""
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+                self._keys[id(client)] = key
+            return client
+
+    def get_model(self, model_name, api_key):
+        """Returns the shared ``GenerativeModel`` for a model name and API key."""
+        key = client_key("genai", model_name, api_key)
+        with self._lock:
+            model = self._clients.get(key)
+            if model is None:
+                if self._configured_key != api_key:
+                    # Both gRPC and REST clients are created lazily and reused by the SDK afterwards
+                    genai.configure(api_key=api_key)
+                    self._configured_key = api_key
+                model = self._clients[key] = genai.GenerativeModel(model_name)
+                self._keys[id(model)] = key
+            due = self.warmup and self._check_due(key)
+            if due:
+                self._checking.add(key)
+        if due:
+            threading.Thread(target=self.check, args=(key, model), daemon=True,
+                             name="gemini-warmup").start()
+        return model
+
+    def _check_due(self, key):
+        if key in self._checking:
+            return False
+        if key not in self._health:
+            return True
+        failures, _, checked_at = self._health[key]
+        return failures >= self.failure_threshold and time.time() - checked_at >= self.health_retry_seconds
+
+    def check(self, key, model):
+        """Makes a cheap request with ``model`` and records the result in its health."""
+        try:
+            model.count_tokens("ping")
+            healthy, error = True, ""
+        except Exception as e:
+            healthy, error = False, str(e)
+        with self._lock:
+            self._record(key, healthy, error)
+            self._checking.discard(key)
+        return healthy
+
+    def report(self, key, healthy, error=""):
+        """Records the outcome of a call made with the client under ``key``."""
+        with self._lock:
+            self._record(key, healthy, error)
+
+    def _record(self, key, healthy, error):
+        failures = 0 if healthy else self._health.get(key, (0, "", 0))[0] + 1
+        self._health[key] = (failures, error, time.time())
+
+    def reporter(self, client):
+        """A ``report`` callback for the gateway that feeds call outcomes into ``client``'s health.
+
+        Errors caused by the request itself, such as a blocked prompt, are
+        not held against the backend. Clients the registry didn't build are
+        ignored.
+        """
+        with self._lock:
+            key = self._keys.get(id(client))
+
+        def report(error=None):
+            if key is None:
+                return
+            if error is None:
+                self.report(key, True)
+            elif is_backend_error(error):
+                self.report(key, False, str(error))
+        return report
+
+    def health(self, key):
+        """Returns (healthy, error).
+
+        A backend is down after ``failure_threshold`` failures in a row,
+        until ``health_retry_seconds`` have passed since the last one; then
+        it is tried again. A backend that was never checked counts as healthy.
+        """
+        with self._lock:
+            failures, error, checked_at = self._health.get(key, (0, "", 0))
+        if failures < self.failure_threshold or time.time() - checked_at >= self.health_retry_seconds:
+            return True, ""
+        return False, error
+
+    def model_health(self, model_name, api_key):
+        return self.health(client_key("genai", model_name, api_key))
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    """Returns the process-wide client registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GeminiClientRegistry()
+        return _registry
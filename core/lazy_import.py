@@ -0,0 +1,61 @@
+"""
+Deferred imports for heavy optional libraries.
+
+TensorFlow, MediaPipe, OpenCV, pygame, pandas and plotly together add
+seconds and hundreds of MB to every process start, while most sessions
+never open the feature that needs them. ``lazy_import`` returns a
+stand-in module that performs the real import on first attribute access,
+and ``lazy_function`` does the same for a single function.
+"""
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """``np = lazy_import("numpy")`` behaves like ``import numpy as np`` but imports on first use."""
+    return LazyModule(name)
+
+
+def lazy_function(module_name, function_name):
+    """A function that imports ``module_name`` the first time it is called."""
+    module = lazy_import(module_name)
+
+    def call(*args, **kwargs):
+        return getattr(module, function_name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = function_name
+    call.__doc__ = f"Calls {module_name}.{function_name}, importing it on first use."
+    return call
+
+
+def is_loaded(module):
+    """True once a lazy module has been imported (always True for a regular module)."""
+    return not isinstance(module, LazyModule) or module.__dict__["_lazy_module"] is not None
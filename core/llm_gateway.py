@@ -0,0 +1,304 @@
+"""
+Gateway for LLM calls made by Streamlit sessions.
+
+Every call goes through one asyncio event loop running in a background
+thread, which gives all sessions of the process:
+
+- a global limit on concurrent provider calls, with free slots handed out
+  round-robin across users so one busy session cannot starve the others;
+- coalescing: identical requests already in flight share a single call;
+- a deadline per call, after which the caller gets ``TimeoutError``;
+- retries with jittered exponential backoff on 429 and 5xx responses.
+
+Streamed replies get the same treatment through ``stream``: opening the
+stream and waiting for its first chunk are retried like a call, and the
+whole stream has to finish within the deadline, so a hung stream can't
+keep its slot.
+
+The provider SDKs are blocking, so the calls themselves run on a thread
+pool; the loop only schedules them.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_CONCURRENCY = int(os.getenv("TALKHEAL_LLM_CONCURRENCY", "8"))
+DEADLINE_SECONDS = float(os.getenv("TALKHEAL_LLM_DEADLINE", "45"))
+MAX_RETRIES = int(os.getenv("TALKHEAL_LLM_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+_END = object()
+
+
+def is_retryable(error):
+    """True for rate limiting (429) and server errors (5xx)."""
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+
+class FairLimiter:
+    """Concurrency limit whose waiting slots are granted round-robin by user."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+        self._waiting = OrderedDict()   # user -> deque of futures, in turn order
+
+    async def acquire(self, user):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self.release()
+            else:
+                queue = self._waiting.get(user)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._waiting[user]
+            raise
+
+    def release(self):
+        while self._waiting:
+            user, queue = self._waiting.popitem(last=False)
+            waiter = queue.popleft()
+            if queue:
+                # Back of the line until every other waiting user had a turn
+                self._waiting[user] = queue
+            if not waiter.done():
+                waiter.set_result(None)     # the slot passes on without freeing it
+                return
+        self.active -= 1
+
+
+def _open_stream(fn):
+    # Providers report most errors on the first read, so that is part of opening
+    iterator = iter(fn())
+    return iterator, next(iterator, _END)
+
+
+class _StreamBuffer:
+    """Chunks of one stream, readable from the start by every caller sharing it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.readers = 0
+        self.error = None
+        self.done = False
+        self.task = None
+        self._cond = threading.Condition()
+
+    def append(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            if not self.done:
+                self.error = error
+                self.done = True
+                self._cond.notify_all()
+
+    def get(self, index, timeout):
+        """The chunk at ``index``, ``_END`` after the last one, or the stream's error."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: index < len(self.chunks) or self.done, timeout):
+                raise TimeoutError("LLM stream timed out")
+            if index < len(self.chunks):
+                return self.chunks[index]
+            if self.error is not None:
+                raise self.error
+            return _END
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, deadline=DEADLINE_SECONDS,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS):
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._limiter = FairLimiter(max_concurrency)
+        self._inflight = {}         # coalescing key -> [task, number of callers waiting]
+        self._streams = {}          # coalescing key -> _StreamBuffer of the stream in flight
+        # Abandoned calls keep their thread until the SDK returns, so leave some headroom
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix="llm")
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True, name="llm-gateway").start()
+
+    # ---------- Blocking API for session threads ----------
+    def call(self, fn, user="anonymous", key=None, deadline=None, report=None):
+        """Runs ``fn()`` through the gateway and returns its result.
+
+        Calls with the same ``key`` that overlap in time share one execution.
+        Raises ``TimeoutError`` once ``deadline`` seconds have passed.
+        ``report``, if given, is called once per execution with ``None`` on
+        success or with the error that ended it.
+        """
+        return self.submit(fn, user, key, deadline, report).result()
+
+    def submit(self, fn, user="anonymous", key=None, deadline=None, report=None):
+        """Like ``call``, but returns a ``concurrent.futures.Future`` instead of waiting."""
+        deadline = self.deadline if deadline is None else deadline
+        return asyncio.run_coroutine_threadsafe(self._call(fn, user, key, deadline, report), self._loop)
+
+    def stream(self, fn, user="anonymous", key=None, deadline=None, report=None):
+        """Runs ``fn()``, which returns an iterator, through the gateway and yields its items.
+
+        Opening the stream and reading its first item are retried like
+        ``call``; later errors end the stream. Streams with the same ``key``
+        that overlap in time share one execution, and a caller joining late
+        still gets every item. Raises ``TimeoutError`` if the stream hasn't
+        finished ``deadline`` seconds after it started. ``report`` works as
+        for ``call``.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        buffer = asyncio.run_coroutine_threadsafe(
+            self._join_stream(fn, user, key, deadline, report), self._loop).result()
+        give_up_at = time.monotonic() + deadline
+        try:
+            index = 0
+            while True:
+                chunk = buffer.get(index, max(0.0, give_up_at - time.monotonic()))
+                if chunk is _END:
+                    return
+                yield chunk
+                index += 1
+        finally:
+            self._loop.call_soon_threadsafe(self._leave_stream, buffer)
+
+    # ---------- Inside the event loop ----------
+    async def _call(self, fn, user, key, deadline, report):
+        if key is None:
+            return await self._execute(self._run(fn, user, deadline), deadline, report)
+
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self._execute(self._run(fn, user, deadline), deadline, report))
+            entry = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda done: self._forget(key, done))
+        entry[1] += 1
+        try:
+            # Shielded, so one caller giving up doesn't cancel the call for the others
+            return await asyncio.wait_for(asyncio.shield(entry[0]), deadline)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+
+    def _forget(self, key, task):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+
+    async def _join_stream(self, fn, user, key, deadline, report):
+        buffer = None if key is None else self._streams.get(key)
+        if buffer is None:
+            buffer = _StreamBuffer()
+            buffer.task = asyncio.ensure_future(self._pump(fn, user, deadline, buffer, report))
+            if key is not None:
+                self._streams[key] = buffer
+                buffer.task.add_done_callback(lambda done: self._forget_stream(key, buffer))
+        buffer.readers += 1
+        return buffer
+
+    def _leave_stream(self, buffer):
+        buffer.readers -= 1
+        if buffer.readers == 0 and not buffer.task.done():
+            buffer.task.cancel()
+
+    def _forget_stream(self, key, buffer):
+        if self._streams.get(key) is buffer:
+            del self._streams[key]
+
+    async def _pump(self, fn, user, deadline, buffer, report):
+        """Moves a stream's items into ``buffer`` while holding one slot."""
+        try:
+            await self._execute(self._read_stream(fn, user, deadline, buffer), deadline, report)
+        except asyncio.CancelledError:
+            buffer.finish(TimeoutError("LLM stream was cancelled"))
+            raise
+        except Exception as e:
+            buffer.finish(e)
+        else:
+            buffer.finish()
+
+    async def _read_stream(self, fn, user, deadline, buffer):
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        await self._limiter.acquire(user)
+        try:
+            iterator, chunk = await self._attempt(lambda: _open_stream(fn), give_up_at)
+            while chunk is not _END:
+                buffer.append(chunk)
+                chunk = await loop.run_in_executor(self._executor, next, iterator, _END)
+        finally:
+            self._limiter.release()
+
+    async def _execute(self, run, deadline, report):
+        """Awaits ``run`` within ``deadline`` and reports how it ended."""
+        try:
+            result = await asyncio.wait_for(run, deadline)
+        except asyncio.TimeoutError:
+            error = TimeoutError("LLM call timed out")
+            if report is not None:
+                report(error)
+            raise error from None
+        except Exception as e:
+            if report is not None:
+                report(e)
+            raise
+        if report is not None:
+            report(None)
+        return result
+
+    async def _run(self, fn, user, deadline):
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + deadline
+        await self._limiter.acquire(user)
+        try:
+            return await self._attempt(fn, give_up_at)
+        finally:
+            self._limiter.release()
+
+    async def _attempt(self, fn, give_up_at):
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await loop.run_in_executor(self._executor, fn)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                # Full jitter keeps retrying sessions from hitting the provider in lockstep
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if loop.time() + delay >= give_up_at:
+                    raise
+                await asyncio.sleep(delay)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway():
+    """Returns the process-wide gateway."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,125 @@
+"""
+Cache for LLM responses.
+
+Two tiers: an in-process LRU that answers repeated prompts in microseconds,
+and an optional SQLite file shared across processes and restarts, with a TTL
+and a cap on the number of rows. Keys are hashes of the normalized prompt,
+the selected tone and the model name.
+
+Keys don't contain the prompt itself, but the full reply text is stored in
+plain text, so the SQLite file is user data and lives in data/ with the
+rest of it. Cached replies are shared across users: anyone who sends the
+same normalized prompt with the same tone and model gets the same reply.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from core.db import DATABASE_PATHS, MIGRATIONS, Database, get_database
+
+CACHE_SIZE = int(os.getenv("TALKHEAL_RESPONSE_CACHE_SIZE", "256"))
+# TALKHEAL_RESPONSE_CACHE_DB; an empty string keeps the cache in memory only
+CACHE_DB_PATH = DATABASE_PATHS["response_cache"]
+CACHE_TTL_SECONDS = int(os.getenv("TALKHEAL_RESPONSE_CACHE_TTL", str(24 * 60 * 60)))
+CACHE_DISK_ENTRIES = int(os.getenv("TALKHEAL_RESPONSE_CACHE_DISK_ENTRIES", "5000"))
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip().casefold()
+
+
+def make_cache_key(prompt, tone=None, model_name=None):
+    raw = json.dumps([normalize_prompt(prompt), tone or "", model_name or ""])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=CACHE_SIZE, db_path=CACHE_DB_PATH,
+                 ttl_seconds=CACHE_TTL_SECONDS, max_disk_entries=CACHE_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()     # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        if not db_path:
+            self.db = None
+        elif db_path == CACHE_DB_PATH:
+            self.db = get_database("response_cache")
+        else:
+            self.db = Database(db_path, MIGRATIONS["response_cache"])
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        if self.db is not None:
+            row = self.db.query_one("SELECT value, stored_at FROM response_cache WHERE key = ?", (key,))
+            if row is not None and now - row[1] < self.ttl_seconds:
+                with self.db.transaction() as conn:
+                    conn.execute("UPDATE response_cache SET used_at = ? WHERE key = ?", (now, key))
+                value = json.loads(row[0])
+                with self._lock:
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+        if self.db is None:
+            return
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?)",
+                         (key, json.dumps(value), now, now))
+            conn.execute("DELETE FROM response_cache WHERE stored_at < ?", (now - self.ttl_seconds,))
+            # Least recently used rows go first once the table is over its cap
+            conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_disk_entries,))
+
+    def _remember(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "memory_entries": len(self._memory)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide response cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -0,0 +1,74 @@
+"""
+Local storage identity for visitors who are not signed in.
+
+Anonymous sessions get a random id carried in an HMAC-signed cookie, so the
+same browser finds its conversations again without any network lookup.
+Signed-in users are identified by their email instead (see
+``core.utils.get_storage_owner``).
+
+Cookies are signed with SESSION_SECRET. Without it, a key is generated
+once and kept in SESSION_SECRET_FILE, so cookies survive restarts and are
+accepted by every worker sharing the data directory.
+"""
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+
+logger = logging.getLogger(__name__)
+
+SESSION_COOKIE_NAME = "talkheal_sid"
+SESSION_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+SESSION_SECRET_FILE = os.getenv("TALKHEAL_SESSION_SECRET_FILE", os.path.join("data", "session_secret"))
+
+
+def load_session_secret(path=SESSION_SECRET_FILE):
+    """SESSION_SECRET, or else the key stored in ``path``, generated on first use."""
+    configured = os.getenv("SESSION_SECRET")
+    if configured:
+        return configured.encode()
+    logger.warning("SESSION_SECRET is not set; signing session cookies with the key in %s", path)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+        try:
+            # Linking fails if another worker got there first; its key wins
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temp_path)
+    with open(path) as f:
+        return f.read().strip().encode()
+
+
+_SECRET = load_session_secret()
+
+
+def new_session_id():
+    return secrets.token_hex(16)
+
+
+def sign_session_id(session_id, secret=_SECRET):
+    signature = hmac.new(secret, session_id.encode(), hashlib.sha256).hexdigest()
+    return f"{session_id}.{signature}"
+
+
+def verify_session_cookie(value, secret=_SECRET):
+    """Returns the session id of a correctly signed cookie value, otherwise None."""
+    if not value or "." not in value:
+        return None
+    session_id, signature = value.rsplit(".", 1)
+    expected = hmac.new(secret, session_id.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(signature, expected):
+        return None
+    return session_id
+
+
+def storage_key(owner):
+    """Filesystem-safe name for an owner, so emails don't end up in file names."""
+    return hashlib.sha256(owner.encode()).hexdigest()[:24]
@@ -0,0 +1,134 @@
+"""
+Rolling conversation summaries.
+
+Once a conversation has more than ``SUMMARY_AFTER_TURNS`` turns that are not
+covered by its summary, everything but the last few turns is folded into
+the summary off the request path. The call goes through the LLM gateway,
+so it has a deadline, retries and counts against the shared concurrency
+limit; a call that fails or times out is simply retried on a later turn.
+The finished summary is applied on the next turn: it is stored on the conversation as
+``summary`` (with ``summary_upto``, the number of messages it covers) and
+is prepended to the prompt instead of those messages.
+"""
+import os
+import re
+import threading
+
+from core.context_builder import CHARS_PER_TOKEN, format_message
+from core.gemini_client import get_client_registry
+from core.llm_gateway import get_llm_gateway
+
+SUMMARY_AFTER_TURNS = int(os.getenv("TALKHEAL_SUMMARY_AFTER_TURNS", "12"))
+SUMMARY_KEEP_TURNS = int(os.getenv("TALKHEAL_SUMMARY_KEEP_TURNS", "4"))
+SUMMARY_MAX_TOKENS = int(os.getenv("TALKHEAL_SUMMARY_MAX_TOKENS", "250"))
+# Empty uses the chat model, "stub" the offline model below, anything else is a Gemini model name
+SUMMARY_MODEL = os.getenv("TALKHEAL_SUMMARY_MODEL", "")
+# Seconds a summary call may take, queueing for a gateway slot included
+SUMMARY_DEADLINE_SECONDS = float(os.getenv("TALKHEAL_SUMMARY_DEADLINE", "60"))
+
+
+def build_summary_prompt(previous_summary, messages):
+    transcript = "\n".join(format_message(msg) for msg in messages)
+    return f"""
+    Update the running summary of a supportive conversation between a user and TalkHeal.
+    Keep what matters for continuing the conversation: how the user feels, what they shared,
+    what was suggested and anything they asked to be remembered. Plain text, under 150 words.
+
+    Current summary: {previous_summary or "(none)"}
+
+    New messages:
+    {transcript}
+
+    Updated summary:
+    """
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubSummaryModel:
+    """Deterministic offline model: keeps the first sentence of each user message."""
+    model_name = "stub"
+
+    def generate_content(self, prompt):
+        summary = re.search(r"Current summary: (.*)", prompt).group(1)
+        points = [] if summary == "(none)" else [summary]
+        for text in re.findall(r"^\s*User: (.*)$", prompt, re.MULTILINE):
+            points.append(re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0])
+        return StubResponse(" ".join(points))
+
+
+class ConversationSummarizer:
+    def __init__(self, after_turns=SUMMARY_AFTER_TURNS, keep_turns=SUMMARY_KEEP_TURNS,
+                 max_tokens=SUMMARY_MAX_TOKENS, deadline=SUMMARY_DEADLINE_SECONDS, gateway=None):
+        self.after_messages = after_turns * 2
+        self.keep_messages = keep_turns * 2
+        self.max_chars = max_tokens * CHARS_PER_TOKEN
+        self.deadline = deadline
+        self._gateway = gateway
+        self._pending = {}      # conversation key -> (future, messages covered)
+        self._lock = threading.Lock()
+
+    def schedule(self, key, convo, model, user="anonymous"):
+        """Starts summarizing older turns of ``convo`` in the background if it is due.
+
+        ``key`` identifies the conversation across sessions (owner and id);
+        ``user`` is whose turn the call takes in the gateway.
+        """
+        if model is None:
+            return False
+        messages = convo.get("messages", [])
+        upto = convo.get("summary_upto", 0)
+        if len(messages) - upto <= self.after_messages:
+            return False
+        new_upto = len(messages) - self.keep_messages
+        with self._lock:
+            if key in self._pending:
+                return False
+            prompt = build_summary_prompt(convo.get("summary", ""), messages[upto:new_upto])
+            gateway = self._gateway or get_llm_gateway()
+            future = gateway.submit(lambda: self._summarize(model, prompt), user=user, deadline=self.deadline,
+                                    report=get_client_registry().reporter(model))
+            self._pending[key] = (future, new_upto)
+        return True
+
+    def apply_finished(self, key, convo):
+        """Stores a finished summary on ``convo``. Returns True if the conversation changed."""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None or not pending[0].done():
+                return False
+            del self._pending[key]
+        future, new_upto = pending
+        if future.exception() is not None or new_upto > len(convo.get("messages", [])):
+            # A failed run is retried on a later turn; a cleared history makes the result stale
+            return False
+        convo["summary"] = future.result()
+        convo["summary_upto"] = new_upto
+        return True
+
+    def wait(self, key):
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            pending[0].exception()
+
+    def _summarize(self, model, prompt):
+        response = model.generate_content(prompt)
+        summary = re.sub(r"\s+", " ", response.text).strip()
+        return summary[:self.max_chars]
+
+
+_summarizer = None
+_summarizer_lock = threading.Lock()
+
+
+def get_summarizer():
+    """Returns the process-wide summarizer."""
+    global _summarizer
+    with _summarizer_lock:
+        if _summarizer is None:
+            _summarizer = ConversationSummarizer()
+        return _summarizer
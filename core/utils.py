@@ -1,10 +1,32 @@
 from datetime import datetime, timedelta, timezone
 import streamlit as st
+import streamlit.components.v1 as components
 import re
-import json
+import hashlib
 import os
+import uuid
 import requests
 import google.generativeai
+from core.context_builder import ContextBuilder
+from core.conversation_log import get_conversation_log
+from core.conversation_repository import get_conversation_repository
+from core.gemini_client import get_client_registry
+from core.llm_gateway import get_llm_gateway
+from core.response_cache import get_response_cache, make_cache_key
+from core.summarizer import SUMMARY_MODEL, StubSummaryModel, get_summarizer
+from core.session_identity import (
+    SESSION_COOKIE_NAME, SESSION_COOKIE_MAX_AGE,
+    new_session_id, sign_session_id, verify_session_cookie, storage_key,
+)
+
+# "sqlite" keeps conversations in conversations.db, "jsonl" in per-user journal files
+CONVERSATION_STORE = os.getenv("TALKHEAL_CONVERSATION_STORE", "sqlite")
+# Lazy mode keeps only a titles index in the session and loads messages of the active conversation
+LAZY_CONVERSATIONS = os.getenv("TALKHEAL_LAZY_CONVERSATIONS", "1") != "0"
+# Stream Gemini replies into the chat as they are generated
+STREAM_RESPONSES = os.getenv("TALKHEAL_STREAM_RESPONSES", "1") != "0"
+# Approximate bytes of inactive conversation messages a session may keep loaded
+CONVERSATION_CACHE_BUDGET = int(os.getenv("TALKHEAL_CONVERSATION_CACHE_BYTES", str(256 * 1024)))
 
 def get_current_time():
     """Returns the user's local time formatted as HH:MM AM/PM."""
@@ -21,6 +43,10 @@ def get_current_time():
 
 
 
+def new_message(sender, message):
+    """A chat message with a stable id, used to key pins and rendered bubbles."""
+    return {"id": uuid.uuid4().hex[:12], "sender": sender, "message": message, "time": get_current_time()}
+
 def create_new_conversation(initial_message=None):
     """
     Creates a new conversation in the session state.
@@ -28,21 +54,18 @@ def create_new_conversation(initial_message=None):
     Returns the index of the newly created conversation.
     """
     new_convo = {
-        "id": len(st.session_state.conversations),
+        "id": max((c.get("id", -1) for c in st.session_state.conversations), default=-1) + 1,
         "title": initial_message[:30] + "..." if initial_message and len(initial_message) > 30 else "New Conversation",
         "date": datetime.now().strftime("%B %d, %Y"),
         "messages": []
     }
     
     if initial_message:
-        new_convo["messages"].append({
-            "sender": "user", 
-            "message": initial_message, 
-            "time": get_current_time()
-        })
+        new_convo["messages"].append(new_message("user", initial_message))
     
     st.session_state.conversations.insert(0, new_convo)
     st.session_state.active_conversation = 0
+    save_conversations(st.session_state.conversations)
     return 0
 
 def clean_ai_response(response_text):
@@ -57,11 +80,55 @@ def clean_ai_response(response_text):
     
     return response_text
 
-def get_ai_response(user_message, model):
-    if model is None:
-        return "I'm sorry, I can't connect right now. Please check the API configuration."
+class ResponseStreamCleaner:
+    """
+    Incremental clean_ai_response() for streamed replies. Text is released as
+    soon as it can no longer change: an unclosed tag, a partial HTML entity or
+    trailing whitespace is held back until the next chunk decides it. Joining
+    every returned piece gives the same result as cleaning the full reply.
+    """
+    ENTITIES = (('&nbsp;', ' '), ('&lt;', '<'), ('&gt;', '>'), ('&amp;', '&'))
+
+    def __init__(self):
+        self._raw = ""        # not yet tag-stripped (may end in an unclosed tag)
+        self._text = ""       # tag-stripped, not yet released
+        self._started = False
 
-    mental_health_prompt = f"""
+    def feed(self, chunk):
+        self._raw += chunk or ""
+        # Every '<' before the last '>' is closed; the first '<' after it may not be
+        split = self._raw.find('<', self._raw.rfind('>') + 1)
+        if split == -1:
+            complete, self._raw = self._raw, ""
+        else:
+            complete, self._raw = self._raw[:split], self._raw[split:]
+        self._text += re.sub(r'<[^>]+>', '', complete)
+
+        hold = len(self._text.rstrip())
+        amp = self._text.rfind('&', 0, hold)
+        if amp != -1 and ';' not in self._text[amp:hold] and hold - amp < len('&nbsp;'):
+            hold = amp
+        ready, self._text = self._text[:hold], self._text[hold:]
+        return self._release(ready)
+
+    def finish(self):
+        """Releases whatever is still held once the stream has ended."""
+        # An unclosed '<' never forms a tag, so it stays as text
+        ready = (self._text + self._raw).rstrip()
+        self._raw = self._text = ""
+        return self._release(ready)
+
+    def _release(self, text):
+        text = re.sub(r'\s+', ' ', text)
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        for entity, char in self.ENTITIES:
+            text = text.replace(entity, char)
+        return text
+
+def build_mental_health_prompt(user_message):
+    return f"""
     You are a compassionate mental health support chatbot named TalkHeal. Your role is to:
     1. Provide empathetic, supportive responses
     2. Encourage professional help when needed
@@ -77,79 +144,261 @@ def get_ai_response(user_message, model):
     
     Respond in a caring, supportive manner (keep response under 150 words):
     """
-    
-    try:
-        response = model.generate_content(mental_health_prompt)
-        # Clean the response to remove any HTML or unwanted formatting
-        cleaned_response = clean_ai_response(response.text)
-        return cleaned_response
-    except ValueError as e:
+
+def get_ai_error_message(error):
+    """Maps a failed Gemini call to a supportive reply for the user."""
+    if isinstance(error, ValueError):
         # Handle invalid input or model configuration issues
         return "I'm having trouble understanding your message. Could you please rephrase it?"
-    except google.generativeai.types.BlockedPromptException as e:
+    if isinstance(error, google.generativeai.types.BlockedPromptException):
         # Handle content policy violations
         return "I understand you're going through something difficult. Let's focus on how you're feeling and what might help you feel better."
-    except google.generativeai.types.GenerationException as e:
+    if isinstance(error, getattr(google.generativeai.types, "GenerationException", ())):
         # Handle generation errors
         return "I'm having trouble generating a response right now. Please try again in a moment."
-    except requests.RequestException as e:
+    if isinstance(error, requests.RequestException):
         # Handle network/API connection issues
         return "I'm having trouble connecting to my services. Please check your internet connection and try again."
-    except Exception as e:
-        # Log unexpected errors for debugging (you can add logging here)
-        # import logging
-        # logging.error(f"Unexpected error in get_ai_response: {e}")
-        return "I'm here to listen and support you. Sometimes I have trouble connecting, but I want you to know that your feelings are valid and you're not alone. Would you like to share more about what you're experiencing?"
-
-def cached_user_ip():
-    # Check if IP is already cached in session state
-    if hasattr(st.session_state, 'cached_ip') and hasattr(st.session_state, 'ip_cache_time'):
-        # Check if cache is still valid (cache for 1 hour)
-        cache_age = datetime.now() - st.session_state.ip_cache_time
-        if cache_age < timedelta(hours=1):
-            return st.session_state.cached_ip
-    
-    # Cache is missing or expired, fetch new IP
+    # Log unexpected errors for debugging (you can add logging here)
+    # import logging
+    # logging.error(f"Unexpected error in get_ai_response: {error}")
+    return "I'm here to listen and support you. Sometimes I have trouble connecting, but I want you to know that your feelings are valid and you're not alone. Would you like to share more about what you're experiencing?"
+
+def get_response_cache_key(user_message, model):
+    tone = st.session_state.get("selected_tone")
+    return make_cache_key(user_message, tone=tone, model_name=getattr(model, "model_name", None))
+
+def get_ai_response(user_message, model):
+    if model is None:
+        return "I'm sorry, I can't connect right now. Please check the API configuration."
+
+    cache = get_response_cache()
+    cache_key = get_response_cache_key(user_message, model)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get("https://api.ipify.org", timeout=5)
-        ip = response.text.strip()
-        # Cache the IP and timestamp
-        st.session_state.cached_ip = ip
-        st.session_state.ip_cache_time = datetime.now()
-        
-        return ip
-    except (requests.RequestException, requests.Timeout, Exception):
-        # Fallback: use session ID or generate a unique identifier
-        fallback_id = f"session_{hash(str(st.session_state)) % 100000}"
-        
-        # Cache the fallback ID so we use the same one consistently
-        if not hasattr(st.session_state, 'cached_ip'):
-            st.session_state.cached_ip = fallback_id
-            st.session_state.ip_cache_time = datetime.now()
-        
-        return st.session_state.cached_ip
-
-#Implementing IP Based Isolation
-def get_user_ip():
+        prompt = build_mental_health_prompt(user_message)
+        response = get_llm_gateway().call(lambda: model.generate_content(prompt),
+                                          user=get_storage_owner(), key=cache_key,
+                                          report=get_client_registry().reporter(model))
+        # Clean the response to remove any HTML or unwanted formatting
+        cleaned_response = clean_ai_response(response.text)
+    except Exception as e:
+        return get_ai_error_message(e)
+    # Only real replies are cached, never the fallback messages
+    cache.set(cache_key, cleaned_response)
+    return cleaned_response
+
+def stream_ai_response(user_message, model):
+    """Yields the cleaned reply piece by piece while Gemini is still generating it."""
+    if model is None:
+        yield "I'm sorry, I can't connect right now. Please check the API configuration."
+        return
+
+    cache = get_response_cache()
+    cache_key = get_response_cache_key(user_message, model)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        yield cached
+        return
+
+    cleaner = ResponseStreamCleaner()
+    reply = ""
     try:
-        return requests.get("https://api.ipify.org").text
-    except:
-        return "unknown_ip"
+        chunks = get_llm_gateway().stream(
+            lambda: model.generate_content(build_mental_health_prompt(user_message), stream=True),
+            user=get_storage_owner(), key=cache_key, report=get_client_registry().reporter(model))
+        for chunk in chunks:
+            piece = cleaner.feed(chunk.text)
+            if piece:
+                reply += piece
+                yield piece
+        piece = cleaner.finish()
+        if piece:
+            reply += piece
+            yield piece
+    except Exception as e:
+        # Keep a partial reply as it is; only replace a reply that never started
+        if not reply:
+            yield get_ai_error_message(e)
+        return
+    cache.set(cache_key, reply)
+
+def get_anonymous_session_id():
+    """
+    Identifies a visitor who isn't signed in through a signed session cookie.
+    A new id is minted (and the cookie set) only when no valid cookie exists.
+    """
+    if "anonymous_session_id" not in st.session_state:
+        cookies = getattr(st.context, "cookies", None) or {}
+        session_id = verify_session_cookie(cookies.get(SESSION_COOKIE_NAME))
+        if session_id is None:
+            session_id = new_session_id()
+            components.html(f"""
+                <script>
+                window.parent.document.cookie = "{SESSION_COOKIE_NAME}={sign_session_id(session_id)}; path=/; max-age={SESSION_COOKIE_MAX_AGE}; SameSite=Lax";
+                </script>
+            """, height=0)
+        st.session_state.anonymous_session_id = f"anon_{session_id}"
+    return st.session_state.anonymous_session_id
+
+def get_storage_owner():
+    """Whose conversations to load and save; resolved locally, without network calls."""
+    return st.session_state.get("user_email") or get_anonymous_session_id()
 
-#Saving and loading to/from JSON File
+#Saving and loading to/from the conversation journal
 def get_memory_file():
-    ip = cached_user_ip()
     os.makedirs("data", exist_ok=True)
-    return f"data/conversations_{ip}.json"
+    return f"data/conversations_{storage_key(get_storage_owner())}.json"
 
-def save_conversations(conversations):
+def get_conversation_journal():
     memory_file = get_memory_file()
-    with open(memory_file, 'w', encoding="utf-8") as f:
-        json.dump(conversations, f, indent=4)
+    journal_file = os.path.splitext(memory_file)[0] + ".jsonl"
+    # The old whole-file JSON is imported once, the first time the journal is opened
+    return get_conversation_log(journal_file, legacy_path=memory_file)
+
+def save_conversations(conversations):
+    if CONVERSATION_STORE == "jsonl":
+        get_conversation_journal().save(conversations)
+        return
+    get_conversation_repository().save_conversations(get_storage_owner(), conversations)
 
 def load_conversations():
-    memory_file = get_memory_file()
-    if not os.path.exists(memory_file):
-        return []
-    with open(memory_file, 'r', encoding="utf-8") as f:
-        return json.load(f)
+    if CONVERSATION_STORE == "jsonl":
+        return get_conversation_journal().load()
+
+    repository = get_conversation_repository()
+    owner = get_storage_owner()
+    conversations = repository.load_conversations(owner)
+    if not conversations:
+        # First run against the database: bring over whatever the file store had
+        conversations = get_conversation_journal().load()
+        if conversations:
+            repository.save_conversations(owner, conversations)
+    return conversations
+
+def load_conversation_index():
+    """
+    Returns the conversations for a new session. In lazy mode only the index
+    (id, title, date, message count) is loaded; messages follow on demand
+    through get_active_conversation().
+    """
+    if not LAZY_CONVERSATIONS or CONVERSATION_STORE == "jsonl":
+        return load_conversations()
+    index = get_conversation_repository().list_conversations(get_storage_owner())
+    if not index:
+        # Nothing in the database yet, which may mean there is a file store to import
+        return load_conversations()
+    return index
+
+def get_message_count(convo):
+    if "messages" in convo:
+        return len(convo["messages"])
+    return convo.get("message_count", 0)
+
+def _conversation_size(convo):
+    return sum(len(msg.get("message", "")) + 64 for msg in convo.get("messages", []))
+
+def hydrate_conversation(convo):
+    """Loads the messages of an index-only conversation."""
+    if "messages" not in convo:
+        convo["messages"] = get_conversation_repository().get_messages(get_storage_owner(), convo["id"])
+        convo.pop("message_count", None)
+    return convo
+
+def evict_inactive_conversations(keep_id):
+    """Drops the messages of least recently used conversations once the session budget is exceeded."""
+    recent = st.session_state.setdefault("hydrated_conversations", [])
+    if keep_id in recent:
+        recent.remove(keep_id)
+    recent.append(keep_id)
+
+    by_id = {convo["id"]: convo for convo in st.session_state.conversations}
+    loaded = [cid for cid in recent if cid in by_id and "messages" in by_id[cid]]
+    used = sum(_conversation_size(by_id[cid]) for cid in loaded if cid != keep_id)
+    for cid in loaded:
+        if used <= CONVERSATION_CACHE_BUDGET:
+            break
+        if cid == keep_id:
+            continue
+        convo = by_id[cid]
+        used -= _conversation_size(convo)
+        convo["message_count"] = len(convo.pop("messages"))
+        recent.remove(cid)
+
+def get_active_conversation():
+    """Returns the active conversation with its messages loaded, or None."""
+    index = st.session_state.get("active_conversation", -1)
+    if index < 0 or index >= len(st.session_state.conversations):
+        return None
+    convo = st.session_state.conversations[index]
+    if LAZY_CONVERSATIONS and CONVERSATION_STORE != "jsonl":
+        hydrate_conversation(convo)
+        evict_inactive_conversations(convo["id"])
+    return convo
+
+def get_message_key(msg):
+    """Stable id of a message, used to key pins and rendered bubbles."""
+    if "id" in msg:
+        return msg["id"]
+    # Messages saved before ids existed are identified by their content
+    raw = f"{msg.get('sender', '')}\0{msg.get('time', '')}\0{msg.get('message', '')}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+# Pinned messages are only persisted by the SQLite store; with jsonl they last for the session
+def load_pinned_messages():
+    """Returns the pins as a dict keyed by (conversation id, message key), in pinning order."""
+    if CONVERSATION_STORE == "jsonl":
+        return {}
+    pins = get_conversation_repository().get_pins(get_storage_owner())
+    return {(pin["convo_id"], pin["message_key"]): pin for pin in pins}
+
+def set_pinned_message(convo_id, message_key, sender, message, pinned):
+    if CONVERSATION_STORE == "jsonl":
+        return
+    get_conversation_repository().set_pin(get_storage_owner(), convo_id, message_key, sender, message, pinned)
+
+def get_context_builder():
+    if "context_builder" not in st.session_state:
+        st.session_state.context_builder = ContextBuilder()
+    return st.session_state.context_builder
+
+def build_conversation_context(convo, include_last=False):
+    """Recent history of a conversation that fits the prompt token budget.
+
+    The newest message is left out by default because the caller sends it
+    separately as the current user message.
+    """
+    messages = convo.get("messages", [])
+    end = len(messages) if include_last else max(len(messages) - 1, 0)
+    return get_context_builder().build(convo["id"], messages, end,
+                                       summary=convo.get("summary", ""), start=convo.get("summary_upto", 0))
+
+def get_summary_model(model):
+    if not SUMMARY_MODEL:
+        return model
+    if SUMMARY_MODEL == "stub":
+        return StubSummaryModel()
+    api_key = st.secrets.get("GEMINI_API_KEY")
+    if not api_key:
+        return model
+    # Shared with every session, like the chat model
+    return get_client_registry().get_model(SUMMARY_MODEL, api_key)
+
+def update_conversation_summary(convo, model):
+    """Applies a finished background summary and starts the next one when it is due.
+
+    Returns True if the conversation changed and should be saved.
+    """
+    summarizer = get_summarizer()
+    key = (get_storage_owner(), convo["id"])
+    changed = summarizer.apply_finished(key, convo)
+    summarizer.schedule(key, convo, get_summary_model(model), user=key[0])
+    return changed
+
+def clear_pinned_messages():
+    if CONVERSATION_STORE == "jsonl":
+        return
+    get_conversation_repository().clear_pins(get_storage_owner())
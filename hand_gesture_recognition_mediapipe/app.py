@@ -1,9 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import csv
-import copy
 import argparse
-import itertools
 from collections import Counter
 from collections import deque
 
@@ -11,7 +9,9 @@ import cv2 as cv
 import numpy as np
 import mediapipe as mp
 
-from .utils import CvFpsCalc
+from .utils import CvFpsCalc, FrameRing
+from .landmarks import (NUM_LANDMARKS, bounding_rect, landmarks_to_array,
+                        normalize_landmarks, normalize_point_history)
 from .model import KeyPointClassifier, PointHistoryClassifier
 
 
@@ -84,8 +84,12 @@ def main():
             row[0] for row in point_history_classifier_labels
         ]
 
+    # Frame buffers: the mirrored BGR frame is drawn on in place, MediaPipe gets an RGB copy
+    frame_shape = (int(cap.get(cv.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv.CAP_PROP_FRAME_WIDTH)), 3)
+    frames = FrameRing(2, frame_shape, names=("frame", "rgb"))
+
     # FPS Measurement ########################################################
-    cvFpsCalc = CvFpsCalc(buffer_len=10)
+    cvFpsCalc = CvFpsCalc(buffer_len=10, frame_ring=frames)
 
     # Coordinate history #################################################################
     history_length = 16
@@ -94,6 +98,11 @@ def main():
     # Finger gesture history ################################################
     finger_gesture_history = deque(maxlen=history_length)
 
+    # Per-hand buffers, reused every frame ###################################
+    landmark_points = np.empty((NUM_LANDMARKS, 2), np.float32)
+    landmark_features = np.empty(NUM_LANDMARKS * 2, np.float32)
+    point_history_features = np.empty(history_length * 2, np.float32)
+
     #  ########################################################################
     mode = 0
 
@@ -107,14 +116,15 @@ def main():
         number, mode = select_mode(key, mode)
 
         # Camera capture #####################################################
-        ret, image = cap.read()
+        slot = frames.next()
+        ret, debug_image = cap.read(slot["frame"])
         if not ret:
             break
-        image = cv.flip(image, 1)  # Mirror display
-        debug_image = copy.deepcopy(image)
+        debug_image = frames.adopt(slot, "frame", debug_image)
+        cv.flip(debug_image, 1, dst=debug_image)  # Mirror display
 
         # Detection implementation #############################################################
-        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        image = cv.cvtColor(debug_image, cv.COLOR_BGR2RGB, dst=slot["rgb"])
 
         image.flags.writeable = False
         results = hands.process(image)
@@ -124,16 +134,19 @@ def main():
         if results.multi_hand_landmarks is not None:
             for hand_landmarks, handedness in zip(results.multi_hand_landmarks,
                                                   results.multi_handedness):
-                # Bounding box calculation
-                brect = calc_bounding_rect(debug_image, hand_landmarks)
                 # Landmark calculation
-                landmark_list = calc_landmark_list(debug_image, hand_landmarks)
+                landmarks_to_array(hand_landmarks, debug_image.shape[1],
+                                   debug_image.shape[0], out=landmark_points)
+                # Bounding box calculation
+                brect = bounding_rect(landmark_points)
+                landmark_list = landmark_points.astype(np.int32).tolist()
 
                 # Conversion to relative coordinates / normalized coordinates
-                pre_processed_landmark_list = pre_process_landmark(
-                    landmark_list)
-                pre_processed_point_history_list = pre_process_point_history(
-                    debug_image, point_history)
+                pre_processed_landmark_list = normalize_landmarks(
+                    landmark_points, out=landmark_features)
+                pre_processed_point_history_list = normalize_point_history(
+                    point_history, debug_image.shape[1], debug_image.shape[0],
+                    out=point_history_features)
                 # Write to the dataset file
                 logging_csv(number, mode, pre_processed_landmark_list,
                             pre_processed_point_history_list)
@@ -201,90 +214,6 @@ def select_mode(key, mode):
 
 
 
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_array = np.empty((0, 2), int)
-
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-
-        landmark_point = [np.array((landmark_x, landmark_y))]
-
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
-
-    x, y, w, h = cv.boundingRect(landmark_array)
-
-    return [x, y, x + w, y + h]
-
-
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    landmark_point = []
-
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
-
-        landmark_point.append([landmark_x, landmark_y])
-
-    return landmark_point
-
-
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
-
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
-
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
-
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(
-        itertools.chain.from_iterable(temp_landmark_list))
-
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
-
-    def normalize_(n):
-        return n / max_value
-
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
-
-    return temp_landmark_list
-
-
-def pre_process_point_history(image, point_history):
-    image_width, image_height = image.shape[1], image.shape[0]
-
-    temp_point_history = copy.deepcopy(point_history)
-
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, point in enumerate(temp_point_history):
-        if index == 0:
-            base_x, base_y = point[0], point[1]
-
-        temp_point_history[index][0] = (temp_point_history[index][0] -
-                                        base_x) / image_width
-        temp_point_history[index][1] = (temp_point_history[index][1] -
-                                        base_y) / image_height
-
-    # Convert to a one-dimensional list
-    temp_point_history = list(
-        itertools.chain.from_iterable(temp_point_history))
-
-    return temp_point_history
-
-
 def logging_csv(number, mode, landmark_list, point_history_list):
     if mode == 0:
         pass
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Offline evaluation of the gesture classifiers, no camera needed.
+
+Streams keypoint.csv and point_history.csv one chunk at a time through
+``classify_batch`` of every requested backend and thread count, and
+reports accuracy, throughput and per-batch latency, plus a confusion
+matrix per dataset. Configurations whose predictions differ from the
+first one are flagged, which makes this a regression check for model or
+backend changes as well as a benchmark.
+
+    python -m hand_gesture_recognition_mediapipe.evaluate
+    python -m hand_gesture_recognition_mediapipe.evaluate --dataset keypoint --threads 1 2 4 --json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from hand_gesture_recognition_mediapipe.model import KeyPointClassifier, PointHistoryClassifier
+from hand_gesture_recognition_mediapipe.model.tflite_backend import available_backends
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model")
+
+# name -> (classifier, samples, labels, label column, features per sample)
+DATASETS = {
+    "keypoint": (KeyPointClassifier,
+                 os.path.join(MODEL_DIR, "keypoint_classifier", "keypoint.csv"),
+                 os.path.join(MODEL_DIR, "keypoint_classifier", "keypoint_classifier_label.csv"), 1, 42),
+    "point_history": (PointHistoryClassifier,
+                      os.path.join(MODEL_DIR, "point_history_classifier", "point_history.csv"),
+                      os.path.join(MODEL_DIR, "point_history_classifier", "point_history_classifier_label.csv"), 0, 32),
+}
+CHUNK_SIZE = 256
+
+
+def read_labels(path, column):
+    with open(path, encoding="utf-8-sig") as f:
+        return [row[column] for row in csv.reader(f) if row]
+
+
+def iter_chunks(path, features, chunk_size=CHUNK_SIZE, limit=None, skipped=None):
+    """Yields (labels, samples) arrays of up to ``chunk_size`` rows.
+
+    Rows of another width (keypoint.csv has a few logged with both hands)
+    are skipped and counted in ``skipped["rows"]``.
+    """
+    labels = np.empty(chunk_size, np.int64)
+    samples = np.empty((chunk_size, features), np.float32)
+    count = total = 0
+    with open(path, encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if limit is not None and total >= limit:
+                break
+            if len(row) != features + 1:
+                if skipped is not None:
+                    skipped["rows"] = skipped.get("rows", 0) + 1
+                continue
+            labels[count] = int(row[0])
+            samples[count] = row[1:]
+            count += 1
+            total += 1
+            if count == chunk_size:
+                yield labels.copy(), samples.copy()
+                count = 0
+    if count:
+        yield labels[:count].copy(), samples[:count].copy()
+
+
+def confusion_matrix(labels, predictions, num_classes, out=None):
+    """Counts (label, prediction) pairs, adding to ``out`` (grown as needed) if given."""
+    size = max(num_classes, int(labels.max(initial=-1)) + 1, int(predictions.max(initial=-1)) + 1)
+    if out is None:
+        out = np.zeros((size, size), np.int64)
+    elif size > len(out):
+        out = np.pad(out, (0, size - len(out)))
+    np.add.at(out, (labels, predictions), 1)
+    return out
+
+
+def evaluate(dataset, configs, chunk_size=CHUNK_SIZE, limit=None, num_classes=0):
+    """Scores one dataset with every (backend, num_threads) configuration.
+
+    The file is read once, one chunk at a time, and each chunk goes through
+    all configurations before the next is read, so memory stays at one
+    chunk however large the dataset is. Each run gets a confusion matrix and
+    the number of samples on which it disagreed with the first configuration.
+    """
+    classifier_class, samples_path, _, _, features = DATASETS[dataset]
+    runs = []
+    for backend, num_threads in configs:
+        classifier = classifier_class(backend=backend, num_threads=num_threads)
+        runs.append({
+            "dataset": dataset,
+            "backend": classifier.backend.name,
+            "num_threads": num_threads,
+            "classifier": classifier,
+            "latencies": [],
+            "warmed_sizes": set(),
+            "correct": 0,
+            "mismatches": 0,
+            "confusion_matrix": None,
+        })
+
+    skipped = {}
+    samples_seen = 0
+    for chunk_labels, samples in iter_chunks(samples_path, features, chunk_size, limit, skipped):
+        reference_ids = None
+        for run in runs:
+            classifier = run["classifier"]
+            if len(samples) not in run["warmed_sizes"]:
+                # One untimed call per batch size (the last chunk is usually smaller) so
+                # setting up an interpreter for it isn't counted as latency
+                classifier.classify_batch(samples)
+                run["warmed_sizes"].add(len(samples))
+            start = time.perf_counter()
+            ids, _ = classifier.classify_batch(samples)
+            run["latencies"].append(time.perf_counter() - start)
+            run["correct"] += int((ids == chunk_labels).sum())
+            run["confusion_matrix"] = confusion_matrix(chunk_labels, ids, num_classes, out=run["confusion_matrix"])
+            if reference_ids is None:
+                reference_ids = ids
+            run["mismatches"] += int((ids != reference_ids).sum())
+        samples_seen += len(chunk_labels)
+    if not samples_seen:
+        raise ValueError(f"{dataset}: no samples to evaluate in {samples_path}")
+
+    results = []
+    for run in runs:
+        latencies = np.array(run["latencies"])
+        results.append({
+            "dataset": dataset,
+            "backend": run["backend"],
+            "num_threads": run["num_threads"],
+            "samples": samples_seen,
+            "skipped_rows": skipped.get("rows", 0),
+            "accuracy": run["correct"] / samples_seen,
+            "samples_per_sec": float(samples_seen / latencies.sum()),
+            "batch_size": chunk_size,
+            "p50_ms": float(np.percentile(latencies, 50) * 1000),
+            "p99_ms": float(np.percentile(latencies, 99) * 1000),
+            "matches_reference": run["mismatches"] == 0,
+            "confusion_matrix": run["confusion_matrix"],
+        })
+    return results
+
+
+def format_confusion(matrix, names):
+    # Only classes that occur, so the 31-way models stay readable
+    present = np.flatnonzero(matrix.sum(axis=0) + matrix.sum(axis=1))
+    names = [names[i] if i < len(names) else str(i) for i in present]
+    width = max(5, max(len(name) for name in names) + 1)
+    lines = [" " * width + "".join(f"{name[:width - 1]:>{width}}" for name in names) + "   <- predicted"]
+    for i, name in zip(present, names):
+        lines.append(f"{name[:width - 1]:<{width}}" + "".join(f"{matrix[i, j]:>{width}}" for j in present))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the gesture classifiers on the bundled datasets.")
+    parser.add_argument("--dataset", choices=["all", *DATASETS], default="all")
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="backends to compare (default: every installed one)")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1], help="num_threads values to try")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--limit", type=int, default=None, help="evaluate only the first N samples")
+    parser.add_argument("--min-accuracy", type=float, default=None,
+                        help="exit with status 1 if any configuration scores lower")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+
+    datasets = list(DATASETS) if args.dataset == "all" else [args.dataset]
+    backends = args.backends or available_backends()
+    results, report = [], []
+    for dataset in datasets:
+        _, _, labels_path, label_column, _ = DATASETS[dataset]
+        names = read_labels(labels_path, label_column)
+        # The NumPy executor is single-threaded
+        configs = [(backend, num_threads) for backend in backends
+                   for num_threads in ([1] if backend == "numpy" else args.threads)]
+        try:
+            runs = evaluate(dataset, configs, args.chunk_size, args.limit, num_classes=len(names))
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        matrix = runs[0]["confusion_matrix"]
+        results.append({
+            "dataset": dataset,
+            "labels": names,
+            "confusion_matrix": matrix.tolist(),
+            "runs": [{k: v for k, v in run.items() if k != "confusion_matrix"} for run in runs],
+        })
+        report.append((dataset, names, matrix, runs))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for dataset, names, matrix, runs in report:
+            first = runs[0]
+            print(f"== {dataset}: {first['samples']} samples, {first['skipped_rows']} malformed rows skipped, "
+                  f"batches of {args.chunk_size}")
+            print(f"{'backend':<16}{'threads':>8}{'accuracy':>10}{'samples/s':>12}{'p50 ms':>9}{'p99 ms':>9}"
+                  f"  same as {first['backend']}/{first['num_threads']}")
+            for run in runs:
+                print(f"{run['backend']:<16}{run['num_threads']:>8}{run['accuracy']:>10.4f}"
+                      f"{run['samples_per_sec']:>12.0f}{run['p50_ms']:>9.3f}{run['p99_ms']:>9.3f}"
+                      f"  {'yes' if run['matches_reference'] else 'NO'}")
+            print(f"\nConfusion matrix ({first['backend']}, rows are labels):")
+            print(format_confusion(matrix, names))
+            print()
+
+    failed = args.min_accuracy is not None and any(
+        run["accuracy"] < args.min_accuracy for result in results for run in result["runs"])
+    mismatched = any(not run["matches_reference"] for result in results for run in result["runs"])
+    return 1 if failed or mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
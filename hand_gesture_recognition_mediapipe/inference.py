@@ -1,44 +1,18 @@
-import cv2
-import copy
-import numpy as np
+import os
+import queue
+
 import streamlit as st
-from collections import Counter, deque
-import mediapipe as mp
-import os, csv
 
-# Import models and utils
-from hand_gesture_recognition_mediapipe.model import KeyPointClassifier, PointHistoryClassifier
-from hand_gesture_recognition_mediapipe.utils import CvFpsCalc
-from hand_gesture_recognition_mediapipe.app import (
-    calc_bounding_rect,
-    calc_landmark_list,
-    pre_process_landmark,
-    pre_process_point_history,
-    draw_landmarks,
-    draw_bounding_rect,
-    draw_info_text,
-    draw_point_history,
-    draw_info,
-)
+from hand_gesture_recognition_mediapipe.pipeline import GesturePipeline
+from hand_gesture_recognition_mediapipe.recognizer import GestureRecognizer, open_source
 
 # -------------------- Setup --------------------
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=2,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5,
-)
-
-keypoint_classifier = KeyPointClassifier()
-point_history_classifier = PointHistoryClassifier()
-
-# Load labels
-base_dir = os.path.dirname(__file__)
-with open(os.path.join(base_dir, "model/keypoint_classifier/keypoint_classifier_label.csv"), encoding="utf-8-sig") as f:
-    keypoint_labels = [row[1] for row in csv.reader(f)]
-with open(os.path.join(base_dir, "model/point_history_classifier/point_history_classifier_label.csv"), encoding="utf-8-sig") as f:
-    point_history_labels = [row[0] for row in csv.reader(f)]
+# Camera index or a recorded video file to play instead of the webcam
+GESTURE_SOURCE = os.getenv("TALKHEAL_GESTURE_SOURCE", "0")
+# Frames pushed to the browser per second; inference runs as fast as it can
+DISPLAY_FPS = float(os.getenv("TALKHEAL_GESTURE_DISPLAY_FPS", "15"))
+# Seconds without a processed frame before giving up on the camera
+FRAME_TIMEOUT = 5
 
 
 # -------------------- Gesture Mode --------------------
@@ -55,6 +29,7 @@ def gesture_mode():
         stop_button = st.button("⏹ Stop Gesture Mode", disabled=not st.session_state.gesture_active)
 
     FRAME_WINDOW = st.image([])  # placeholder for webcam
+    detected_gesture = st.empty()
 
     if start_button:
         st.session_state.gesture_active = True
@@ -65,82 +40,32 @@ def gesture_mode():
         st.info("Click **Start Gesture Mode** to activate webcam.")
         return
 
-    # Open camera
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 960)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 540)
-
-    cvFps = CvFpsCalc(buffer_len=10)
-    history_len = 16
-    point_history = deque(maxlen=history_len)
-    finger_history = deque(maxlen=history_len)
-
-    detected_text = None
-
-    while st.session_state.gesture_active:
-        fps = cvFps.get()
-        ret, frame = cap.read()
-        if not ret:
-            st.warning("⚠️ Unable to access webcam.")
-            break
-
-        frame = cv2.flip(frame, 1)
-        debug = copy.deepcopy(frame)
-
-        # Process hands
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        rgb.flags.writeable = False
-        res = hands.process(rgb)
-        rgb.flags.writeable = True
-
-        detected_text = None
-
-        if res.multi_hand_landmarks:
-            for lm, handedness in zip(res.multi_hand_landmarks, res.multi_handedness):
-                brect = calc_bounding_rect(debug, lm)
-                landmark_list = calc_landmark_list(debug, lm)
-
-                pp_landmarks = pre_process_landmark(landmark_list)
-                pp_point_history = pre_process_point_history(debug, point_history)
-
-                # Classify gesture
-                sign_id = keypoint_classifier(pp_landmarks)
-
-                if sign_id == 2:  # Index finger pointing
-                    point_history.append(landmark_list[8])
-                else:
-                    point_history.append([0, 0])
-
-                # Classify motion gesture
-                fg_id = 0
-                if len(pp_point_history) == history_len * 2:
-                    fg_id = point_history_classifier(pp_point_history)
-                finger_history.append(fg_id)
-                most_common = Counter(finger_history).most_common(1)[0][0]
-
-                detected_text = keypoint_labels[sign_id]
-
-                # Draw debug info
-                debug = draw_bounding_rect(True, debug, brect)
-                debug = draw_landmarks(debug, landmark_list)
-                debug = draw_info_text(debug, brect, handedness,
-                                       keypoint_labels[sign_id],
-                                       point_history_labels[most_common])
-        else:
-            point_history.append([0, 0])
-
-        debug = draw_point_history(debug, point_history)
-        debug = draw_info(debug, fps, 0, -1)
-
-        # Show detected gesture
-        if detected_text:
-            st.markdown(f"### ✋ Detected Gesture: **{detected_text}**")
-
-        FRAME_WINDOW.image(cv2.cvtColor(debug, cv2.COLOR_BGR2RGB))
-
-        # Yield control back to Streamlit to keep UI responsive
-        if not st.session_state.gesture_active:
-            break
-
-    cap.release()
+    # Capture and inference run on their own threads; this loop only pushes
+    # the newest annotated frame to the browser, at most DISPLAY_FPS a second
+    cap, frame_shape, source_fps = open_source(GESTURE_SOURCE)
+    recognizer = GestureRecognizer()
+    pipeline = GesturePipeline(cap, recognizer.process, frame_shape, prepare=recognizer.prepare,
+                               display_fps=DISPLAY_FPS, capture_fps=source_fps)
+    shown = 0
+    try:
+        with pipeline:
+            for frame, detected_text in pipeline.display(timeout=FRAME_TIMEOUT):
+                shown += 1
+                # Show detected gesture
+                if detected_text:
+                    detected_gesture.markdown(f"### ✋ Detected Gesture: **{detected_text}**")
+
+                FRAME_WINDOW.image(frame)
+
+                # Yield control back to Streamlit to keep UI responsive
+                if not st.session_state.gesture_active:
+                    break
+    except queue.Empty:
+        pass
+    finally:
+        cap.release()
+        recognizer.close()
+
+    if not shown:
+        st.warning("⚠️ Unable to access webcam.")
     st.success("✅ Gesture mode stopped.")
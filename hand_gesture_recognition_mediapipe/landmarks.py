@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Vectorized preprocessing of MediaPipe hand landmarks.
+
+A hand is read once into a (21, 2) float32 array of pixel coordinates;
+the bounding rectangle and the classifier inputs are computed from it with
+array operations. Every function takes an optional ``out`` array so the
+per-frame loop can reuse buffers allocated before it starts. The results
+match what the list-based helpers in app.py used to produce.
+"""
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+def landmarks_to_array(landmarks, image_width, image_height, out=None):
+    """Pixel coordinates of a MediaPipe ``NormalizedLandmarkList``, shaped (21, 2)."""
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 2), np.float32)
+    # Scale and truncate in float64 as int(x * width) did; the results are
+    # whole pixels, which float32 holds exactly
+    coords = np.array([(landmark.x, landmark.y) for landmark in landmarks.landmark])
+    coords *= (image_width, image_height)
+    np.trunc(coords, out=coords)
+    # Keep points on the last row/column inside the image
+    np.minimum(coords, (image_width - 1, image_height - 1), out=out)
+    return out
+
+
+def bounding_rect(points):
+    """[x1, y1, x2, y2] as cv.boundingRect gives it: x2/y2 are one past the extreme points."""
+    x1, y1 = points.min(axis=0)
+    x2, y2 = points.max(axis=0)
+    return [int(x1), int(y1), int(x2) + 1, int(y2) + 1]
+
+
+def normalize_landmarks(points, out=None):
+    """Keypoint classifier input: offsets from the wrist, flattened and scaled into [-1, 1]."""
+    if out is None:
+        out = np.empty(NUM_LANDMARKS * 2, np.float32)
+    relative = out.reshape(NUM_LANDMARKS, 2)
+    np.subtract(points, points[0], out=relative)
+    max_value = np.abs(out).max()
+    if max_value:
+        out /= max_value
+    return out
+
+
+def normalize_point_history(point_history, image_width, image_height, out=None):
+    """Point history classifier input: offsets from the oldest point as fractions of the image size."""
+    history = np.asarray(point_history, dtype=np.float32).reshape(-1, 2)
+    if out is None:
+        out = np.empty(history.size, np.float32)
+    relative = out[:history.size].reshape(-1, 2)
+    if len(history):
+        np.subtract(history, history[0], out=relative)
+        relative /= (image_width, image_height)
+    return out[:history.size]
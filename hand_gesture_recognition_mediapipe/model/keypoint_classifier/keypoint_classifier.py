@@ -2,11 +2,12 @@
 # -*- coding: utf-8 -*-
 import os
 import numpy as np
-import tensorflow as tf
+
+from ..tflite_backend import create_backend
 
 
 class KeyPointClassifier(object):
-    def __init__(self, model_path=None, num_threads=1):
+    def __init__(self, model_path=None, num_threads=1, backend=None):
         # Build absolute path if not provided
         if model_path is None:
             base_dir = os.path.dirname(__file__)  # this folder: .../keypoint_classifier/
@@ -15,26 +16,25 @@ class KeyPointClassifier(object):
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"❌ Could not find model file at: {model_path}")
 
-        self.interpreter = tf.lite.Interpreter(
-            model_path=model_path,
-            num_threads=num_threads
-        )
-        self.interpreter.allocate_tensors()
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        # tflite_runtime / ai_edge_litert / TensorFlow / NumPy, see tflite_backend
+        self.backend = create_backend(model_path, backend, num_threads)
 
     def __call__(self, landmark_list):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([landmark_list], dtype=np.float32)
-        )
-        self.interpreter.invoke()
+        result_index, _ = self.classify_batch([landmark_list])
+
+        return result_index[0]
 
-        output_details_tensor_index = self.output_details[0]['index']
-        result = self.interpreter.get_tensor(output_details_tensor_index)
+    def classify_batch(self, landmark_lists):
+        """Classifies N hands, shaped (N, 42), in one interpreter call.
 
-        result_index = np.argmax(np.squeeze(result))
+        Returns the class ids and their scores, two arrays of length N.
+        """
+        inputs = np.asarray(landmark_lists, dtype=np.float32)
+        if len(inputs) == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        result = self.backend.run(inputs)
 
-        return result_index
+        result_index = np.argmax(result, axis=1)
+        confidence = result[np.arange(len(result)), result_index]
 
+        return result_index, confidence
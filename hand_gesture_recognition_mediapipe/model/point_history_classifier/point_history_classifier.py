@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 import os
 import numpy as np
-import tensorflow as tf
+
+from ..tflite_backend import create_backend
 
 
 class PointHistoryClassifier(object):
@@ -12,6 +13,7 @@ class PointHistoryClassifier(object):
         score_th=0.5,
         invalid_value=0,
         num_threads=1,
+        backend=None,
     ):
         # Build absolute path to the model file if not provided
         if model_path is None:
@@ -21,30 +23,30 @@ class PointHistoryClassifier(object):
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"❌ Could not find model file at: {model_path}")
 
-        self.interpreter = tf.lite.Interpreter(model_path=model_path,
-                                               num_threads=num_threads)
-        self.interpreter.allocate_tensors()
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        # tflite_runtime / ai_edge_litert / TensorFlow / NumPy, see tflite_backend
+        self.backend = create_backend(model_path, backend, num_threads)
 
         self.score_th = score_th
         self.invalid_value = invalid_value
 
     def __call__(self, point_history):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([point_history], dtype=np.float32)
-        )
-        self.interpreter.invoke()
+        result_index, _ = self.classify_batch([point_history])
 
-        output_details_tensor_index = self.output_details[0]['index']
-        result = self.interpreter.get_tensor(output_details_tensor_index)
+        return result_index[0]
 
-        result_index = np.argmax(np.squeeze(result))
+    def classify_batch(self, point_histories):
+        """Classifies N point histories, shaped (N, 32), in one interpreter call.
 
-        if np.squeeze(result)[result_index] < self.score_th:
-            result_index = self.invalid_value
+        Returns the class ids and their scores, two arrays of length N;
+        ids scoring below ``score_th`` are replaced by ``invalid_value``.
+        """
+        inputs = np.asarray(point_histories, dtype=np.float32)
+        if len(inputs) == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        result = self.backend.run(inputs)
 
-        return result_index
+        result_index = np.argmax(result, axis=1)
+        confidence = result[np.arange(len(result)), result_index]
+        result_index[confidence < self.score_th] = self.invalid_value
 
+        return result_index, confidence
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Inference backends for the bundled .tflite gesture classifiers.
+
+The classifiers only need a TFLite interpreter, so importing all of
+TensorFlow for them costs seconds and hundreds of MB for nothing.
+``create_backend`` picks the lightest runtime that is installed, in the
+order of BACKENDS: tflite_runtime, ai_edge_litert, TensorFlow, and finally
+a NumPy executor that reads the .tflite flatbuffer itself. The NumPy
+executor covers what these small dense models use (float32
+FULLY_CONNECTED, RESHAPE and activations) and runs the exact weights the
+interpreters run. Set TALKHEAL_GESTURE_BACKEND to force one of them.
+"""
+import os
+import struct
+
+import numpy as np
+
+BACKENDS = ("tflite_runtime", "ai_edge_litert", "tensorflow", "numpy")
+DEFAULT_BACKEND = os.getenv("TALKHEAL_GESTURE_BACKEND", "auto")
+
+
+def load_interpreter_class(name):
+    """The ``Interpreter`` class of an installed TFLite runtime; ImportError if it's missing."""
+    if name == "tflite_runtime":
+        from tflite_runtime.interpreter import Interpreter
+    elif name == "ai_edge_litert":
+        from ai_edge_litert.interpreter import Interpreter
+    elif name == "tensorflow":
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    else:
+        raise ValueError(f"Unknown TFLite interpreter: {name}")
+    return Interpreter
+
+
+def available_backends():
+    """Names from BACKENDS that can be used in this environment."""
+    names = []
+    for name in BACKENDS[:-1]:
+        try:
+            load_interpreter_class(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names + ["numpy"]
+
+
+def create_backend(model_path, backend=None, num_threads=1):
+    backend = backend or DEFAULT_BACKEND
+    if backend == "numpy":
+        return NumpyBackend(model_path)
+    if backend != "auto":
+        return InterpreterBackend(load_interpreter_class(backend), model_path, num_threads, name=backend)
+    for name in BACKENDS[:-1]:
+        try:
+            interpreter_class = load_interpreter_class(name)
+        except ImportError:
+            continue
+        return InterpreterBackend(interpreter_class, model_path, num_threads, name=name)
+    return NumpyBackend(model_path)
+
+
+class InterpreterBackend(object):
+    """Runs a model through a ``tf.lite.Interpreter``-compatible class.
+
+    Keeps one interpreter per batch size, so alternating between one and
+    two hands resizes and reallocates each only once.
+    """
+
+    def __init__(self, interpreter_class, model_path, num_threads=1, name="interpreter"):
+        self.name = name
+        self.interpreter_class = interpreter_class
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreter = self._create()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self._interpreters = {int(self.input_details[0]['shape'][0]): self.interpreter}
+
+    def _create(self, input_shape=None):
+        interpreter = self.interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+        if input_shape is not None:
+            interpreter.resize_tensor_input(self.input_details[0]['index'], input_shape)
+        interpreter.allocate_tensors()
+        return interpreter
+
+    def run(self, inputs):
+        """Scores for a (batch, features) float32 array, shaped (batch, classes)."""
+        interpreter = self._interpreters.get(len(inputs))
+        if interpreter is None:
+            interpreter = self._interpreters[len(inputs)] = self._create(list(inputs.shape))
+        interpreter.set_tensor(self.input_details[0]['index'], inputs)
+        interpreter.invoke()
+        return interpreter.get_tensor(self.output_details[0]['index'])
+
+
+class NumpyBackend(object):
+    """Executes a float32 dense .tflite model with NumPy."""
+
+    name = "numpy"
+
+    def __init__(self, model_path):
+        with open(model_path, "rb") as f:
+            self.model = TFLiteModel(f.read())
+        self.input_index = self.model.inputs[0]
+        self.output_index = self.model.outputs[0]
+
+    def run(self, inputs):
+        values = dict(self.model.constants)
+        values[self.input_index] = np.asarray(inputs, dtype=np.float32)
+        for op in self.model.operators:
+            args = [values[i] if i >= 0 else None for i in op["inputs"]]
+            values[op["outputs"][0]] = OPS[op["code"]](op, *args)
+        return values[self.output_index]
+
+
+# ---------- Operators ----------
+# BuiltinOperator codes from the TFLite schema
+FULLY_CONNECTED, LOGISTIC, RELU, RELU6, RESHAPE, SOFTMAX, TANH = 9, 14, 19, 21, 22, 25, 28
+
+ACTIVATIONS = {
+    0: lambda x: x,
+    1: lambda x: np.maximum(x, 0),
+    2: lambda x: np.clip(x, -1, 1),
+    3: lambda x: np.clip(x, 0, 6),
+    4: np.tanh,
+}
+
+
+def _fully_connected(op, x, weights, bias=None):
+    x = x.reshape(-1, weights.shape[1])
+    y = x @ weights.T
+    if bias is not None:
+        y += bias
+    return ACTIVATIONS[op["activation"]](y)
+
+
+def _reshape(op, x, shape=None):
+    # The target shape is either a constant input or the op's new_shape option
+    shape = shape if shape is not None else op["new_shape"]
+    shape = [len(x) if i == 0 else d for i, d in enumerate(shape)]
+    return x.reshape(shape)
+
+
+def _softmax(op, x):
+    z = (x - x.max(axis=-1, keepdims=True)) * op["beta"]
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+OPS = {
+    FULLY_CONNECTED: _fully_connected,
+    LOGISTIC: lambda op, x: 1 / (1 + np.exp(-x)),
+    RELU: lambda op, x: np.maximum(x, 0),
+    RELU6: lambda op, x: np.clip(x, 0, 6),
+    RESHAPE: _reshape,
+    SOFTMAX: _softmax,
+    TANH: lambda op, x: np.tanh(x),
+}
+
+
+# ---------- Flatbuffer reading ----------
+class _Table(object):
+    """A flatbuffer table: field offsets come from its vtable."""
+
+    def __init__(self, buf, pos):
+        self.buf = buf
+        self.pos = pos
+        vtable = pos - struct.unpack_from("<i", buf, pos)[0]
+        size = struct.unpack_from("<H", buf, vtable)[0]
+        self.fields = struct.unpack_from(f"<{(size - 4) // 2}H", buf, vtable + 4)
+
+    def _field(self, i):
+        if i < len(self.fields) and self.fields[i]:
+            return self.pos + self.fields[i]
+        return None
+
+    def scalar(self, i, fmt, default=0):
+        pos = self._field(i)
+        return default if pos is None else struct.unpack_from(fmt, self.buf, pos)[0]
+
+    def _vector(self, i):
+        pos = self._field(i)
+        if pos is None:
+            return None, 0
+        pos += struct.unpack_from("<I", self.buf, pos)[0]
+        return pos + 4, struct.unpack_from("<I", self.buf, pos)[0]
+
+    def table(self, i):
+        pos = self._field(i)
+        if pos is None:
+            return None
+        return _Table(self.buf, pos + struct.unpack_from("<I", self.buf, pos)[0])
+
+    def tables(self, i):
+        start, n = self._vector(i)
+        tables = []
+        for k in range(n):
+            pos = start + 4 * k
+            tables.append(_Table(self.buf, pos + struct.unpack_from("<I", self.buf, pos)[0]))
+        return tables
+
+    def array(self, i, dtype):
+        start, n = self._vector(i)
+        if start is None:
+            return np.zeros(0, dtype)
+        return np.frombuffer(self.buf, dtype, n, start)
+
+
+class TFLiteModel(object):
+    """The parts of a .tflite file needed to run a float32 graph."""
+
+    TENSOR_TYPES = {0: np.float32, 2: np.int32, 4: np.int64}
+
+    def __init__(self, buf):
+        if buf[4:8] != b"TFL3":
+            raise ValueError("Not a TFLite model")
+        model = _Table(buf, struct.unpack_from("<I", buf, 0)[0])
+        codes = []
+        for code in model.tables(1):
+            # Newer files keep small codes in the deprecated byte field as well
+            codes.append(max(code.scalar(0, "<b"), code.scalar(3, "<i")))
+        buffers = model.tables(4)
+        subgraph = model.tables(2)[0]
+
+        self.constants = {}
+        for index, tensor in enumerate(subgraph.tables(0)):
+            data = buffers[tensor.scalar(2, "<I")].array(0, np.uint8)
+            if not len(data):
+                continue
+            tensor_type = tensor.scalar(1, "<b")
+            if tensor_type not in self.TENSOR_TYPES:
+                raise NotImplementedError(f"Tensor type {tensor_type} is not supported by the NumPy backend")
+            shape = tensor.array(0, np.int32)
+            self.constants[index] = data.view(self.TENSOR_TYPES[tensor_type]).reshape(shape)
+
+        self.inputs = list(subgraph.array(1, np.int32))
+        self.outputs = list(subgraph.array(2, np.int32))
+        self.operators = []
+        for op in subgraph.tables(3):
+            code = codes[op.scalar(0, "<I")]
+            if code not in OPS:
+                raise NotImplementedError(f"Operator {code} is not supported by the NumPy backend")
+            options = op.table(4)
+            self.operators.append({
+                "code": code,
+                "inputs": list(op.array(1, np.int32)),
+                "outputs": list(op.array(2, np.int32)),
+                # FullyConnectedOptions.fused_activation_function
+                "activation": options.scalar(0, "<b") if code == FULLY_CONNECTED and options else 0,
+                # SoftmaxOptions.beta
+                "beta": options.scalar(0, "<f", 1.0) if code == SOFTMAX and options else 1.0,
+                # ReshapeOptions.new_shape
+                "new_shape": list(options.array(0, np.int32)) if code == RESHAPE and options else None,
+            })
@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Threaded capture -> inference -> display pipeline for gesture mode.
+
+A capture thread reads frames into FrameRing buffers, an inference thread
+runs the recognizer on them and draws its overlay in place, and the caller
+consumes the results through ``display()`` at a capped rate. The stages
+hand frames over through one-slot queues that, by default, drop the stale
+frame when the next one arrives, so a slow stage never makes another wait:
+pushing a frame to the browser no longer limits inference, and inference
+always works on the newest frame. With ``drop_stale=False`` every frame is
+kept and a slow stage blocks its producer instead, which is what a
+recorded video needs for a reproducible run. ``metrics()`` reports per
+stage frames, drops, FPS, busy time and time spent waiting for input.
+
+    python -m hand_gesture_recognition_mediapipe.pipeline recording.mp4
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+
+from hand_gesture_recognition_mediapipe.utils import CvFpsCalc, FrameRing
+
+# capture + its queue + inference + its queue + display, each holding one frame
+RING_SIZE = 5
+DISPLAY_FPS = 15
+
+
+class LatestFrameQueue(object):
+    """A bounded hand-off between two stages; see the module docstring for ``drop_stale``."""
+
+    def __init__(self, maxsize=1, drop_stale=True):
+        self.maxsize = maxsize
+        self.drop_stale = drop_stale
+        self._items = []
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item, timeout=None):
+        """Queues ``item``. Returns the item it displaced, if any, so its buffer can be reused;
+        returns ``item`` itself if the queue is closed."""
+        with self._cond:
+            dropped = None
+            if self._closed:
+                return item
+            if len(self._items) >= self.maxsize:
+                if self.drop_stale:
+                    dropped = self._items.pop(0)
+                elif not self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed, timeout):
+                    raise queue.Full
+            if self._closed:
+                return item
+            self._items.append(item)
+            self._cond.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        """The oldest item; None once the queue is closed and empty. Raises queue.Empty on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                raise queue.Empty
+            if not self._items:
+                return None
+            item = self._items.pop(0)
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        """Wakes everyone; items already queued can still be taken."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class StageStats(object):
+    """Counters one stage updates and any thread can read."""
+
+    def __init__(self, frame_ring=None):
+        self.frames = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+        self._fps = CvFpsCalc(buffer_len=30, frame_ring=frame_ring)
+        self._lock = threading.Lock()
+
+    def record(self, busy, waiting):
+        with self._lock:
+            self.frames += 1
+            self.busy += busy
+            self.waiting += waiting
+            return self._fps.get()
+
+    def drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def snapshot(self):
+        with self._lock:
+            frames = max(self.frames, 1)
+            metrics = self._fps.metrics()
+            metrics.update({
+                "frames": self.frames,
+                "dropped": self.dropped,
+                "busy_ms": round(self.busy / frames * 1000, 2),
+                "wait_ms": round(self.waiting / frames * 1000, 2),
+                # Share of its time the stage spent working rather than waiting for input
+                "utilization": round(self.busy / (self.busy + self.waiting), 3) if self.busy + self.waiting else 0.0,
+            })
+            return metrics
+
+
+class GesturePipeline(object):
+    """Runs ``process(frame)`` on frames read from ``source`` on background threads.
+
+    ``source`` is anything with cv.VideoCapture's ``read(image)``. ``prepare``
+    is applied to each frame on the capture thread (mirroring, colour
+    conversion); ``process`` runs on the inference thread and may draw into
+    the frame. ``capture_fps`` paces reading, for playing a recorded video
+    as if it were a camera.
+    """
+
+    def __init__(self, source, process, frame_shape, prepare=None, drop_stale=True,
+                 display_fps=DISPLAY_FPS, capture_fps=None, ring_size=RING_SIZE):
+        self.source = source
+        self.process = process
+        self.prepare = prepare
+        self.display_fps = display_fps
+        self.capture_fps = capture_fps
+        self.frames = FrameRing(ring_size, frame_shape)
+        self.stats = {
+            "capture": StageStats(self.frames),
+            "inference": StageStats(),
+            "display": StageStats(),
+        }
+        self._free = queue.Queue()
+        for _ in range(ring_size):
+            self._free.put(self.frames.next())
+        self._captured = LatestFrameQueue(drop_stale=drop_stale)
+        self._processed = LatestFrameQueue(drop_stale=drop_stale)
+        self._stop = threading.Event()
+        self._threads = []
+        self.error = None
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        stages = (("capture", self._capture_loop, self._captured),
+                  ("inference", self._inference_loop, self._processed))
+        for name, target, output in stages:
+            thread = threading.Thread(target=self._guard, args=(target, output), daemon=True,
+                                      name=f"gesture-{name}")
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._captured.close()
+        self._processed.close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _guard(self, target, output):
+        try:
+            target()
+        except Exception as e:
+            self.error = e
+        finally:
+            # Let the downstream stage finish what is queued, then end
+            output.close()
+
+    def _acquire(self):
+        while not self._stop.is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _release(self, item):
+        if item is not None:
+            self._free.put(item[0])
+
+    def _hand_over(self, output, item, stats):
+        """Queues ``item`` for the next stage. Returns False once the pipeline is closing."""
+        dropped = output.put(item)
+        if dropped is item:
+            self._release(item)
+            return False
+        if dropped is not None:
+            stats.drop()
+            self._release(dropped)
+        return True
+
+    # ---------- Stages ----------
+    def _capture_loop(self):
+        stats = self.stats["capture"]
+        interval = 1.0 / self.capture_fps if self.capture_fps else 0
+        next_read = time.perf_counter()
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            slot = self._acquire()
+            if slot is None:
+                return
+            if interval:
+                time.sleep(max(0.0, next_read - time.perf_counter()))
+                next_read = max(next_read + interval, time.perf_counter() - interval)
+            waited = time.perf_counter() - started
+
+            ret, frame = self.source.read(slot["frame"])
+            if not ret:
+                self._free.put(slot)
+                return
+            frame = self.frames.adopt(slot, "frame", frame)
+            if self.prepare is not None:
+                frame = self.prepare(frame)
+            stats.record(time.perf_counter() - started - waited, waited)
+            if not self._hand_over(self._captured, (slot, frame), stats):
+                return
+
+    def _inference_loop(self):
+        stats = self.stats["inference"]
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            item = self._captured.get()
+            if item is None:
+                return
+            waited = time.perf_counter() - started
+            slot, frame = item
+            result = self.process(frame)
+            stats.record(time.perf_counter() - started - waited, waited)
+            if not self._hand_over(self._processed, (slot, frame, result), stats):
+                return
+
+    def display(self, timeout=None):
+        """Yields ``(frame, result)`` on the calling thread, at most ``display_fps`` times a second.
+
+        A frame stays valid until the next one is requested. Stops when the
+        source runs out, or raises queue.Empty after ``timeout`` seconds
+        without a frame.
+        """
+        stats = self.stats["display"]
+        interval = 1.0 / self.display_fps if self.display_fps else 0
+        next_push = time.perf_counter()
+        shown = None
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                if interval:
+                    time.sleep(max(0.0, next_push - started))
+                    next_push = max(next_push + interval, time.perf_counter() - interval)
+                item = self._processed.get(timeout)
+                self._release(shown)
+                shown = item
+                if item is None:
+                    break
+                waited = time.perf_counter() - started
+                yield item[1], item[2]
+                stats.record(time.perf_counter() - started - waited, waited)
+        finally:
+            self._release(shown)
+        if self.error is not None:
+            raise self.error
+
+    def metrics(self):
+        metrics = {name: stats.snapshot() for name, stats in self.stats.items()}
+        metrics["capture"]["queued"] = len(self._captured)
+        metrics["inference"]["queued"] = len(self._processed)
+        return metrics
+
+
+def main():
+    from hand_gesture_recognition_mediapipe.recognizer import GestureRecognizer, open_source
+
+    parser = argparse.ArgumentParser(description="Run gesture recognition on a camera or video without the UI.")
+    parser.add_argument("source", nargs="?", default="0", help="camera index or video file")
+    parser.add_argument("--lossless", action="store_true", help="process every frame instead of the newest")
+    parser.add_argument("--display-fps", type=float, default=DISPLAY_FPS)
+    args = parser.parse_args()
+
+    cap, frame_shape, source_fps = open_source(args.source)
+    recognizer = GestureRecognizer()
+    detections = {}
+    pipeline = GesturePipeline(cap, recognizer.process, frame_shape, prepare=recognizer.prepare,
+                               drop_stale=not args.lossless,
+                               display_fps=0 if args.lossless else args.display_fps,
+                               capture_fps=None if args.lossless else source_fps)
+    try:
+        with pipeline:
+            for _, detected in pipeline.display():
+                if detected:
+                    detections[detected] = detections.get(detected, 0) + 1
+    finally:
+        cap.release()
+        recognizer.close()
+    print(json.dumps({"detections": detections, "stages": pipeline.metrics()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
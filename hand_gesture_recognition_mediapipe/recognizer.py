@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import csv
+import os
+from collections import Counter, deque
+
+import cv2 as cv
+import mediapipe as mp
+import numpy as np
+
+from hand_gesture_recognition_mediapipe.model import KeyPointClassifier, PointHistoryClassifier
+from hand_gesture_recognition_mediapipe.utils import CvFpsCalc
+from hand_gesture_recognition_mediapipe.landmarks import (
+    NUM_LANDMARKS,
+    bounding_rect,
+    landmarks_to_array,
+    normalize_landmarks,
+    normalize_point_history,
+)
+from hand_gesture_recognition_mediapipe.app import (
+    draw_landmarks,
+    draw_bounding_rect,
+    draw_info_text,
+    draw_point_history,
+    draw_info,
+)
+
+HISTORY_LENGTH = 16
+
+# Load labels
+base_dir = os.path.dirname(__file__)
+with open(os.path.join(base_dir, "model/keypoint_classifier/keypoint_classifier_label.csv"), encoding="utf-8-sig") as f:
+    keypoint_labels = [row[1] for row in csv.reader(f)]
+with open(os.path.join(base_dir, "model/point_history_classifier/point_history_classifier_label.csv"), encoding="utf-8-sig") as f:
+    point_history_labels = [row[0] for row in csv.reader(f)]
+
+
+def open_source(source, width=960, height=540):
+    """Opens a camera index or a video file.
+
+    Returns the capture, the frame shape and, for a file, the rate to play
+    it back at (None for a camera, which paces itself).
+    """
+    is_camera = str(source).isdigit()
+    cap = cv.VideoCapture(int(source) if is_camera else source)
+    if is_camera:
+        cap.set(cv.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv.CAP_PROP_FRAME_HEIGHT, height)
+    frame_shape = (int(cap.get(cv.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv.CAP_PROP_FRAME_WIDTH)), 3)
+    source_fps = None if is_camera else (cap.get(cv.CAP_PROP_FPS) or 30.0)
+    return cap, frame_shape, source_fps
+
+
+class GestureRecognizer(object):
+    """Hand detection, both classifiers and the overlay for one stream of frames.
+
+    Keeps per-stream state (point and gesture history), so each stream
+    needs its own instance, used from one thread at a time.
+    """
+
+    def __init__(self, max_num_hands=2, min_detection_confidence=0.7, min_tracking_confidence=0.5):
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=False,
+            max_num_hands=max_num_hands,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+        self.keypoint_classifier = KeyPointClassifier()
+        self.point_history_classifier = PointHistoryClassifier()
+        self.fps = CvFpsCalc(buffer_len=10)
+        self.point_history = deque(maxlen=HISTORY_LENGTH)
+        self.finger_history = deque(maxlen=HISTORY_LENGTH)
+
+        # Per-hand buffers, reused every frame
+        self._points = np.empty((max_num_hands, NUM_LANDMARKS, 2), np.float32)
+        self._landmark_features = np.empty((max_num_hands, NUM_LANDMARKS * 2), np.float32)
+        self._history_features = np.empty((max_num_hands, HISTORY_LENGTH * 2), np.float32)
+
+    @staticmethod
+    def prepare(frame):
+        """Mirrors a BGR camera frame and converts it to RGB, in place."""
+        cv.flip(frame, 1, dst=frame)
+        cv.cvtColor(frame, cv.COLOR_BGR2RGB, dst=frame)
+        return frame
+
+    def process(self, frame):
+        """Classifies the hands in an RGB frame and draws the overlay into it.
+
+        Returns the label of the last hand sign seen, or None. The overlay
+        colours read the same in RGB and BGR.
+        """
+        fps = self.fps.get()
+        frame.flags.writeable = False
+        res = self.hands.process(frame)
+        frame.flags.writeable = True
+
+        detected_text = None
+        if res.multi_hand_landmarks:
+            height, width = frame.shape[:2]
+            hands = list(zip(res.multi_hand_landmarks, res.multi_handedness))
+            count = len(hands)
+            points = self._points[:count]
+            for i, (lm, _) in enumerate(hands):
+                landmarks_to_array(lm, width, height, out=points[i])
+                normalize_landmarks(points[i], out=self._landmark_features[i])
+
+            # Classify every hand's sign in one call
+            sign_ids, _ = self.keypoint_classifier.classify_batch(self._landmark_features[:count])
+
+            # Each hand's point history includes the points the hands before it added
+            landmark_lists = points.astype(np.int32).tolist()
+            history_full = np.zeros(count, bool)
+            for i, sign_id in enumerate(sign_ids):
+                pp_point_history = normalize_point_history(self.point_history, width, height,
+                                                           out=self._history_features[i])
+                history_full[i] = len(pp_point_history) == HISTORY_LENGTH * 2
+
+                if sign_id == 2:  # Index finger pointing
+                    self.point_history.append(landmark_lists[i][8])
+                else:
+                    self.point_history.append([0, 0])
+
+            # Classify motion gestures, again in one call
+            fg_ids = np.zeros(count, np.int64)
+            if history_full.any():
+                fg_ids[history_full], _ = self.point_history_classifier.classify_batch(
+                    self._history_features[:count][history_full])
+
+            for i, (_, handedness) in enumerate(hands):
+                self.finger_history.append(fg_ids[i])
+                most_common = Counter(self.finger_history).most_common(1)[0][0]
+
+                detected_text = keypoint_labels[sign_ids[i]]
+
+                # Draw debug info
+                brect = bounding_rect(points[i])
+                draw_bounding_rect(True, frame, brect)
+                draw_landmarks(frame, landmark_lists[i])
+                draw_info_text(frame, brect, handedness,
+                               keypoint_labels[sign_ids[i]],
+                               point_history_labels[most_common])
+        else:
+            self.point_history.append([0, 0])
+
+        draw_point_history(frame, self.point_history)
+        draw_info(frame, fps, 0, -1)
+        return detected_text
+
+    def close(self):
+        self.hands.close()
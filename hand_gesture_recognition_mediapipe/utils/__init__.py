@@ -1 +1,2 @@
-from .cvfpscalc import CvFpsCalc
\ No newline at end of file
+from .cvfpscalc import CvFpsCalc
+from .frame_ring import FrameRing
@@ -1,21 +1,42 @@
+import time
 from collections import deque
-import cv2 as cv
 
 
 class CvFpsCalc(object):
-    def __init__(self, buffer_len=1):
-        self._start_tick = cv.getTickCount()
-        self._freq = 1000.0 / cv.getTickFrequency()
+    def __init__(self, buffer_len=1, frame_ring=None):
+        self._start_tick = time.perf_counter()
         self._difftimes = deque(maxlen=buffer_len)
+        # Frame buffer allocations per frame, when frames come from a FrameRing
+        self._frame_ring = frame_ring
+        self._allocations = frame_ring.allocations if frame_ring is not None else 0
+        self._allocation_counts = deque(maxlen=buffer_len)
+        self.frames = 0
 
     def get(self):
-        current_tick = cv.getTickCount()
-        different_time = (current_tick - self._start_tick) * self._freq
+        current_tick = time.perf_counter()
+        different_time = (current_tick - self._start_tick) * 1000.0
         self._start_tick = current_tick
 
         self._difftimes.append(different_time)
+        self.frames += 1
+        if self._frame_ring is not None:
+            allocations = self._frame_ring.allocations
+            self._allocation_counts.append(allocations - self._allocations)
+            self._allocations = allocations
 
         fps = 1000.0 / (sum(self._difftimes) / len(self._difftimes))
         fps_rounded = round(fps, 2)
 
         return fps_rounded
+
+    def metrics(self):
+        """FPS and allocation figures averaged over the last ``buffer_len`` frames."""
+        frame_ms = sum(self._difftimes) / len(self._difftimes) if self._difftimes else 0.0
+        counts = self._allocation_counts
+        return {
+            "fps": round(1000.0 / frame_ms, 2) if frame_ms else 0.0,
+            "frame_ms": round(frame_ms, 2),
+            "frames": self.frames,
+            "allocations": self._frame_ring.allocations if self._frame_ring is not None else 0,
+            "allocations_per_frame": sum(counts) / len(counts) if counts else 0.0,
+        }
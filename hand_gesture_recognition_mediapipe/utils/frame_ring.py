@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class FrameRing(object):
+    """A fixed set of reusable frame buffers handed out round-robin.
+
+    Each slot is a dict of named uint8 images of one shape, e.g.
+    ``{"frame": ...}``. Capture writes into a slot's buffers and overlays
+    are drawn into them in place, so once the ring is allocated a frame
+    costs no new arrays. ``allocations`` counts every array the ring has
+    created, which lets CvFpsCalc report allocations per frame.
+    """
+
+    def __init__(self, size, shape, names=("frame",)):
+        self.size = size
+        self.names = tuple(names)
+        self.shape = None
+        self.allocations = 0
+        self._slots = [dict() for _ in range(size)]
+        self._next = 0
+        self.reshape(shape)
+
+    def reshape(self, shape):
+        """Reallocates every buffer for frames of ``shape``; a no-op if it already matches."""
+        shape = tuple(shape)
+        if shape == self.shape:
+            return
+        self.shape = shape
+        for slot in self._slots:
+            for name in self.names:
+                slot[name] = np.zeros(shape, np.uint8)
+                self.allocations += 1
+
+    def next(self):
+        """The next slot; its buffers still hold the frame from ``size`` calls ago."""
+        slot = self._slots[self._next]
+        self._next = (self._next + 1) % self.size
+        return slot
+
+    def adopt(self, slot, name, image):
+        """Keeps ``image`` as ``slot[name]`` when a writer returned a new array instead of filling ours.
+
+        cv.VideoCapture.read(image) does that when the camera delivers a
+        different frame size; the rest of the ring is resized to match.
+        """
+        if image is slot[name]:
+            return image
+        self.allocations += 1
+        self.reshape(image.shape)
+        slot[name] = image
+        return image
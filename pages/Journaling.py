@@ -1,8 +1,8 @@
 import streamlit as st
-import sqlite3
 import datetime
 import base64
 from uuid import uuid4
+from core.db import get_database
 
 def get_base64_of_bin_file(bin_file_path):
     with open(bin_file_path, 'rb') as f:
@@ -49,37 +49,14 @@ def analyze_sentiment(entry: str) -> str:
         return "Positive"
     return "Neutral"
 
-DB_PATH = "journals.db"
-
-def init_journal_db():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS journal_entries (
-        id TEXT PRIMARY KEY,
-        email TEXT,
-        entry TEXT,
-        sentiment TEXT,
-        date TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
-
 def save_entry(email, entry, sentiment):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-    INSERT INTO journal_entries (id, email, entry, sentiment, date)
-    VALUES (?, ?, ?, ?, ?)
-    """, (str(uuid4()), email, entry, sentiment, str(datetime.date.today())))
-    conn.commit()
-    conn.close()
+    with get_database("journals").transaction() as conn:
+        conn.execute("""
+        INSERT INTO journal_entries (id, email, entry, sentiment, date)
+        VALUES (?, ?, ?, ?, ?)
+        """, (str(uuid4()), email, entry, sentiment, str(datetime.date.today())))
 
 def fetch_entries(email, sentiment_filter=None, start_date=None, end_date=None):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
     query = """
         SELECT entry, sentiment, date FROM journal_entries
         WHERE email = ?
@@ -94,9 +71,7 @@ def fetch_entries(email, sentiment_filter=None, start_date=None, end_date=None):
         query += " AND date BETWEEN ? AND ?"
         params.extend([start_date, end_date])
 
-    rows = cursor.execute(query, params).fetchall()
-    conn.close()
-    return rows
+    return get_database("journals").query_all(query, params)
 
 def journaling_app():
     set_background("static_files/mint.png")  # Use your background image path or comment this line
@@ -169,5 +144,4 @@ def journaling_app():
             with st.expander(f"{date} - Mood: {sentiment}"):
                 st.write(entry)
 
-init_journal_db()
 journaling_app()
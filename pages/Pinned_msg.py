@@ -2,7 +2,8 @@
 import streamlit as st
 from datetime import datetime
 import base64
-from components.chat_interface import toggle_pin_message, inject_custom_css
+from components.chat_interface import unpin_message, inject_custom_css
+from core.utils import clear_pinned_messages, load_pinned_messages
 
 
 def set_background(image_path):
@@ -60,7 +61,7 @@ def render_pinned_messages_page():
 
     # Initialize pinned messages if not exists
     if "pinned_messages" not in st.session_state:
-        st.session_state.pinned_messages = []
+        st.session_state.pinned_messages = load_pinned_messages()
 
     if not st.session_state.pinned_messages:
         st.markdown("""
@@ -74,8 +75,8 @@ def render_pinned_messages_page():
 
     # Stats section
     total_pinned = len(st.session_state.pinned_messages)
-    user_pins = len([msg for msg in st.session_state.pinned_messages if msg.get("sender") == "user"])
-    bot_pins = len([msg for msg in st.session_state.pinned_messages if msg.get("sender") == "bot"])
+    user_pins = len([msg for msg in st.session_state.pinned_messages.values() if msg.get("sender") == "user"])
+    bot_pins = len([msg for msg in st.session_state.pinned_messages.values() if msg.get("sender") == "bot"])
 
     st.markdown(f"""
     <div style="background-color: rgba(255,255,255,0.2); padding: 15px; border-radius: 10px; margin-bottom: 20px;">
@@ -100,7 +101,7 @@ def render_pinned_messages_page():
         )
 
     # Apply filters
-    filtered_messages = st.session_state.pinned_messages.copy()
+    filtered_messages = list(st.session_state.pinned_messages.values())
 
     if filter_sender == "My Messages":
         filtered_messages = [msg for msg in filtered_messages if msg.get("sender") == "user"]
@@ -120,7 +121,8 @@ def render_pinned_messages_page():
     # Clear all button
     if st.button("🗑️ Clear All Pinned Messages", type="secondary"):
         if st.session_state.get("confirm_clear_pins", False):
-            st.session_state.pinned_messages = []
+            st.session_state.pinned_messages = {}
+            clear_pinned_messages()
             st.session_state.confirm_clear_pins = False
             st.success("All pinned messages cleared!")
             st.rerun()
@@ -153,7 +155,7 @@ def render_pinned_messages_page():
 
         # Unpin button
         if st.button("❌ Unpin", key=f"unpin_{i}"):
-            st.session_state.pinned_messages.remove(msg)
+            unpin_message(msg)
             st.rerun()
 
     st.markdown('</div>', unsafe_allow_html=True)
@@ -8,7 +8,12 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.exceptions import OutputParserException
 from typing import List
+from core.response_cache import get_response_cache, make_cache_key
+from core.gemini_client import client_key, get_client_registry
+from core.llm_gateway import get_llm_gateway
+from core.utils import get_storage_owner
 
 st.set_page_config(page_title="🧘 Yoga for Mental Health", layout="centered")
 
@@ -273,7 +278,17 @@ def generate_yoga_asana_llm(mood_input: str):
         st.error("Gemini API key not found in secrets.toml. Please configure it.")
         return None
 
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0.5, google_api_key=gemini_api_key)
+    # Moods like "stressed" come up again and again; reuse the recommendation
+    cache = get_response_cache()
+    cache_key = make_cache_key(mood_input, tone="yoga", model_name="gemini-2.5-pro")
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    llm = get_client_registry().get_client(
+        client_key("langchain", "gemini-2.5-pro", gemini_api_key),
+        lambda: ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0.5, google_api_key=gemini_api_key),
+    )
     parser = JsonOutputParser(pydantic_object=YogaResponse)
 
     prompt_template = f"""
@@ -298,13 +313,20 @@ def generate_yoga_asana_llm(mood_input: str):
         HumanMessage(content=prompt_template)
     ]
     
+    # Only malformed JSON is retried here; the gateway already retries rate limits and server errors
     for _ in range(3):
         try:
-            response = llm.invoke(messages)
-            return parser.parse(response.content)
+            response = get_llm_gateway().call(lambda: llm.invoke(messages),
+                                              user=get_storage_owner(), key=cache_key,
+                                              report=get_client_registry().reporter(llm))
+            recommendation = parser.parse(response.content)
+        except OutputParserException:
+            continue
         except Exception:
-            pass
-            
+            break
+        cache.set(cache_key, recommendation)
+        return recommendation
+
     st.error("Failed to generate a valid yoga recommendation after multiple attempts. Please try again.")
     return None
 
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted conversation memory
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.context_builder import ContextBuilder, estimate_tokens
+
+
+def message(sender, text):
+    return {"sender": sender, "message": text, "time": "1:00 PM"}
+
+
+def test_window_stays_within_budget_and_keeps_newest():
+    builder = ContextBuilder(budget=50)
+    messages = []
+    for i in range(100):
+        messages.append(message("user" if i % 2 == 0 else "bot", f"message number {i} " * 3))
+        context = builder.build(7, messages)
+        assert sum(estimate_tokens(line) for line in context.split("\n")) <= 50
+    assert context.endswith("message number 99 ")
+    assert "message number 0 " not in context
+
+
+def test_current_message_is_not_repeated():
+    builder = ContextBuilder()
+    messages = [message("user", "hi"), message("bot", "hello"), message("user", "I can't sleep")]
+    assert builder.build(1, messages, end=len(messages) - 1) == "User: hi\nBot: hello"
+
+
+def test_cleared_history_rebuilds_window():
+    builder = ContextBuilder()
+    messages = [message("user", "first"), message("bot", "reply")]
+    builder.build(1, messages)
+    messages.clear()
+    messages.append(message("user", "fresh start"))
+    assert builder.build(1, messages) == "User: fresh start"
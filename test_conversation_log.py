@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the append-only conversation journal
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.conversation_log import ConversationLog
+
+
+def make_convo(convo_id, title="New Conversation", messages=None):
+    return {"id": convo_id, "title": title, "date": "January 01, 2025", "messages": messages or []}
+
+
+def test_save_appends_only_new_messages(tmp_path):
+    log = ConversationLog(str(tmp_path / "c.jsonl"))
+    conversations = log.load()
+    conversations.insert(0, make_convo(0))
+    log.save(conversations)
+
+    conversations[0]["messages"].append({"sender": "user", "message": "hi", "time": "1:00 PM"})
+    conversations[0]["title"] = "hi"
+    log.save(conversations)
+    size_before = os.path.getsize(log.path)
+
+    conversations[0]["messages"].append({"sender": "bot", "message": "hello", "time": "1:00 PM"})
+    log.save(conversations)
+
+    with open(log.path, encoding="utf-8") as f:
+        f.seek(size_before)
+        appended = [json.loads(line) for line in f]
+    assert appended == [{"op": "msg", "id": 0, "msg": {"sender": "bot", "message": "hello", "time": "1:00 PM"}}]
+    assert ConversationLog(log.path).load() == conversations
+
+
+def test_replay_keeps_order_and_deletes(tmp_path):
+    log = ConversationLog(str(tmp_path / "c.jsonl"))
+    conversations = [make_convo(1, "b"), make_convo(0, "a")]
+    log.save(conversations)
+    conversations.insert(0, make_convo(2, "c"))
+    del conversations[2]
+    log.save(conversations)
+
+    assert [c["title"] for c in ConversationLog(log.path).load()] == ["c", "b"]
+
+
+def test_compaction_and_legacy_import(tmp_path):
+    legacy = tmp_path / "c.json"
+    legacy.write_text(json.dumps([make_convo(0, "old"), make_convo(0, "dup")]), encoding="utf-8")
+    log = ConversationLog(str(tmp_path / "c.jsonl"), legacy_path=str(legacy))
+
+    conversations = log.load()
+    assert [c["id"] for c in conversations] == [0, 1]
+
+    for i in range(300):
+        conversations[0]["title"] = f"title {i}"
+        log.save(conversations)
+    with open(log.path, encoding="utf-8") as f:
+        assert len(f.readlines()) < 300
+    assert ConversationLog(log.path).load() == conversations
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite conversation repository
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.conversation_repository import ConversationRepository
+
+
+def test_set_pin_is_idempotent_and_removed_with_conversation(tmp_path):
+    repository = ConversationRepository(str(tmp_path / "c.db"))
+    owner = "someone@example.com"
+    repository.save_conversations(owner, [{"id": 0, "title": "t", "date": "d", "messages": []}])
+
+    repository.set_pin(owner, 0, "abc", "bot", "Breathe in slowly.", True)
+    repository.set_pin(owner, 0, "abc", "bot", "Breathe in slowly.", True)
+    assert [(pin["convo_id"], pin["message_key"]) for pin in repository.get_pins(owner)] == [(0, "abc")]
+
+    repository.set_pin(owner, 0, "abc", "bot", "Breathe in slowly.", False)
+    assert repository.get_pins(owner) == []
+
+    repository.set_pin(owner, 0, "abc", "bot", "Breathe in slowly.", True)
+    repository.save_conversations(owner, [])
+    assert repository.get_pins(owner) == []
+
+
+def message(i, text="hello"):
+    return {"id": f"m{i}", "sender": "user" if i % 2 == 0 else "bot", "message": f"{text} {i}", "time": "10:00 AM"}
+
+
+def test_round_trip_keeps_order_metadata_and_owners_apart(tmp_path):
+    repository = ConversationRepository(str(tmp_path / "c.db"))
+    conversations = [
+        {"id": 7, "title": "Newest", "date": "May 02, 2025", "summary": "talked about sleep",
+         "messages": [message(i) for i in range(3)]},
+        {"id": 2, "title": "Oldest", "date": "May 01, 2025", "messages": [message(0, "héllo")]},
+    ]
+    repository.save_conversations("a@example.com", conversations)
+    repository.save_conversations("b@example.com", [{"id": 7, "title": "Other", "date": "d", "messages": []}])
+
+    # A fresh instance reads only what is on disk
+    reopened = ConversationRepository(str(tmp_path / "c.db"))
+    assert reopened.load_conversations("a@example.com") == conversations
+    assert reopened.list_conversations("a@example.com") == [
+        {"id": 7, "title": "Newest", "date": "May 02, 2025", "summary": "talked about sleep", "message_count": 3},
+        {"id": 2, "title": "Oldest", "date": "May 01, 2025", "message_count": 1},
+    ]
+    assert reopened.get_messages("a@example.com", 7) == conversations[0]["messages"]
+    assert [c["title"] for c in reopened.load_conversations("b@example.com")] == ["Other"]
+
+
+def test_saves_write_only_what_changed(tmp_path):
+    repository = ConversationRepository(str(tmp_path / "c.db"))
+    owner = "someone@example.com"
+    convo = {"id": 0, "title": "t", "date": "d", "messages": [message(i) for i in range(3)]}
+    repository.save_conversations(owner, [convo])
+
+    statements = []
+    # Single-threaded, so every save borrows this same pooled connection
+    with repository.db.connection() as conn:
+        conn.set_trace_callback(statements.append)
+    convo["messages"].append(message(3))
+    repository.save_conversations(owner, [convo])
+    inserts = [s for s in statements if s.lstrip().startswith("INSERT") and "INTO messages" in s]
+    assert len(inserts) == 1 and '"m3"' in inserts[0]
+
+    # Index-only entries leave their stored messages alone
+    statements.clear()
+    repository.save_conversations(owner, [{"id": 0, "title": "renamed", "date": "d", "message_count": 4}])
+    assert not any("messages" in s for s in statements if s.startswith(("INSERT", "DELETE")))
+    assert repository.get_messages(owner, 0) == convo["messages"]
+    assert repository.list_conversations(owner)[0]["title"] == "renamed"
+
+    # Shrinking a conversation rewrites it
+    convo["messages"] = convo["messages"][:1]
+    repository.save_conversations(owner, [convo])
+    assert repository.get_messages(owner, 0) == convo["messages"]
+
+
+def test_lookups_use_the_owner_indexes(tmp_path):
+    with ConversationRepository(str(tmp_path / "c.db")).db.connection() as conn:
+        plans = [
+            conn.execute("EXPLAIN QUERY PLAN SELECT id FROM conversations "
+                         "WHERE user_email = ? ORDER BY position DESC", ("x",)).fetchall(),
+            conn.execute("EXPLAIN QUERY PLAN SELECT data FROM messages "
+                         "WHERE user_email = ? AND conversation_id = ? ORDER BY seq", ("x", 0)).fetchall(),
+        ]
+    for plan in plans:
+        # One index search, no table scan and no separate sort
+        assert [row[-1].split()[0] for row in plan] == ["SEARCH"]
+        assert "USING INDEX" in plan[0][-1]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared SQLite access layer
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from core.db import MIGRATIONS, Database
+
+
+def test_migrations_run_once_and_resume(tmp_path):
+    path = str(tmp_path / "journals.db")
+    assert Database(path, MIGRATIONS["journals"][:1]).migrate() == 1
+    assert Database(path, MIGRATIONS["journals"]).migrate() == 2
+    indexes = Database(path).query_all("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert ("idx_journal_entries_email_date",) in indexes
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    db = Database(str(tmp_path / "users.db"), MIGRATIONS["users"])
+    insert = "INSERT INTO users (name, email, password, updated_at) VALUES ('a', 'a@example.com', 'x', 'now')"
+    with db.transaction() as conn:
+        conn.execute(insert)
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.transaction() as conn:
+            conn.execute("UPDATE users SET name = 'b'")
+            conn.execute(insert)
+    assert db.query_one("SELECT name FROM users") == ("a",)
+
+
+def test_pool_is_shared_across_threads(tmp_path, monkeypatch):
+    db = Database(str(tmp_path / "users.db"), MIGRATIONS["users"], pool_size=2)
+    opened = []
+    open_connection = db._open
+    monkeypatch.setattr(db, "_open", lambda: opened.append(1) or open_connection())
+
+    # One short-lived thread per rerun, as Streamlit does
+    for _ in range(20):
+        thread = threading.Thread(target=db.query_one, args=("SELECT COUNT(*) FROM users",))
+        thread.start()
+        thread.join()
+    assert len(opened) == 1
+
+    # Concurrent use opens extra connections, but only pool_size stay open
+    barrier = threading.Barrier(4)
+
+    def hold():
+        with db.connection():
+            barrier.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 4
+    assert len(db._idle) == 2
+
+    db.close()
+    assert db._idle == []
+
+
+def test_unfinished_transactions_are_rolled_back_on_return(tmp_path):
+    db = Database(str(tmp_path / "users.db"), MIGRATIONS["users"], pool_size=1)
+    with db.connection() as conn:
+        conn.execute("INSERT INTO users (name, email, password, updated_at) VALUES ('a', 'a@x', 'x', 'now')")
+    assert db.query_one("SELECT COUNT(*) FROM users") == (0,)
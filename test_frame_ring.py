@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the reusable frame buffers and the FPS/allocation metrics
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from hand_gesture_recognition_mediapipe.utils import CvFpsCalc, FrameRing
+
+
+class FakeCapture:
+    """Writes into the buffer it is given, like cv.VideoCapture.read(image)."""
+
+    def __init__(self, shape):
+        self.shape = shape
+
+    def read(self, image=None):
+        if image is None or image.shape != self.shape:
+            image = np.empty(self.shape, np.uint8)
+        image[...] = 7
+        return True, image
+
+
+def capture_frames(cap, frames, fps, count):
+    seen = set()
+    for _ in range(count):
+        fps.get()
+        slot = frames.next()
+        _, frame = cap.read(slot["frame"])
+        frame = frames.adopt(slot, "frame", frame)
+        seen.add(id(frame))
+    return seen
+
+
+def test_steady_state_reuses_buffers():
+    frames = FrameRing(3, (540, 960, 3))
+    fps = CvFpsCalc(buffer_len=10, frame_ring=frames)
+    assert frames.allocations == 3
+
+    seen = capture_frames(FakeCapture((540, 960, 3)), frames, fps, 50)
+    assert len(seen) == 3
+    metrics = fps.metrics()
+    assert metrics["frames"] == 50
+    assert metrics["allocations"] == 3
+    assert metrics["allocations_per_frame"] == 0
+    assert metrics["fps"] > 0
+
+
+def test_camera_size_change_reallocates_once():
+    frames = FrameRing(2, (540, 960, 3), names=("frame", "rgb"))
+    fps = CvFpsCalc(buffer_len=5, frame_ring=frames)
+    capture_frames(FakeCapture((480, 640, 3)), frames, fps, 4)
+    assert frames.shape == (480, 640, 3)
+    # 4 up front, 4 on reshaping, 1 frame the camera allocated itself
+    assert frames.allocations == 9
+    assert all(slot["rgb"].shape == (480, 640, 3) for slot in (frames.next(), frames.next()))
+
+    capture_frames(FakeCapture((480, 640, 3)), frames, fps, 5)
+    assert fps.metrics()["allocations_per_frame"] == 0
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared Gemini client registry
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import google.generativeai as genai
+import pytest
+
+from core.gemini_client import GeminiClientRegistry, client_key
+from core.llm_gateway import LLMGateway
+
+
+def test_model_is_built_and_configured_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: calls.append(kwargs))
+    registry = GeminiClientRegistry(warmup=False)
+    first = registry.get_model("gemini-2.0-flash", "key-1")
+    assert registry.get_model("gemini-2.0-flash", "key-1") is first
+    assert calls == [{"api_key": "key-1"}]
+
+
+class DownModel:
+    def count_tokens(self, text):
+        raise ConnectionError("unreachable")
+
+
+def test_repeated_failures_are_shared_until_retry():
+    registry = GeminiClientRegistry(health_retry_seconds=3600, failure_threshold=3)
+    key = client_key("genai", "gemini-2.0-flash", "key-1")
+    assert registry.health(key) == (True, "")
+    # One failed warm-up doesn't take the backend down
+    assert not registry.check(key, DownModel())
+    assert registry.health(key) == (True, "")
+    registry.report(key, False, "unreachable")
+    registry.report(key, False, "unreachable")
+    assert registry.health(key) == (False, "unreachable")
+    registry.report(key, True)
+    assert registry.health(key) == (True, "")
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def test_gateway_calls_report_their_outcome(monkeypatch):
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: None)
+    registry = GeminiClientRegistry(warmup=False, failure_threshold=2)
+    model = registry.get_model("gemini-2.0-flash", "key-1")
+    key = client_key("genai", "gemini-2.0-flash", "key-1")
+    gateway = LLMGateway(max_retries=0)
+    report = registry.reporter(model)
+
+    def rate_limited():
+        raise RateLimited("quota exceeded")
+
+    def bad_request():
+        raise ValueError("blocked")
+
+    for fn in (rate_limited, bad_request, rate_limited):
+        with pytest.raises(Exception):
+            gateway.call(fn, report=report)
+    # The bad request isn't the backend's fault
+    assert registry.health(key) == (False, "quota exceeded")
+    assert list(gateway.stream(lambda: iter(["ok"]), report=report)) == ["ok"]
+    assert registry.health(key) == (True, "")
+    # Clients built elsewhere are ignored
+    registry.reporter(object())(RateLimited())
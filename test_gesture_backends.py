@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the gesture classifier inference backends
+"""
+
+import csv
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from hand_gesture_recognition_mediapipe.model import KeyPointClassifier, PointHistoryClassifier
+from hand_gesture_recognition_mediapipe.model.tflite_backend import BACKENDS, available_backends
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hand_gesture_recognition_mediapipe", "model")
+
+
+def load_rows(path, features):
+    # A few keypoint.csv rows were logged with both hands; the models take one
+    with open(path, encoding="utf-8") as f:
+        rows = np.array([row for row in csv.reader(f) if len(row) == features + 1], dtype=np.float32)
+    return rows[:, 0].astype(int), rows[:, 1:]
+
+
+@pytest.fixture(scope="module")
+def keypoints():
+    return load_rows(os.path.join(MODEL_DIR, "keypoint_classifier", "keypoint.csv"), 42)
+
+
+@pytest.fixture(scope="module")
+def point_history():
+    return load_rows(os.path.join(MODEL_DIR, "point_history_classifier", "point_history.csv"), 32)
+
+
+def test_numpy_backend_reproduces_training_labels(keypoints, point_history):
+    labels, rows = keypoints
+    scores = KeyPointClassifier(backend="numpy").backend.run(rows)
+    assert np.allclose(scores.sum(axis=1), 1, atol=1e-5)
+    assert (scores.argmax(axis=1) == labels).mean() > 0.85
+
+    labels, rows = point_history
+    scores = PointHistoryClassifier(backend="numpy").backend.run(rows)
+    assert (scores.argmax(axis=1) == labels).mean() > 0.9
+
+
+def test_classify_batch_matches_single_calls(keypoints, point_history):
+    classifier = KeyPointClassifier(backend="numpy")
+    _, rows = keypoints
+    ids, confidence = classifier.classify_batch(rows[:50])
+    assert [classifier(row) for row in rows[:50]] == list(ids)
+    assert np.allclose(confidence, classifier.backend.run(rows[:50]).max(axis=1))
+    ids, confidence = classifier.classify_batch(np.zeros((0, 42)))
+    assert ids.shape == confidence.shape == (0,)
+
+    # Low-confidence motion gestures fall back to invalid_value, as single calls do
+    _, rows = point_history
+    classifier = PointHistoryClassifier(backend="numpy", score_th=0.9, invalid_value=-1)
+    ids, confidence = classifier.classify_batch(rows[:200])
+    assert (ids[confidence < 0.9] == -1).all() and (ids[confidence >= 0.9] >= 0).all()
+    assert [classifier(row) for row in rows[:200]] == list(ids)
+
+
+@pytest.mark.parametrize("backend", BACKENDS[:-1])
+def test_interpreters_match_numpy_argmax(backend, keypoints, point_history):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} is not installed")
+    for classifier, (_, rows) in ((KeyPointClassifier, keypoints), (PointHistoryClassifier, point_history)):
+        reference = classifier(backend="numpy")
+        interpreter = classifier(backend=backend)
+        assert interpreter.backend.name == backend
+        assert np.array_equal(interpreter.backend.run(rows).argmax(axis=1), reference.backend.run(rows).argmax(axis=1))
+
+        # Single and batched calls, including the score threshold
+        expected, _ = reference.classify_batch(rows)
+        assert [interpreter(row) for row in rows[:20]] == list(expected[:20])
+        # Alternating one and two hands reuses one interpreter per batch size
+        for start in range(0, 12, 3):
+            ids, _ = interpreter.classify_batch(rows[start:start + 2])
+            assert list(ids) == list(expected[start:start + 2])
+            assert interpreter(rows[start + 2]) == expected[start + 2]
+        assert set(interpreter.backend._interpreters) == {1, 2, len(rows)}
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline gesture classifier evaluation CLI
+"""
+
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from hand_gesture_recognition_mediapipe import evaluate
+
+
+def test_chunks_stream_every_well_formed_row():
+    path = evaluate.DATASETS["keypoint"][1]
+    skipped = {}
+    chunks = list(evaluate.iter_chunks(path, 42, chunk_size=500, skipped=skipped))
+    assert all(len(labels) == len(samples) == 500 for labels, samples in chunks[:-1])
+    assert sum(len(labels) for labels, _ in chunks) == 5245
+    assert skipped["rows"] == 1
+
+
+def test_confusion_matrix_counts_pairs():
+    matrix = evaluate.confusion_matrix(np.array([0, 0, 1, 2]), np.array([0, 1, 1, 2]), 3)
+    assert matrix.tolist() == [[1, 1, 0], [0, 1, 0], [0, 0, 1]]
+
+
+def test_cli_reports_accuracy_and_throughput(capsys):
+    status = evaluate.main(["--dataset", "point_history", "--backends", "numpy", "--chunk-size", "64",
+                            "--limit", "1000", "--min-accuracy", "0.5", "--json"])
+    assert status == 0
+    result, = json.loads(capsys.readouterr().out)
+    run, = result["runs"]
+    assert run["samples"] == 1000 and run["backend"] == "numpy" and run["matches_reference"]
+    assert run["accuracy"] > 0.5
+    assert run["samples_per_sec"] > 0 and run["p99_ms"] >= run["p50_ms"]
+    assert np.array(result["confusion_matrix"]).sum() == 1000
+
+    assert evaluate.main(["--dataset", "point_history", "--backends", "numpy", "--limit", "200",
+                          "--min-accuracy", "1.01"]) == 1
+
+
+def test_every_configuration_sees_each_chunk_before_the_next_is_read(monkeypatch):
+    read = []
+    chunks = evaluate.iter_chunks
+
+    def tracked(*args, **kwargs):
+        for chunk in chunks(*args, **kwargs):
+            read.append(len(chunk[0]))
+            yield chunk
+
+    monkeypatch.setattr(evaluate, "iter_chunks", tracked)
+    calls = []
+    classify = evaluate.PointHistoryClassifier.classify_batch
+    monkeypatch.setattr(evaluate.PointHistoryClassifier, "classify_batch",
+                        lambda self, rows: calls.append(len(read)) or classify(self, rows))
+
+    first, second = evaluate.evaluate("point_history", [("numpy", 1), ("numpy", 1)], chunk_size=100, limit=250)
+    # Each chunk: one call per configuration, after an untimed warm-up whenever the batch size is new
+    assert calls == [1, 1, 1, 1, 2, 2, 3, 3, 3, 3]
+    assert first["samples"] == second["samples"] == 250
+    assert first["accuracy"] == second["accuracy"] and second["matches_reference"]
+    assert (first["confusion_matrix"] == second["confusion_matrix"]).all()
+    assert first["confusion_matrix"].sum() == 250
+
+
+def test_empty_runs_exit_with_a_message(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        evaluate.main(["--dataset", "point_history", "--backends", "numpy", "--limit", "0"])
+    assert exit_info.value.code == 2
+    assert "--limit must be at least 1" in capsys.readouterr().err
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the threaded gesture capture -> inference -> display pipeline
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from hand_gesture_recognition_mediapipe.pipeline import GesturePipeline, LatestFrameQueue
+
+SHAPE = (48, 64, 3)
+
+
+class RecordedSource:
+    """Plays numbered frames like cv.VideoCapture.read(image) over a video file."""
+
+    def __init__(self, count, fps=None):
+        self.count = count
+        self.position = 0
+        self.interval = 1.0 / fps if fps else 0
+
+    def read(self, image=None):
+        if self.position >= self.count:
+            return False, image
+        time.sleep(self.interval)
+        image[...] = self.position % 256
+        self.position += 1
+        return True, image
+
+
+def frame_number(frame):
+    return int(frame[0, 0, 0])
+
+
+def test_latest_frame_queue_drops_stale_items():
+    q = LatestFrameQueue()
+    assert q.put(1) is None
+    assert q.put(2) == 1
+    assert q.get() == 2
+    q.close()
+    assert q.put(3) == 3
+    assert q.get(timeout=0) is None
+
+
+def test_lossless_run_processes_every_frame_in_order():
+    source = RecordedSource(120)
+    pipeline = GesturePipeline(source, frame_number, SHAPE, drop_stale=False, display_fps=0)
+    with pipeline:
+        results = [(frame_number(frame), result) for frame, result in pipeline.display(timeout=5)]
+    assert results == [(i, i) for i in range(120)]
+
+    metrics = pipeline.metrics()
+    assert metrics["capture"]["frames"] == metrics["inference"]["frames"] == metrics["display"]["frames"] == 120
+    assert all(stage["dropped"] == 0 for stage in metrics.values())
+    # Buffers are only allocated up front
+    assert metrics["capture"]["allocations_per_frame"] == 0
+
+
+def test_slow_display_does_not_hold_back_inference():
+    source = RecordedSource(150, fps=300)
+    pipeline = GesturePipeline(source, frame_number, SHAPE, display_fps=20)
+    shown = []
+    with pipeline:
+        for frame, result in pipeline.display(timeout=5):
+            time.sleep(0.02)     # a slow push to the browser
+            # The buffer wasn't reused while it was on screen
+            assert frame_number(frame) == result
+            shown.append(result)
+
+    metrics = pipeline.metrics()
+    assert metrics["inference"]["frames"] > 3 * metrics["display"]["frames"]
+    assert metrics["inference"]["dropped"] > 0
+    assert shown == sorted(shown)
+    assert shown[-1] == 149
+
+
+def test_inference_errors_reach_the_display_loop():
+    def failing(frame):
+        raise RuntimeError("model crashed")
+
+    pipeline = GesturePipeline(RecordedSource(10), failing, SHAPE, display_fps=0)
+    with pytest.raises(RuntimeError, match="model crashed"):
+        with pipeline:
+            list(pipeline.display(timeout=5))
+
+
+def test_recorded_video_file(tmp_path):
+    cv = pytest.importorskip("cv2")
+    path = str(tmp_path / "hands.avi")
+    writer = cv.VideoWriter(path, cv.VideoWriter_fourcc(*"MJPG"), 30, (SHAPE[1], SHAPE[0]))
+    for i in range(30):
+        writer.write(np.full(SHAPE, i * 8, np.uint8))
+    writer.release()
+
+    cap = cv.VideoCapture(path)
+    pipeline = GesturePipeline(cap, lambda frame: float(frame.mean()), SHAPE, drop_stale=False, display_fps=0)
+    with pipeline:
+        means = [result for _, result in pipeline.display(timeout=5)]
+    cap.release()
+    assert len(means) == 30
+    assert means == sorted(means)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized hand landmark preprocessing
+"""
+
+import os
+import random
+import sys
+from collections import deque
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from hand_gesture_recognition_mediapipe.landmarks import (
+    bounding_rect, landmarks_to_array, normalize_landmarks, normalize_point_history,
+)
+
+WIDTH, HEIGHT = 960, 540
+
+
+def fake_hand(rng):
+    # MediaPipe reports points slightly outside the frame near its edges
+    return SimpleNamespace(landmark=[SimpleNamespace(x=rng.uniform(-0.05, 1.05), y=rng.uniform(-0.05, 1.05))
+                                     for _ in range(21)])
+
+
+# The list-based helpers app.py used before
+def legacy_landmark_list(hand):
+    return [[min(int(p.x * WIDTH), WIDTH - 1), min(int(p.y * HEIGHT), HEIGHT - 1)] for p in hand.landmark]
+
+
+def legacy_pre_process_landmark(landmark_list):
+    flat = [v - base for point in landmark_list for v, base in zip(point, landmark_list[0])]
+    max_value = max(map(abs, flat))
+    return [v / max_value for v in flat]
+
+
+def legacy_pre_process_point_history(history):
+    base = history[0]
+    return [v for x, y in history for v in ((x - base[0]) / WIDTH, (y - base[1]) / HEIGHT)]
+
+
+def test_matches_list_based_preprocessing():
+    rng = random.Random(7)
+    points = np.empty((21, 2), np.float32)
+    features = np.empty(42, np.float32)
+    for _ in range(200):
+        hand = fake_hand(rng)
+        landmark_list = legacy_landmark_list(hand)
+
+        assert landmarks_to_array(hand, WIDTH, HEIGHT, out=points) is points
+        assert points.astype(int).tolist() == landmark_list
+
+        xs, ys = zip(*landmark_list)
+        assert bounding_rect(points) == [min(xs), min(ys), max(xs) + 1, max(ys) + 1]
+
+        expected = np.array(legacy_pre_process_landmark(landmark_list), np.float32)
+        assert np.allclose(normalize_landmarks(points, out=features), expected, rtol=1e-6, atol=1e-7)
+
+
+def test_point_history_features():
+    rng = random.Random(3)
+    history = deque(([rng.randrange(WIDTH), rng.randrange(HEIGHT)] for _ in range(16)), maxlen=16)
+    out = np.empty(32, np.float32)
+    features = normalize_point_history(history, WIDTH, HEIGHT, out=out)
+    assert features.shape == (32,)
+    assert np.allclose(features, legacy_pre_process_point_history(list(history)), atol=1e-7)
+
+    # A history that hasn't filled up yet gives a shorter input
+    assert normalize_point_history(list(history)[:3], WIDTH, HEIGHT, out=out).shape == (6,)
+    assert normalize_point_history([], WIDTH, HEIGHT).shape == (0,)
+
+
+def test_still_hand_does_not_divide_by_zero():
+    points = np.full((21, 2), 100, np.float32)
+    assert not normalize_landmarks(points).any()
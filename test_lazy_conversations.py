@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the lazy conversation index, on-demand hydration and LRU eviction
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+import streamlit as st
+
+import core.utils as utils
+from core.conversation_repository import ConversationRepository
+
+OWNER = "someone@example.com"
+
+
+def make_conversation(cid, count, size=100):
+    return {"id": cid, "title": f"Chat {cid}", "date": "May 01, 2025",
+            "messages": [{"id": f"{cid}-{i}", "sender": "user", "message": "x" * size, "time": "10:00 AM"}
+                         for i in range(count)]}
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    repository = ConversationRepository(str(tmp_path / "conversations.db"))
+    monkeypatch.setattr(utils, "get_conversation_repository", lambda: repository)
+    monkeypatch.setattr(utils, "CONVERSATION_STORE", "sqlite")
+    monkeypatch.setattr(utils, "LAZY_CONVERSATIONS", True)
+    # Room for about two inactive conversations of three 100-character messages
+    monkeypatch.setattr(utils, "CONVERSATION_CACHE_BUDGET", 1000)
+    repository.save_conversations(OWNER, [make_conversation(cid, 3) for cid in range(4, -1, -1)])
+    st.session_state.user_email = OWNER
+    st.session_state.conversations = utils.load_conversation_index()
+    st.session_state.active_conversation = -1
+    yield repository
+    for key in ("user_email", "conversations", "active_conversation", "hydrated_conversations"):
+        st.session_state.pop(key, None)
+
+
+def activate(cid):
+    st.session_state.active_conversation = [c["id"] for c in st.session_state.conversations].index(cid)
+    return utils.get_active_conversation()
+
+
+def hydrated_ids():
+    return {convo["id"] for convo in st.session_state.conversations if "messages" in convo}
+
+
+def test_index_has_no_messages_until_activated(session):
+    conversations = st.session_state.conversations
+    assert [convo["id"] for convo in conversations] == [4, 3, 2, 1, 0]
+    assert all("messages" not in convo and utils.get_message_count(convo) == 3 for convo in conversations)
+
+    convo = activate(2)
+    assert [msg["id"] for msg in convo["messages"]] == ["2-0", "2-1", "2-2"]
+    assert hydrated_ids() == {2}
+
+
+def test_budget_evicts_least_recently_used(session):
+    for cid in (0, 1, 2, 3):
+        activate(cid)
+    # 0 was used longest ago and no longer fits next to 1 and 2
+    assert hydrated_ids() == {1, 2, 3}
+    assert st.session_state.hydrated_conversations == [1, 2, 3]
+
+    # Coming back to 1 makes 2 the least recently used one
+    activate(1)
+    activate(4)
+    assert hydrated_ids() == {1, 3, 4}
+
+    evicted = next(convo for convo in st.session_state.conversations if convo["id"] == 2)
+    assert evicted["message_count"] == 3
+
+
+def test_evicted_conversation_rehydrates_unchanged(session):
+    first = [dict(msg) for msg in activate(0)["messages"]]
+    for cid in (1, 2, 3):
+        activate(cid)
+    assert 0 not in hydrated_ids()
+    assert activate(0)["messages"] == first
+    assert 0 in hydrated_ids()
+
+
+def test_new_conversation_with_lazy_index(session, monkeypatch):
+    monkeypatch.setattr(utils, "get_current_time", lambda: "10:00 AM")
+    activate(1)
+    assert utils.create_new_conversation("I can't sleep") == 0
+
+    convo = utils.get_active_conversation()
+    assert convo["id"] == 5
+    assert [msg["message"] for msg in convo["messages"]] == ["I can't sleep"]
+
+    # Saving the mixed list kept the other conversations' messages in the database
+    stored = session.load_conversations(OWNER)
+    assert [c["id"] for c in stored] == [5, 4, 3, 2, 1, 0]
+    assert all(len(c["messages"]) == 3 for c in stored[1:])
+    assert [c["id"] for c in utils.load_conversation_index()] == [5, 4, 3, 2, 1, 0]
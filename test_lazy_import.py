@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for deferred imports of heavy optional libraries
+"""
+
+import os
+import subprocess
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from core.lazy_import import is_loaded, lazy_function, lazy_import
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def heavy_module(tmp_path, monkeypatch):
+    (tmp_path / "heavy_for_test.py").write_text(
+        "import builtins, time\n"
+        "builtins.heavy_imports = getattr(builtins, 'heavy_imports', 0) + 1\n"
+        "time.sleep(0.05)\n"
+        "VALUE = 42\n"
+        "def double(x):\n"
+        "    return 2 * x\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    import builtins
+    builtins.heavy_imports = 0
+    yield builtins
+    sys.modules.pop("heavy_for_test", None)
+    del builtins.heavy_imports
+
+
+def test_module_is_imported_on_first_attribute_access(heavy_module):
+    module = lazy_import("heavy_for_test")
+    assert heavy_module.heavy_imports == 0
+    assert not is_loaded(module) and "not loaded" in repr(module)
+    assert module.VALUE == 42
+    assert module.double(4) == 8
+    assert heavy_module.heavy_imports == 1
+    assert is_loaded(module) and is_loaded(os)
+
+
+def test_concurrent_first_use_imports_once(heavy_module):
+    module = lazy_import("heavy_for_test")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(module.VALUE)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [42] * 8
+    assert heavy_module.heavy_imports == 1
+
+
+def test_lazy_function_imports_when_called(heavy_module):
+    double = lazy_function("heavy_for_test", "double")
+    assert double.__name__ == "double"
+    assert heavy_module.heavy_imports == 0
+    assert double(21) == 42
+    assert heavy_module.heavy_imports == 1
+
+
+def test_missing_module_fails_on_use_not_on_declaration():
+    module = lazy_import("no_such_module_for_test")
+    with pytest.raises(ImportError):
+        module.anything
+
+
+def test_feature_modules_defer_their_heavy_imports():
+    code = ("import sys, components.mood_dashboard, components.focus_session\n"
+            "print(','.join(m for m in ('pandas', 'plotly.express', 'pygame') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
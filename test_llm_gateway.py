@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM gateway
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from core.llm_gateway import LLMGateway
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def test_identical_requests_share_one_call():
+    gateway = LLMGateway()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        time.sleep(0.2)
+        return "reply"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gateway.call(slow_call, key="same")))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["reply"] * 5
+    assert len(calls) == 1
+
+
+def test_rate_limit_is_retried_but_other_errors_are_not():
+    gateway = LLMGateway(backoff_base=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    def invalid():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    assert gateway.call(flaky) == "ok"
+    with pytest.raises(ValueError):
+        gateway.call(invalid)
+    assert len(attempts) == 4
+
+
+def test_deadline_raises_timeout():
+    gateway = LLMGateway()
+    with pytest.raises(TimeoutError):
+        gateway.call(lambda: time.sleep(1), deadline=0.1)
+
+
+def test_waiting_users_take_turns():
+    gateway = LLMGateway(max_concurrency=1)
+    order = []
+    release = threading.Event()
+    blocker = threading.Thread(target=gateway.call, args=(release.wait,))
+    blocker.start()
+    time.sleep(0.05)
+
+    threads = []
+    for user in ["busy", "busy", "busy", "other"]:
+        thread = threading.Thread(target=gateway.call, args=(lambda user=user: order.append(user),),
+                                  kwargs={"user": user})
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    release.set()
+    for thread in threads + [blocker]:
+        thread.join()
+    assert order == ["busy", "other", "busy", "busy"]
+
+
+def test_stream_retries_before_the_first_chunk():
+    gateway = LLMGateway(backoff_base=0.01)
+    attempts = []
+
+    def open_stream():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited()
+        yield "a"
+        yield "b"
+
+    assert list(gateway.stream(open_stream)) == ["a", "b"]
+    assert len(attempts) == 3
+
+
+def test_hung_stream_times_out_and_frees_its_slot():
+    gateway = LLMGateway(max_concurrency=1)
+
+    def hung():
+        yield "a"
+        time.sleep(1)
+        yield "b"
+
+    chunks = []
+    with pytest.raises(TimeoutError):
+        for chunk in gateway.stream(hung, deadline=0.2):
+            chunks.append(chunk)
+    assert chunks == ["a"]
+    assert gateway.call(lambda: "next", deadline=0.5) == "next"
+
+
+def test_identical_streams_share_one_call():
+    gateway = LLMGateway()
+    calls = []
+
+    def slow_stream():
+        calls.append(1)
+        for word in ["one", "two", "three"]:
+            time.sleep(0.05)
+            yield word
+
+    results = []
+    threads = []
+    for _ in range(4):
+        thread = threading.Thread(target=lambda: results.append(list(gateway.stream(slow_stream, key="same"))))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.03)
+    for thread in threads:
+        thread.join()
+    assert results == [["one", "two", "three"]] * 4
+    assert len(calls) == 1
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for login throttling and the missing-email cache
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth.login_guard import LoginGuard
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_email_bucket_refills_over_time():
+    clock = FakeClock()
+    guard = LoginGuard(email_bucket=(3, 10), client_bucket=(100, 1), clock=clock)
+    assert [guard.acquire("A@example.com ", "1.2.3.4") for _ in range(3)] == [0, 0, 0]
+    assert guard.acquire("a@example.com", "5.6.7.8") == 10
+    clock.now = 10
+    assert guard.acquire("a@example.com", "5.6.7.8") == 0
+
+
+def test_client_bucket_limits_spraying_many_emails():
+    guard = LoginGuard(email_bucket=(5, 10), client_bucket=(2, 5), clock=FakeClock())
+    assert guard.acquire("one@example.com", "1.2.3.4") == 0
+    assert guard.acquire("two@example.com", "1.2.3.4") == 0
+    assert guard.acquire("three@example.com", "1.2.3.4") > 0
+    assert guard.acquire("three@example.com", "9.9.9.9") == 0
+
+
+def test_missing_email_expires_and_can_be_forgotten():
+    clock = FakeClock()
+    guard = LoginGuard(missing_ttl=60, clock=clock)
+    guard.remember_missing("new@example.com")
+    assert guard.is_missing("new@example.com")
+    assert not guard.is_missing("New@example.com")
+    clock.now = 61
+    assert not guard.is_missing("new@example.com")
+    guard.remember_missing("new@example.com")
+    guard.forget_missing("new@example.com")
+    assert not guard.is_missing("new@example.com")
+
+
+def test_unknown_clients_only_use_the_email_bucket():
+    guard = LoginGuard(email_bucket=(2, 10), client_bucket=(1, 60), clock=FakeClock())
+    assert [guard.acquire(f"user{i}@example.com", None) for i in range(5)] == [0] * 5
+    assert guard.acquire("user0@example.com", None) == 0
+    assert guard.acquire("user0@example.com", None) > 0
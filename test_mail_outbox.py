@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent mail outbox
+"""
+
+import os
+import smtplib
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth.mail_outbox import MailOutbox
+from core.db import MIGRATIONS, Database
+
+
+class FakeSMTP:
+    connections = 0
+    failures = 0
+
+    def __init__(self):
+        FakeSMTP.connections += 1
+        self.sent = []
+
+    def send_message(self, msg):
+        if FakeSMTP.failures:
+            FakeSMTP.failures -= 1
+            raise smtplib.SMTPDataError(451, "try again later")
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        pass
+
+
+def wait_for(outbox, message_id, status, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if outbox.status(message_id)[0] == status:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_messages_reuse_one_connection(tmp_path):
+    smtp = FakeSMTP()
+    outbox = MailOutbox(Database(str(tmp_path / "mail.db"), MIGRATIONS["mail"]), connect=lambda: smtp)
+    ids = [outbox.enqueue(f"user{i}@example.com", "Reset", "link") for i in range(3)]
+    assert wait_for(outbox, ids[-1], "sent")
+    assert smtp.sent == ["user0@example.com", "user1@example.com", "user2@example.com"]
+
+
+def test_failed_send_is_retried_with_backoff(tmp_path):
+    FakeSMTP.connections, FakeSMTP.failures = 0, 1
+    outbox = MailOutbox(Database(str(tmp_path / "mail.db"), MIGRATIONS["mail"]),
+                        connect=FakeSMTP, backoff_base=0.01)
+    message_id = outbox.enqueue("user@example.com", "Reset", "link")
+    assert wait_for(outbox, message_id, "sent")
+    status, attempts, last_error = outbox.status(message_id)
+    assert attempts == 2
+    assert "try again later" in last_error
+    assert FakeSMTP.connections == 2
+
+
+def test_sent_bodies_are_blanked(tmp_path):
+    db = Database(str(tmp_path / "mail.db"), MIGRATIONS["mail"])
+    outbox = MailOutbox(db, connect=FakeSMTP)
+    message_id = outbox.enqueue("user@example.com", "Reset", "https://example.com/reset?token=secret")
+    assert wait_for(outbox, message_id, "sent")
+    assert db.query_one("SELECT body FROM outbox WHERE id = ?", (message_id,)) == ("",)
+
+
+def test_worker_survives_unexpected_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr("auth.mail_outbox.ERROR_RETRY_SECONDS", 0.01)
+    outbox = MailOutbox(Database(str(tmp_path / "mail.db"), MIGRATIONS["mail"]), connect=FakeSMTP)
+    requeue = outbox._requeue_stale
+    errors = [1]
+
+    def flaky_requeue():
+        if errors:
+            errors.pop()
+            raise RuntimeError("database is locked")
+        requeue()
+
+    outbox._requeue_stale = flaky_requeue
+    message_id = outbox.enqueue("user@example.com", "Reset", "link")
+    assert wait_for(outbox, message_id, "sent")
+    assert outbox._worker.is_alive()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the memoized chat bubble HTML
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import components.message_bubbles as bubbles
+from components.message_bubbles import render_message_html
+
+USER_MSG = {"id": "u1", "sender": "user", "message": "I feel tense", "time": "09:15 AM"}
+BOT_MSG = {"id": "b1", "sender": "bot", "message": "Let's breathe together", "time": "09:16 AM"}
+
+
+def test_bubbles_are_templated_once_per_id_theme_and_font(monkeypatch):
+    monkeypatch.setattr(bubbles, "_bubble_cache", bubbles.OrderedDict())
+    first = render_message_html(USER_MSG, "Light", "Medium")
+    assert "I feel tense" in first and "09:15 AM" in first and "font-size: 15px" in first
+    # The same object comes back, not a re-templated copy
+    assert render_message_html(dict(USER_MSG), "Light", "Medium") is first
+    assert len(bubbles._bubble_cache) == 1
+
+    assert "font-size: 17px" in render_message_html(USER_MSG, "Light", "Large")
+    light = render_message_html(BOT_MSG, "Light", "Medium")
+    dark = render_message_html(BOT_MSG, "dark", "Medium")
+    assert light != dark and "rgba(45,45,58,0.92)" in dark
+    assert len(bubbles._bubble_cache) == 4
+
+
+def test_messages_without_ids_are_keyed_by_content(monkeypatch):
+    monkeypatch.setattr(bubbles, "_bubble_cache", bubbles.OrderedDict())
+    old = {"sender": "bot", "message": "Hello", "time": "08:00 AM"}
+    html = render_message_html(old, "Light", "Medium")
+    assert render_message_html(dict(old), "Light", "Medium") is html
+    assert "Hi" in render_message_html(dict(old, message="Hi"), "Light", "Medium")
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(bubbles, "_bubble_cache", bubbles.OrderedDict())
+    monkeypatch.setattr(bubbles, "BUBBLE_CACHE_SIZE", 2)
+    messages = [dict(USER_MSG, id=f"m{i}") for i in range(3)]
+    render_message_html(messages[0], "Light", "Medium")
+    render_message_html(messages[1], "Light", "Medium")
+    render_message_html(messages[0], "Light", "Medium")
+    render_message_html(messages[2], "Light", "Medium")
+    assert [key[0] for key in bubbles._bubble_cache] == ["m0", "m2"]
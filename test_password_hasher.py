@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the bcrypt hashing service
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth.password_hasher import PasswordHasher, get_rounds
+
+
+def test_pool_hashes_with_configured_cost():
+    hasher = PasswordHasher(rounds=4, workers=2)
+    try:
+        hashed = hasher.hash("s3cret")
+        assert get_rounds(hashed) == 4
+        assert hasher.verify("s3cret", hashed)
+        assert not asyncio.run(hasher.verify_async("wrong", hashed))
+    finally:
+        hasher.shutdown()
+
+
+def test_cost_change_is_detected():
+    old = PasswordHasher(rounds=4, workers=0).hash("s3cret")
+    hasher = PasswordHasher(rounds=5, workers=0)
+    assert hasher.needs_rehash(old)
+    assert hasher.verify("s3cret", old)
+    assert not hasher.needs_rehash(hasher.hash("s3cret"))
+    assert not hasher.verify("s3cret", "not a hash")
+
+
+def test_pool_works_while_other_threads_hold_locks():
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def busy():
+        # A thread that is always holding a lock, as the server's threads may be when a worker starts
+        while not stop.is_set():
+            with lock:
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=busy, daemon=True) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    hasher = PasswordHasher(rounds=4, workers=2)
+    try:
+        assert hasher._submit(os.getpid).result(timeout=30) != os.getpid()
+        hashes = [hasher.submit_hash(f"pw{i}") for i in range(4)]
+        assert all(hasher.verify(f"pw{i}", future.result(timeout=30)) for i, future in enumerate(hashes))
+        assert hasher._pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        stop.set()
+        hasher.shutdown()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for reset-token verification against cached password versions
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import auth.auth_utils as auth_utils
+import auth.jwt_utils as jwt_utils
+import auth.password_hasher as password_hasher
+import core.db as db
+from auth.jwt_utils import create_reset_token
+
+
+@pytest.fixture
+def users(tmp_path, monkeypatch):
+    monkeypatch.setitem(db._databases, "users", db.Database(str(tmp_path / "users.db"), db.MIGRATIONS["users"]))
+    monkeypatch.setattr(password_hasher, "_hasher", password_hasher.PasswordHasher(rounds=4, workers=0))
+    monkeypatch.setattr(jwt_utils, "JWT_SECRET", "test-secret-" + "x" * 32)
+    monkeypatch.setattr(auth_utils, "_user_versions", auth_utils.OrderedDict())
+    auth_utils.register_user("Sam", "sam@example.com", "first-password")
+    auth_utils.register_user("Alex", "alex@example.com", "first-password")
+
+
+def token_for(email):
+    return create_reset_token(email, auth_utils.check_user(email)[1])
+
+
+def test_stale_token_rejected_after_password_change(users):
+    token = token_for("sam@example.com")
+    assert auth_utils.verify_reset_tokens([token])[0][0]
+
+    assert auth_utils.reset_password("sam@example.com", "second-password")[0]
+    valid, payload, message = auth_utils.verify_reset_tokens([token])[0]
+    assert not valid
+    assert payload["email"] == "sam@example.com"
+    assert "no longer valid" in message
+    assert not auth_utils.verify_token_count("sam@example.com", payload["pwd_update"])[0]
+
+
+def test_bulk_verification_uses_one_query_for_misses(users, monkeypatch):
+    tokens = [token_for("sam@example.com"), token_for("alex@example.com"), "not-a-token"]
+    monkeypatch.setattr(auth_utils, "_user_versions", auth_utils.OrderedDict())
+    queries = []
+    database = db.get_database("users")
+    original = database.query_all
+    monkeypatch.setattr(database, "query_all", lambda *args: queries.append(args) or original(*args))
+
+    results = auth_utils.verify_reset_tokens(tokens)
+    assert [valid for valid, _, _ in results] == [True, True, False]
+    assert results[2][1] is None
+    assert len(queries) == 1
+
+    auth_utils.verify_reset_tokens(tokens)
+    assert len(queries) == 1
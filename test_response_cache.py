@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.response_cache import ResponseCache, make_cache_key
+
+
+def test_key_ignores_case_and_whitespace_but_not_tone():
+    key = make_cache_key("I feel  anxious\n", tone="Calm", model_name="gemini-2.0-flash")
+    assert key == make_cache_key("i feel anxious", tone="Calm", model_name="gemini-2.0-flash")
+    assert key != make_cache_key("i feel anxious", tone="Motivating", model_name="gemini-2.0-flash")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, db_path="")
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats()["misses"] == 1
+
+
+def test_disk_tier_survives_restart_and_expires(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    ResponseCache(db_path=db_path).set("k", {"asana": "Balasana"})
+    assert ResponseCache(db_path=db_path).get("k") == {"asana": "Balasana"}
+    assert ResponseCache(db_path=db_path, ttl_seconds=0).get("k") is None
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental cleaning of streamed AI replies
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import core.utils as utils
+from core.llm_gateway import LLMGateway
+from core.response_cache import ResponseCache
+from core.utils import ResponseStreamCleaner, clean_ai_response, stream_ai_response
+
+
+def clean_in_chunks(chunks):
+    cleaner = ResponseStreamCleaner()
+    return [cleaner.feed(chunk) for chunk in chunks] + [cleaner.finish()]
+
+
+def test_chunks_match_full_cleaning():
+    text = "  <p>Hello&nbsp;there</p>,\n\n you &amp; me &lt;3  <b>ok</b>  "
+    for size in range(1, 8):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert "".join(clean_in_chunks(chunks)) == clean_ai_response(text)
+
+
+def test_split_tags_and_entities_are_held_back():
+    pieces = clean_in_chunks(["I hear you <st", "rong>truly</strong> &am", "p; always"])
+    assert pieces[0] == "I hear you"
+    assert "".join(pieces) == "I hear you truly & always"
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def generate_content(self, prompt, stream=False):
+        assert stream
+        yield FakeChunk("Take a ")
+        yield FakeChunk("deep <i>breath</i>.")
+        raise ConnectionError("stream dropped")
+
+
+@pytest.fixture
+def isolated(monkeypatch):
+    """A memory-only cache and a private gateway, so nothing reaches data/ or the app's singletons."""
+    cache = ResponseCache(db_path="")
+    monkeypatch.setattr(utils, "get_response_cache", lambda: cache)
+    gateway = LLMGateway(max_retries=0)
+    monkeypatch.setattr(utils, "get_llm_gateway", lambda: gateway)
+    monkeypatch.setattr(utils, "get_storage_owner", lambda: "someone@example.com")
+    return cache
+
+
+def test_stream_keeps_partial_reply_on_error(isolated):
+    assert "".join(stream_ai_response("hi", FakeModel())) == "Take a deep breath."
+    # A reply cut short isn't cached
+    assert isolated.stats()["memory_entries"] == 0
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for signed anonymous session cookies
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.session_identity import load_session_secret, new_session_id, sign_session_id, verify_session_cookie
+
+SECRET = b"test-secret"
+
+
+def test_signed_cookie_round_trips():
+    session_id = new_session_id()
+    assert verify_session_cookie(sign_session_id(session_id, SECRET), SECRET) == session_id
+
+
+def test_tampered_or_foreign_cookies_are_rejected():
+    session_id = new_session_id()
+    cookie = sign_session_id(session_id, SECRET)
+    other_id = new_session_id()
+    assert verify_session_cookie(f"{other_id}.{cookie.rsplit('.', 1)[1]}", SECRET) is None
+    assert verify_session_cookie(cookie[:-1] + ("0" if cookie[-1] != "0" else "1"), SECRET) is None
+    assert verify_session_cookie(cookie, b"another-secret") is None
+    for value in (None, "", session_id):
+        assert verify_session_cookie(value, SECRET) is None
+
+
+def test_generated_secret_is_persisted(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESSION_SECRET", raising=False)
+    path = str(tmp_path / "data" / "session_secret")
+    first = load_session_secret(path)
+    assert len(first) == 64
+    assert load_session_secret(path) == first
+    assert os.stat(path).st_mode & 0o077 == 0
+    assert os.listdir(tmp_path / "data") == ["session_secret"]
+
+    monkeypatch.setenv("SESSION_SECRET", "configured")
+    assert load_session_secret(path) == b"configured"
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for rolling conversation summaries, using the offline stub model
+"""
+
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.context_builder import ContextBuilder, estimate_tokens
+from core.llm_gateway import LLMGateway
+from core.summarizer import ConversationSummarizer, StubSummaryModel
+
+
+def test_prompt_stays_bounded_over_long_session():
+    builder = ContextBuilder(budget=400)
+    summarizer = ConversationSummarizer(after_turns=6, keep_turns=2, max_tokens=100)
+    model = StubSummaryModel()
+    convo = {"id": 1, "messages": []}
+    sizes = []
+
+    for turn in range(200):
+        convo["messages"].append({"sender": "user", "message": f"Turn {turn} felt heavy. More details follow."})
+        summarizer.apply_finished("owner", convo)
+        summarizer.schedule("owner", convo, model)
+        context = builder.build(1, convo["messages"], len(convo["messages"]) - 1,
+                                summary=convo.get("summary", ""), start=convo.get("summary_upto", 0))
+        sizes.append(estimate_tokens(context))
+        convo["messages"].append({"sender": "bot", "message": "That sounds hard. Tell me more."})
+        summarizer.wait("owner")
+
+    assert convo["summary"].startswith("Turn 0 felt heavy.")
+    assert convo["summary_upto"] > 300
+    assert context.startswith("Summary of the earlier conversation:")
+    assert max(sizes) <= 400
+    assert max(sizes[50:]) - min(sizes[50:]) < 150
+
+
+def test_short_conversation_is_not_summarized():
+    summarizer = ConversationSummarizer(after_turns=6, keep_turns=2)
+    convo = {"id": 1, "messages": [{"sender": "user", "message": "hi"}] * 12}
+    assert not summarizer.schedule("owner", convo, StubSummaryModel())
+    assert "summary" not in convo
+
+
+class HungModel:
+    model_name = "hung"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def generate_content(self, prompt):
+        self.release.wait(5)
+        return StubSummaryModel().generate_content(prompt)
+
+
+def test_hung_call_times_out_without_stalling_other_conversations():
+    gateway = LLMGateway(max_concurrency=4)
+    summarizer = ConversationSummarizer(after_turns=2, keep_turns=1, deadline=0.2, gateway=gateway)
+    messages = [{"sender": "user", "message": f"Message {i}."} for i in range(6)]
+    stuck = {"id": 1, "messages": list(messages)}
+    other = {"id": 2, "messages": list(messages)}
+    hung = HungModel()
+
+    assert summarizer.schedule("stuck", stuck, hung)
+    assert summarizer.schedule("other", other, StubSummaryModel())
+    summarizer.wait("other")
+    assert summarizer.apply_finished("other", other)
+    assert other["summary"].startswith("Message 0.")
+
+    summarizer.wait("stuck")
+    assert not summarizer.apply_finished("stuck", stuck)
+    assert "summary" not in stuck
+    # The failed run is retried on a later turn
+    hung.release.set()
+    assert summarizer.schedule("stuck", stuck, hung)
+    summarizer.wait("stuck")
+    assert summarizer.apply_finished("stuck", stuck)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for the paged transcript window
+"""
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+import streamlit as st
+
+import components.transcript_window as window
+from components.transcript_window import show_earlier_messages, transcript_start
+
+
+@pytest.fixture(autouse=True)
+def page_size(monkeypatch):
+    monkeypatch.setattr(window, "TRANSCRIPT_PAGE_SIZE", 50)
+    yield
+    st.session_state.pop("transcript_windows", None)
+
+
+def test_only_the_newest_page_is_rendered():
+    assert transcript_start(1, 30) == 0
+    assert transcript_start(1, 50) == 0
+    assert transcript_start(1, 5000) == 4950
+    # New messages keep the window at the bottom
+    assert transcript_start(1, 5001) == 4951
+
+
+def test_loading_earlier_pages_per_conversation():
+    show_earlier_messages(1)
+    assert transcript_start(1, 120) == 20
+    show_earlier_messages(1)
+    assert transcript_start(1, 120) == 0
+    # Other conversations keep their own window
+    assert transcript_start(2, 120) == 70